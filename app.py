@@ -1,33 +1,85 @@
 # utf-8
-from PySide6.QtWidgets import QApplication
-from PySide6.QtGui import QIcon
-from PySide6.QtCore import QCoreApplication
-from ui.main_window import MainWindow
-from core import i18n
-import sys, os
+# 先拿到起点时间（启动剖析从这里算），其余重模块放到 main() 里再导入
+from core import startup_profile
+import sys, os, json, multiprocessing
 
 # 兼容源码运行 & PyInstaller(onefile) 的资源定位
 def resource_path(rel: str) -> str:
     base = getattr(sys, "_MEIPASS", os.path.dirname(__file__))
     return os.path.join(base, rel)
 
+def _parse_profile_args(argv):
+    """--profile-startup[=report.json]：打印启动各阶段耗时 + 最慢的导入；
+    --profile-exit：首帧画完就退出（脚本里反复测冷启动用）。返回 (开关, JSON 路径, 退出, 剩余参数)。"""
+    on, out, quit_after, rest = False, "", False, [argv[0]] if argv else []
+    for a in argv[1:]:
+        if a == "--profile-startup": on = True
+        elif a.startswith("--profile-startup="): on, out = True, a.split("=", 1)[1]
+        elif a == "--profile-exit": quit_after = True
+        else: rest.append(a)
+    return on, out, quit_after, rest
+
+def _install_first_paint_probe(app, win, prof, out_path, quit_after):
+    """第一次有窗口内的控件收到 Paint 事件后，等这一轮绘制结束再记“首帧”。"""
+    from PySide6.QtCore import QObject, QEvent, QTimer
+
+    class _Probe(QObject):
+        done = False
+
+        def eventFilter(self, obj, ev):
+            if not self.done and ev.type() == QEvent.Paint and hasattr(obj, "window") and obj.window() is win:
+                self.done = True
+                QTimer.singleShot(0, finish)
+            return False
+
+    def finish():
+        prof.mark("first paint")
+        app.removeEventFilter(probe)
+        prof.remove_import_hook()
+        sys.stderr.write(prof.format_report() + "\n")
+        if out_path:
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(prof.report(), f, indent=2)
+        if quit_after:
+            QTimer.singleShot(0, app.quit)
+
+    probe = _Probe(app)
+    app.installEventFilter(probe)
+
 def main():
+    on, out_path, quit_after, argv = _parse_profile_args(sys.argv)
+    prof = startup_profile.enable() if on else None
+    if prof: prof.mark("interpreter ready")
+
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QIcon
+    from PySide6.QtCore import QCoreApplication
+    from core import i18n
+    if prof: prof.mark("Qt imported")
+    from ui.main_window import MainWindow
+    if prof: prof.mark("ui.main_window imported")
+
     QCoreApplication.setOrganizationName("XiaoLan9999")
     QCoreApplication.setApplicationName("osu XiaoLan Skin Editor")
-    app = QApplication(sys.argv)
+    app = QApplication(argv)
 
     app.setWindowIcon(QIcon(resource_path("ico/xiaolan.ico")))
+    if prof: prof.mark("QApplication")
 
     i18n.load_language()  # load last chosen language
     win = MainWindow()
+    if prof: prof.mark("MainWindow()")
 
     try:
         win.setWindowIcon(QIcon(resource_path("ico/xiaolan.ico")))
     except Exception:
         pass
 
+    if prof: _install_first_paint_probe(app, win, prof, out_path, quit_after)
     win.show()
+    if prof: prof.mark("show()")
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包后 core.image_batch 的进程池需要
     main()
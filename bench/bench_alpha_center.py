@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+_alpha_center 新旧实现对比（合成精灵 128~2048 px）。
+用法：
+    python bench/bench_alpha_center.py            # 旧实现只跑到 512，太大的尺寸逐像素会跑很久
+    python bench/bench_alpha_center.py --full     # 旧实现也跑全部尺寸
+"""
+from __future__ import annotations
+import os, sys, time, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QImage, QPainter, QColor, QPixmap
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+
+from core import alpha_bbox
+
+SIZES = (128, 256, 512, 1024, 2048)
+
+
+def legacy_alpha_center(pm: QPixmap, thresh: int = 10):
+    """原 std_preview._alpha_center（逐像素 pixelColor）。"""
+    if pm is None or pm.isNull(): return (0,0)
+    img = pm.toImage().convertToFormat(QImage.Format_ARGB32)
+    w, h = img.width(), img.height()
+    minx, miny, maxx, maxy = w, h, -1, -1
+    for y in range(h):
+        for x in range(w):
+            a = img.pixelColor(x, y).alpha()
+            if a > thresh:
+                if x < minx: minx = x
+                if y < miny: miny = y
+                if x > maxx: maxx = x
+                if y > maxy: maxy = y
+    if maxx < minx or maxy < miny: return (0,0)
+    cx_img, cy_img = w/2.0, h/2.0; cx_cnt, cy_cnt = (minx+maxx)/2.0, (miny+maxy)/2.0
+    return (int(round(cx_img - cx_cnt)), int(round(cy_img - cy_cnt)))
+
+
+def make_sprite(size: int) -> QPixmap:
+    """偏心的圆 + 一圈低于阈值的半透明光晕，模拟真实 hitcircle。"""
+    img = QImage(size, size, QImage.Format_ARGB32); img.fill(Qt.transparent)
+    p = QPainter(img); p.setRenderHint(QPainter.Antialiasing, True)
+    p.setPen(Qt.NoPen)
+    p.setBrush(QColor(255, 255, 255, 8)); p.drawEllipse(0, 0, size, size)
+    p.setBrush(QColor(255, 255, 255, 255))
+    p.drawEllipse(size // 8, size // 5, size // 2, size // 2 + size // 16)
+    p.end()
+    return QPixmap.fromImage(img)
+
+
+def timeit(fn, *args, repeat=3):
+    best = None; out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(*args); dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--full", action="store_true", help="旧实现也跑 1024/2048")
+    args = ap.parse_args()
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    print(f"numpy: {alpha_bbox._HAS_NUMPY}")
+    print(f"{'size':>6} {'legacy ms':>12} {'new ms':>10} {'speedup':>9}  offset")
+    for size in SIZES:
+        pm = make_sprite(size)
+        t_new, off_new = timeit(alpha_bbox.alpha_center_pixmap, pm)
+        if args.full or size <= 512:
+            t_old, off_old = timeit(legacy_alpha_center, pm, repeat=1)
+            assert off_old == off_new, (size, off_old, off_new)
+            print(f"{size:>6} {t_old*1000:>12.1f} {t_new*1000:>10.2f} {t_old/t_new:>8.0f}x  {off_new}")
+        else:
+            print(f"{size:>6} {'-':>12} {t_new*1000:>10.2f} {'-':>9}  {off_new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+热重载延迟：改写一个素材 / skin.ini -> 预览重绘完成，耗时多少 ms。
+用法：python bench/bench_hot_reload.py [--rounds 10]
+在临时目录里造一个小皮肤，离屏（offscreen）运行 MainWindow。
+"""
+from __future__ import annotations
+import os, sys, time, argparse, tempfile, statistics
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor
+
+
+def write_png(path: Path, color):
+    img = QImage(256, 256, QImage.Format_ARGB32); img.fill(QColor(*color)); img.save(str(path))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=10)
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="hotreload-"))
+    os.environ.setdefault("OSU_SKIN_EDITOR_CACHE", str(tmp / "cache"))
+    skin = tmp / "skin"; skin.mkdir()
+    (skin / "skin.ini").write_text("[General]\nName: bench\n[Colours]\nCombo1: 255,0,0\n", encoding="utf-8")
+    for n in ("hitcircle", "hitcircleoverlay", "approachcircle", "default-6"):
+        write_png(skin / f"{n}@2x.png", (255, 255, 255, 200))
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    from ui.main_window import MainWindow
+    win = MainWindow(); win.show(); win.act_hot_reload.setChecked(True)
+    win.load_skin(str(skin))
+    while win.is_loading() or win.std_preview.is_loading():
+        app.processEvents(); time.sleep(0.001)
+    print(f"backend: {win.watcher.backend}")
+
+    def wait_for_reload(timeout=3.0):
+        win.last_hot_reload_ms = None
+        t0 = time.perf_counter()
+        while win.last_hot_reload_ms is None and time.perf_counter() - t0 < timeout:
+            app.processEvents(); time.sleep(0.001)
+        return win.last_hot_reload_ms
+
+    results = {"png": [], "ini": []}
+    for i in range(args.rounds):
+        write_png(skin / "hitcircle@2x.png", (i * 20 % 256, 128, 255, 220))
+        ms = wait_for_reload()
+        if ms is not None: results["png"].append(ms)
+        (skin / "skin.ini").write_text(f"[General]\nName: bench\n[Colours]\nCombo1: {i*20%256},0,0\n", encoding="utf-8")
+        ms = wait_for_reload()
+        if ms is not None: results["ini"].append(ms)
+
+    for k, v in results.items():
+        if v:
+            print(f"{k:>4}: n={len(v)} median={statistics.median(v):.1f} ms max={max(v):.1f} ms")
+        else:
+            print(f"{k:>4}: no reload observed")
+    win.watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+SkinIni 编辑耗时：“1K..18K 统一列宽”这类批量改动。
+旧实现每改一个 K 都整块重建 + 全文件重新跑正则；新实现只重写改动的行。
+用法：python bench/bench_mania_edit.py [--copies 1 8 32] [--rounds 10]
+旧实现取自 git 历史（--legacy-rev，默认 152535d），取不到就只测新实现。
+"""
+from __future__ import annotations
+import os, sys, time, argparse, tempfile, statistics, subprocess, types
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT); sys.path.insert(0, os.path.join(ROOT, "bench"))
+os.environ.setdefault("OSU_SKIN_EDITOR_CACHE", tempfile.mkdtemp(prefix="editbench-cache-"))
+
+from core.skin_ini import SkinIni
+from bench_skin_ini import make_ini
+
+
+def load_legacy(rev: str):
+    try:
+        src = subprocess.run(["git", "-C", ROOT, "show", f"{rev}:core/skin_ini.py"],
+                             capture_output=True, check=True, text=True, encoding="utf-8").stdout
+    except Exception:
+        return None
+    mod = types.ModuleType("legacy_skin_ini")
+    sys.modules[mod.__name__] = mod  # dataclass 需要能找到模块
+    exec(compile(src, "legacy_skin_ini.py", "exec"), mod.__dict__)
+    return mod.SkinIni
+
+
+def apply_all(ini, width: int):
+    for k in range(1, 19):
+        ini.mania_set_values(k, {"ColumnWidth": [width] * k, "HitPosition": 400 + width})
+
+
+def timed(fn, rounds):
+    xs = []
+    for _ in range(rounds):
+        t0 = time.perf_counter(); fn(); xs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(xs)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--copies", type=int, nargs="*", default=[1, 8, 32])
+    ap.add_argument("--rounds", type=int, default=10)
+    ap.add_argument("--legacy-rev", default="152535d")
+    args = ap.parse_args()
+    Legacy = load_legacy(args.legacy_rev)
+    tmp = Path(tempfile.mkdtemp(prefix="editbench-"))
+    print(f"{'copies':>6} {'lines':>7} {'legacy':>9} {'new':>8} {'batch':>8} {'speedup':>8}")
+    for n in args.copies:
+        p = tmp / f"skin{n}.ini"; p.write_text(make_ini(n), encoding="utf-8")
+        lines = make_ini(n).count("\n")
+        w = iter(range(10**6))
+        t_old = timed(lambda: apply_all(Legacy.read(p), next(w) % 50 + 1), args.rounds) if Legacy else float("nan")
+        t_new = timed(lambda: apply_all(SkinIni.read(p), next(w) % 50 + 1), args.rounds)
+
+        def batch():
+            v = next(w) % 50 + 1
+            SkinIni.read(p).mania_set_many({k: {"ColumnWidth": [v] * k, "HitPosition": 400 + v} for k in range(1, 19)})
+        t_batch = timed(batch, args.rounds)
+
+        # 没改到的行逐字节不变
+        ini = SkinIni.read(p); before = list(ini.lines); apply_all(ini, 7)
+        diff = [i for i, (a, b) in enumerate(zip(before, ini.lines)) if a != b]
+        assert len(before) == len(ini.lines)
+        assert all(ini.lines[i].startswith(("ColumnWidth", "HitPosition")) for i in diff)
+        print(f"{n:>6} {lines:>7} {t_old:>7.2f}ms {t_new:>6.2f}ms {t_batch:>6.2f}ms {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
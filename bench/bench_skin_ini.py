@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+skin.ini 解析耗时：旧实现（ConfigParser 过滤版 + SkinIni 正则版，两遍）vs core.ini_doc 单遍分词 / 缓存命中。
+用法：python bench/bench_skin_ini.py [--copies 1 8 32] [--rounds 20]
+合成的 skin.ini 含 1K..18K 共 18 个 [Mania] 段，--copies 把整套段重复 N 次模拟“超大”皮肤。
+"""
+from __future__ import annotations
+import os, sys, re, time, argparse, tempfile, statistics
+from configparser import ConfigParser
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OSU_SKIN_EDITOR_CACHE", tempfile.mkdtemp(prefix="inibench-cache-"))
+
+from core.ini_doc import IniDocument, IniView, load_ini, clear_cache
+from core.skin_ini import SkinIni
+
+
+# ---------- 旧实现（原样搬过来做对照） ----------
+def legacy_read_ini_robust(path: Path) -> ConfigParser:
+    raw = path.read_bytes()
+    text = None
+    for enc in ("utf-8-sig", "utf-16", "utf-16-le", "utf-16-be", "gbk", "cp936", "cp1252"):
+        try:
+            text = raw.decode(enc); break
+        except Exception:
+            continue
+    sec_re = re.compile(r'^\s*\[(.+?)\]\s*$')
+    comment_prefixes = ('#', ';', '//', '►', '▶', '•', '★', '※')
+    dup_count = {}
+    out_lines = []
+    for raw_line in text.splitlines():
+        s = raw_line.strip()
+        if not s:
+            out_lines.append(''); continue
+        m = sec_re.match(s)
+        if m:
+            name = m.group(1).strip()
+            dup_count[name] = dup_count.get(name, 0) + 1
+            out_lines.append(f'[{name}#{dup_count[name]}]' if dup_count[name] > 1 else f'[{name}]')
+            continue
+        if any(s.startswith(p) for p in comment_prefixes): continue
+        if re.fullmatch(r'[=\-_.~`|/*\\]{3,}', s): continue
+        if '//' in s:
+            s = s.split('//', 1)[0].rstrip()
+            if not s: continue
+        if re.match(r'^[A-Za-z0-9_][A-Za-z0-9_ ]*\s*[:=]', s):
+            out_lines.append(s)
+    cfg = ConfigParser(strict=False, interpolation=None)
+    cfg.optionxform = str
+    cfg.read_file(StringIO('\n'.join(out_lines)))
+    return cfg
+
+
+_SEC = re.compile(r'^\s*\[(?P<name>[^\]]+)\]\s*$')
+_KV = re.compile(r'^\s*([A-Za-z0-9_]+)\s*:\s*(.*?)\s*$')
+_CM = re.compile(r'^\s*//')
+
+
+def legacy_skin_ini(path: Path):
+    lines = Path(path).read_text(encoding="utf-8", errors="ignore").splitlines()
+    sections, cur, start = [], None, 0
+    for i, line in enumerate(lines):
+        m = _SEC.match(line)
+        if m:
+            if cur is not None: sections.append((cur, start, i))
+            cur, start = m.group("name").strip(), i
+    if cur is not None: sections.append((cur, start, len(lines)))
+    blocks = {}
+    for name, s, e in sections:
+        if name.lower() != "mania": continue
+        kv, keys = [], None
+        for i in range(s + 1, e):
+            line = lines[i]
+            if not line.strip() or _CM.match(line): continue
+            m = _KV.match(line)
+            if m:
+                kv.append((m.group(1), m.group(2)))
+                if m.group(1).lower() == "keys":
+                    try: keys = int(m.group(2))
+                    except Exception: pass
+        if keys is not None: blocks[keys] = kv
+    return blocks
+
+
+# ---------- 合成数据 ----------
+def make_ini(copies: int) -> str:
+    out = ["// generated", "[General]", "Name: bench", "Author: bench", "", "[Colours]",
+           "Combo1: 255,0,0", "Combo2: 0,255,0", "", "=========="]
+    for _ in range(copies):
+        for k in range(1, 19):
+            out += ["", "[Mania]", f"Keys: {k}", "► layout",
+                    "ColumnStart: 136", "HitPosition: 402", "ScorePosition: 240",
+                    "ColumnWidth: " + ",".join(["30"] * k),
+                    "ColumnLineWidth: " + ",".join(["2"] * (k + 1)),
+                    "ColumnSpacing: " + ",".join(["0"] * max(k - 1, 1)), "// inline comment"]
+            out += [f"KeyImage{c}: mania/key{c % 2}" for c in range(k)]
+            out += [f"NoteImage{c}: mania/note{c % 2}  // per column" for c in range(k)]
+            out += [f"Colour{c + 1}: 0,0,0,255" for c in range(k)]
+    return "\n".join(out) + "\n"
+
+
+def timed(fn, rounds):
+    xs = []
+    for _ in range(rounds):
+        t0 = time.perf_counter(); fn(); xs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(xs)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--copies", type=int, nargs="*", default=[1, 8, 32])
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+    tmp = Path(tempfile.mkdtemp(prefix="inibench-"))
+    print(f"{'copies':>6} {'lines':>7} {'legacy x2':>10} {'tokenize':>9} {'cached':>8} {'speedup':>8}")
+    for n in args.copies:
+        p = tmp / f"skin{n}.ini"; p.write_text(make_ini(n), encoding="utf-8")
+        lines = p.read_text(encoding="utf-8").count("\n")
+
+        # 旧：loader 一遍 ConfigParser，Mania 面板 / 预览再各跑一遍正则
+        t_old = timed(lambda: (legacy_read_ini_robust(p), legacy_skin_ini(p), legacy_skin_ini(p)), args.rounds)
+
+        def fresh():
+            clear_cache(); IniView(load_ini(p)); SkinIni.read(p); SkinIni.read(p)
+        t_new = timed(fresh, args.rounds)
+        t_hit = timed(lambda: (IniView(load_ini(p)), SkinIni.read(p), SkinIni.read(p)), args.rounds)
+
+        # 结果一致性：段名与 Mania 键值
+        cfg = legacy_read_ini_robust(p); view = IniView(load_ini(p))
+        assert cfg.sections() == view.sections()
+        assert all(dict(cfg.items(s)) == dict(view.items(s)) for s in cfg.sections())
+        # 旧正则版不剥行内 // 注释（值里会带上注释），新版与 loader 一致会剥掉
+        assert {k: {a: b.split('//')[0].rstrip() for a, b in v} for k, v in legacy_skin_ini(p).items()} == \
+               {k: SkinIni.read(p).mania_get(k) for k in SkinIni.read(p).available_mania_keys()}
+        assert IniDocument(p.read_text(encoding="utf-8")).text() == p.read_text(encoding="utf-8")
+        print(f"{n:>6} {lines:>7} {t_old:>8.2f}ms {t_new:>7.2f}ms {t_hit:>6.2f}ms {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
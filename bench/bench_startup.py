@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+启动 / 大皮肤回归基准：离屏（offscreen）跑一遍关键路径，输出可以跨版本 diff 的 JSON。
+用法：python bench/bench_startup.py [--assets 2000] [--hd-ratio 0.5] [--mania-copies 8]
+                                     [--cold-rounds 3] [--rounds 3] [--out result.json] [--compare old.json]
+- 合成皮肤：--assets 个 PNG（其中 --hd-ratio 比例带 @2x）、少量 WAV、skin.ini 含 18×--mania-copies 个 [Mania] 段；
+- cold_start：子进程跑 app.py --profile-startup=... --profile-exit，取各阶段 marks（中位数）；
+- 进程内：MainWindow.load_skin、std/mania 预览首帧、std/mania 谱面回放每帧、光标拖尾每帧、素材对话框打开到扫描完成、.osk 导出 / 导入。
+--compare 读上一次的 JSON，按同名指标列出变化百分比（只看 *_ms）。
+"""
+from __future__ import annotations
+import os, sys, json, time, wave, shutil, argparse, platform, statistics, subprocess, tempfile
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("OSU_SKIN_EDITOR_CACHE", tempfile.mkdtemp(prefix="startbench-cache-"))
+
+from bench_skin_ini import make_ini
+
+SCHEMA = 1
+# 预览真正会用到的名字放在前面，其余用填充名凑数
+_REAL = ["hitcircle", "hitcircleoverlay", "approachcircle", "cursor", "cursortrail",
+         *[f"default-{i}" for i in range(10)], *[f"score-{i}" for i in range(10)],
+         "mania-note1", "mania-note1L", "mania-note1T", "mania-key1", "mania-key1D", "mania-stage-left",
+         "mania-stage-right", "sliderb0", "reversearrow", "spinner-circle"]
+
+
+# ---------- 合成皮肤 ----------
+def make_skin(root: Path, assets: int, hd_ratio: float, mania_copies: int, sounds: int = 20) -> dict:
+    from PySide6.QtGui import QImage, QColor
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "skin.ini").write_text(make_ini(mania_copies), encoding="utf-8")
+    names = _REAL[:assets] + [f"bench-fill-{i:05d}" for i in range(max(0, assets - len(_REAL)))]
+    n_hd = int(round(len(names) * hd_ratio))
+    cache = {}
+    for i, name in enumerate(names):
+        hd = i < n_hd
+        side = 128 if hd else 64
+        key = (side, i % 7)
+        if key not in cache:
+            img = QImage(side, side, QImage.Format_ARGB32)
+            img.fill(QColor(40 * (i % 7), 128, 255 - 30 * (i % 7), 200))
+            tmp = root / f".bench-{side}-{i % 7}.png"
+            img.save(str(tmp)); cache[key] = tmp.read_bytes(); tmp.unlink()
+        (root / f"{name}{'@2x' if hd else ''}.png").write_bytes(cache[key])
+    for i in range(sounds):
+        with wave.open(str(root / f"bench-hit{i:02d}.wav"), "wb") as w:
+            w.setnchannels(1); w.setsampwidth(2); w.setframerate(22050)
+            w.writeframes(b"\x00\x00" * 2205)
+    return {"assets": len(names), "hd": n_hd, "sounds": sounds, "mania_sections": 18 * mania_copies,
+            "bytes": sum(p.stat().st_size for p in root.rglob("*") if p.is_file())}
+
+
+def median(xs):
+    return round(statistics.median(xs), 2) if xs else None
+
+
+# ---------- 冷启动（子进程） ----------
+def cold_start(rounds: int, tmp: Path) -> dict:
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", XDG_CONFIG_HOME=str(tmp / "config"))
+    marks, heavy, wall = {}, set(), []
+    for i in range(rounds):
+        out = tmp / f"cold-{i}.json"
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, "app.py"), f"--profile-startup={out}", "--profile-exit"],
+                       env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=120)
+        wall.append((time.perf_counter() - t0) * 1000)
+        if not out.exists(): continue
+        rep = json.loads(out.read_text(encoding="utf-8"))
+        for k, v in rep.get("marks_ms", {}).items():
+            marks.setdefault(k, []).append(v)
+        heavy.update(rep.get("heavy_loaded", []))
+    # "ui.main_window imported" -> ui_main_window_imported_ms
+    res = {"_".join(k.lower().replace("()", "").replace(".", " ").split()) + "_ms": median(v) for k, v in marks.items()}
+    res["process_wall_ms"] = median(wall)
+    res["heavy_loaded"] = sorted(heavy)
+    return res
+
+
+# ---------- 进程内 ----------
+def wait_until(app, cond, timeout=60.0) -> bool:
+    t0 = time.perf_counter()
+    while not cond():
+        if time.perf_counter() - t0 > timeout: return False
+        app.processEvents(); time.sleep(0.001)
+    return True
+
+
+def in_process(skin: Path, tmp: Path, rounds: int) -> dict:
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QCoreApplication
+    # 独立的 QSettings 命名空间，不碰用户自己的最近打开 / 面板布局
+    QCoreApplication.setOrganizationName("osu-skin-editor-bench")
+    QCoreApplication.setApplicationName("bench_startup")
+    app = QApplication.instance() or QApplication(sys.argv)
+    from ui.main_window import MainWindow
+    from core import osk_io
+
+    win = MainWindow(); win.resize(1280, 800); win.show()
+    wait_until(app, lambda: win.isVisible(), 5.0); app.processEvents()
+    res = {}
+
+    def run(fn):
+        xs = []
+        for _ in range(rounds):
+            t0 = time.perf_counter(); fn(); xs.append((time.perf_counter() - t0) * 1000)
+        return median(xs)
+
+    # load_skin 在后台线程里跑：算到素材列表填好（skin_loaded）为止
+    def load():
+        win.load_skin(str(skin)); wait_until(app, lambda: not win.is_loading())
+    res["load_skin_ms"] = run(load)
+    res["assets_loaded"] = len(win.skin.assets) if win.skin else 0
+
+    # 首帧：清空图片缓存、重新 set_skin，等预览素材全部解码到位后画一帧
+    from ui.image_cache import image_cache
+    def first_paint(view):
+        def fn():
+            image_cache().invalidate()
+            view.set_skin(win.skin)
+            if hasattr(view, "is_loading"): wait_until(app, lambda: not view.is_loading())
+            view.grab()
+        return fn
+    res["std_preview_first_paint_ms"] = run(first_paint(win.std_preview))
+    res["std_preview_repaint_ms"] = run(lambda: win.std_preview.grab())
+    res["mania_preview_first_paint_ms"] = run(first_paint(win.mania_preview))
+
+    # 谱面回放：逐帧推进时间，取每帧绘制的中位数 / p99
+    from core.beatmap import synthetic_mania, synthetic_std
+    def playback(view, chart, prefix, start=5000):
+        view.load_chart(chart, play=False)
+        frames = []
+        for i in range(240 * max(1, rounds)):
+            view.seek(start + i * 16.7)
+            t0 = time.perf_counter(); view.grab(); frames.append((time.perf_counter() - t0) * 1000)
+        frames.sort()
+        res[f"{prefix}_objects"] = chart.count
+        res[f"{prefix}_frame_ms"] = median(frames)
+        res[f"{prefix}_frame_p99_ms"] = round(frames[int(len(frames) * 0.99) - 1], 2)
+        view.clear_chart()
+    playback(win.mania_preview, synthetic_mania(7, seconds=600, nps=60, ln_ratio=0.2), "mania_chart")   # 约 3 万个物件
+    std = synthetic_std(seconds=300, bpm=300, ar=8)
+    playback(win.std_preview, std, "std_chart")                                                         # 1/4 串为主
+    # 滑条段：身体第一次出现时光栅化，之后命中缓存
+    playback(win.std_preview, std, "std_slider", start=next(o.time for o in std.objects if o.is_slider))
+    res["std_slider_rasters"] = win.std_preview.sliders.rasters
+
+    def cursor_trail(density, prefix):
+        from core.cursor_trail import synthetic_path
+        view = win.cursor_preview
+        view.set_trail_density(density); view.set_path(synthetic_path())
+        frames = []; segments = 0
+        for i in range(240 * max(1, rounds)):
+            view.clock.seek(i * 16.7); view.advance(i * 16.7)
+            t0 = time.perf_counter(); view.grab(); frames.append((time.perf_counter() - t0) * 1000)
+            segments = max(segments, view.frame_stats["segments"])
+        res[f"{prefix}_frame_ms"] = median(frames)
+        res[f"{prefix}_segments"] = segments
+        view.set_path(None)
+    cursor_trail(1, "cursor_trail")
+    cursor_trail(8, "cursor_trail_dense")     # 拖尾密度对每帧耗时的影响
+
+    def open_assets_dialog():
+        from ui.assets_manager import AssetsManagerDialog
+        dlg = AssetsManagerDialog(skin, win); dlg.show()
+        ok = wait_until(app, lambda: not dlg._scans)
+        rows = dlg.img_model.rowCount() + dlg.aud_model.rowCount()
+        dlg.done(0); dlg.deleteLater(); app.processEvents()
+        return ok, rows
+    t0 = time.perf_counter(); ok, rows = open_assets_dialog()
+    res["assets_dialog_first_open_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    res["assets_dialog_open_ms"] = run(lambda: open_assets_dialog())
+    res["assets_dialog_rows"] = rows if ok else None
+
+    osk = tmp / "bench.osk"
+    res["export_osk_ms"] = run(lambda: osk_io.export_osk(skin, osk))
+    res["osk_bytes"] = osk.stat().st_size
+    res["export_osk_slim_ms"] = run(lambda: osk_io.export_osk(skin, tmp / "bench-slim.osk", slim=True))
+
+    def do_import():
+        dest = tmp / "imported"
+        if dest.exists(): shutil.rmtree(dest)
+        osk_io.import_osk(osk, dest)
+    res["import_osk_ms"] = run(do_import)
+
+    win.watcher.stop(); win.close(); app.processEvents()
+    return res
+
+
+# ---------- 对比 ----------
+def compare(old: dict, new: dict) -> list:
+    lines = []
+    for sect in ("cold_start", "in_process"):
+        a, b = old.get(sect, {}), new.get(sect, {})
+        for k in sorted(set(a) & set(b)):
+            if not k.endswith("_ms") or not a[k] or b[k] is None: continue
+            pct = (b[k] - a[k]) / a[k] * 100
+            flag = "  <-- slower" if pct > 10 else ""
+            lines.append(f"{sect}.{k:<34} {a[k]:>10.1f} -> {b[k]:>10.1f} ms  {pct:+6.1f}%{flag}")
+    return lines
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--assets", type=int, default=2000)
+    ap.add_argument("--hd-ratio", type=float, default=0.5)
+    ap.add_argument("--mania-copies", type=int, default=8)
+    ap.add_argument("--cold-rounds", type=int, default=3, help="0 = 不测冷启动")
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--out", default="", help="JSON 输出路径；默认打印到 stdout")
+    ap.add_argument("--compare", default="", help="上一次的 JSON，打印各指标变化")
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="startbench-"))
+    try:
+        skin = tmp / "skin"
+        t0 = time.perf_counter()
+        info = make_skin(skin, args.assets, max(0.0, min(1.0, args.hd_ratio)), args.mania_copies)
+        info["generate_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        result = {
+            "schema": SCHEMA,
+            "env": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count(), "qt_platform": os.environ.get("QT_QPA_PLATFORM")},
+            "params": {"assets": args.assets, "hd_ratio": args.hd_ratio, "mania_copies": args.mania_copies,
+                       "rounds": args.rounds, "cold_rounds": args.cold_rounds},
+            "skin": info,
+            "cold_start": cold_start(args.cold_rounds, tmp) if args.cold_rounds > 0 else {},
+            "in_process": in_process(skin, tmp, max(1, args.rounds)),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if old.get("params") != result["params"]:
+            print("warning: params differ from the compared run", file=sys.stderr)
+        print("\n".join(compare(old, result)) or "nothing to compare", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
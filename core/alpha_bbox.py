@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Alpha 包围盒 / 视觉中心计算。
+- 优先使用 NumPy：直接映射 QImage 像素缓冲区（零拷贝视图），向量化求 bbox。
+- 没有 NumPy 时退回纯 Pillow：阈值化 alpha 后用 Image.getbbox()。
+偏移的定义与旧版 std_preview._alpha_center 完全一致：
+    (图像中心 - 不透明内容中心)，四舍五入为整数。
+"""
+from __future__ import annotations
+from typing import Optional, Tuple
+import sys
+
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    np = None  # type: ignore
+    _HAS_NUMPY = False
+
+# (minx, miny, maxx, maxy)，闭区间；全透明时为 None
+BBox = Tuple[int, int, int, int]
+
+# ARGB32 在内存里按 32 位整数存放，小端机器上字节序是 B,G,R,A
+_ALPHA_BYTE = 3 if sys.byteorder == "little" else 0
+
+
+def center_offset(bbox: Optional[BBox], w: int, h: int) -> Tuple[int, int]:
+    """bbox -> 把内容中心对齐到图像中心所需的偏移。"""
+    if bbox is None: return (0, 0)
+    minx, miny, maxx, maxy = bbox
+    cx_img, cy_img = w/2.0, h/2.0; cx_cnt, cy_cnt = (minx+maxx)/2.0, (miny+maxy)/2.0
+    return (int(round(cx_img - cx_cnt)), int(round(cy_img - cy_cnt)))
+
+
+def alpha_bbox_array(alpha, thresh: int = 10) -> Optional[BBox]:
+    """alpha: 2D uint8 数组（h, w）。"""
+    mask = alpha > thresh
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0: return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return (int(cols[0]), int(rows[0]), int(cols[-1]), int(rows[-1]))
+
+
+def alpha_bbox_pil(im, thresh: int = 10) -> Optional[BBox]:
+    """Pillow 版本：阈值化 alpha 后 getbbox（getbbox 的右/下边界是开区间）。"""
+    if im.mode != "RGBA":
+        im = im.convert("RGBA")
+    a = im.getchannel("A").point(lambda v: 255 if v > thresh else 0)
+    bb = a.getbbox()
+    if not bb: return None
+    l, t, r, b = bb
+    return (l, t, r - 1, b - 1)
+
+
+def _argb32(img):
+    from PySide6.QtGui import QImage
+    if img.format() not in (QImage.Format_ARGB32, QImage.Format_ARGB32_Premultiplied):
+        img = img.convertToFormat(QImage.Format_ARGB32)
+    return img
+
+
+def alpha_bbox_qimage(img, thresh: int = 10) -> Optional[BBox]:
+    """QImage -> bbox。已是 ARGB32 时不会产生任何像素拷贝。"""
+    if img is None or img.isNull(): return None
+    img = _argb32(img)
+    w, h, bpl = img.width(), img.height(), img.bytesPerLine()
+    if _HAS_NUMPY:
+        buf = np.frombuffer(img.constBits(), dtype=np.uint8, count=bpl * h)
+        alpha = buf.reshape(h, bpl)[:, _ALPHA_BYTE:w * 4:4]
+        return alpha_bbox_array(alpha, thresh)
+    from PIL import Image
+    raw = "BGRA" if _ALPHA_BYTE == 3 else "ARGB"
+    im = Image.frombuffer("RGBA", (w, h), bytes(img.constBits()), "raw", raw, bpl, 1)
+    return alpha_bbox_pil(im, thresh)
+
+
+def alpha_center_qimage(img, thresh: int = 10) -> Tuple[int, int]:
+    if img is None or img.isNull(): return (0, 0)
+    return center_offset(alpha_bbox_qimage(img, thresh), img.width(), img.height())
+
+
+def alpha_center_pixmap(pm, thresh: int = 10) -> Tuple[int, int]:
+    if pm is None or pm.isNull(): return (0, 0)
+    return alpha_center_qimage(pm.toImage(), thresh)
@@ -1,9 +1,10 @@
 
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple, Dict
-import shutil, datetime, subprocess, os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import shutil, datetime, os
 
 # what osu! skins typically accept
 IMAGE_EXTS = {".png"}
@@ -19,20 +20,115 @@ def backup_dir(skin_root: Path) -> Path:
     ensure_dir(p)
     return p
 
-def list_images(skin_root: Path) -> List[Path]:
-    out = []
-    for ext in (".png", ".jpg", ".jpeg", ".bmp", ".webp"):
-        out.extend(skin_root.glob(f"**/*{ext}"))
-    # only within root, skip backup folder
-    out = [p for p in out if "__conflicts_backup" not in p.parts]
-    return sorted(out)
-
-def list_audio(skin_root: Path) -> List[Path]:
-    out = []
-    for ext in (".wav", ".ogg", ".mp3", ".flac"):
-        out.extend(skin_root.glob(f"**/*{ext}"))
-    out = [p for p in out if "__conflicts_backup" not in p.parts]
-    return sorted(out)
+IMAGE_EXTS_ANY = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+MEDIA_EXTS = set(IMAGE_EXTS_ANY) | AUDIO_EXTS_COMMON
+SKIP_DIRS = {"__conflicts_backup"}
+
+
+@dataclass
+class MediaFile:
+    path: Path
+    rel: str        # 相对皮肤根目录，"/" 分隔
+    stem: str       # 与旧版 stem_conflicts 相同：p.with_suffix("").name
+    ext: str        # 小写，含点
+    size: int = -1      # 仅 stat=True 扫描时填写
+    mtime_ns: int = -1
+
+
+@dataclass
+class MediaCatalogue:
+    """一次目录遍历的结果；按后缀 / 文件名主干 / 目录建好索引，之后的查询都不再碰磁盘。"""
+    root: Path
+    files: List[MediaFile] = field(default_factory=list)
+    by_ext: Dict[str, List[MediaFile]] = field(default_factory=dict)
+    by_stem: Dict[str, List[MediaFile]] = field(default_factory=dict)
+    by_dir: Dict[str, List[MediaFile]] = field(default_factory=dict)
+
+    def add(self, f: MediaFile) -> None:
+        self.files.append(f)
+        self.by_ext.setdefault(f.ext, []).append(f)
+        self.by_stem.setdefault(f.stem, []).append(f)
+        self.by_dir.setdefault(f.rel.rpartition("/")[0], []).append(f)
+
+    def of_exts(self, exts: Iterable[str]) -> List[MediaFile]:
+        out: List[MediaFile] = []
+        for e in exts:
+            out.extend(self.by_ext.get(e.lower(), ()))
+        out.sort(key=lambda f: f.path)
+        return out
+
+    def images(self) -> List[Path]:
+        return [f.path for f in self.of_exts(IMAGE_EXTS_ANY)]
+
+    def audio(self) -> List[Path]:
+        return [f.path for f in self.of_exts(AUDIO_EXTS_COMMON)]
+
+    def stem_conflicts(self, exts: Iterable[str] = AUDIO_EXTS_COMMON) -> Dict[str, List[Path]]:
+        """同一主干、不同后缀（限定在 exts 内）的文件组。"""
+        exts = {e.lower() for e in exts}
+        out: Dict[str, List[Path]] = {}
+        for stem, group in self.by_stem.items():
+            hit = sorted(f.path for f in group if f.ext in exts)
+            if len(hit) > 1: out[stem] = hit
+        return out
+
+
+def walk_media(skin_root: Path, exts: Iterable[str] = MEDIA_EXTS,
+               skip_dirs=SKIP_DIRS, stat: bool = False) -> Iterator[MediaFile]:
+    """os.scandir 单遍遍历：排除目录在进入前就剪掉，文件类型直接用目录项自带的信息。
+    边走边产出（目录内按名字排序，深度优先），后台扫描可以分批喂 UI。
+    stat=True 时顺带填 size / mtime_ns（Windows 上目录项自带，Linux 上每个文件多一次 stat）。"""
+    root = Path(skin_root)
+    exts = {e.lower() for e in exts}
+    stack = [(str(root), "")]
+    while stack:
+        dpath, drel = stack.pop()
+        try:
+            with os.scandir(dpath) as it:
+                entries = sorted(it, key=lambda de: de.name)
+        except OSError:
+            continue
+        subdirs = []
+        for de in entries:
+            try:
+                if de.is_dir(follow_symlinks=False):
+                    if de.name not in skip_dirs:
+                        subdirs.append((de.path, f"{drel}{de.name}/"))
+                    continue
+                stem, ext = os.path.splitext(de.name)
+                ext = ext.lower()
+                if ext not in exts or not de.is_file():
+                    continue
+                if stat:
+                    st = de.stat()
+                    yield MediaFile(Path(de.path), drel + de.name, stem, ext, st.st_size, st.st_mtime_ns)
+                    continue
+            except OSError:
+                continue
+            yield MediaFile(Path(de.path), drel + de.name, stem, ext)
+        stack.extend(reversed(subdirs))
+
+
+def scan_media(skin_root: Path, exts: Iterable[str] = MEDIA_EXTS, skip_dirs=SKIP_DIRS,
+               stat: bool = False) -> MediaCatalogue:
+    cat = MediaCatalogue(Path(skin_root))
+    for f in walk_media(skin_root, exts, skip_dirs, stat):
+        cat.add(f)
+    return cat
+
+
+def iter_media(skin_root: Path, exts) -> Iterator[Path]:
+    """边走目录边产出匹配后缀的文件路径（walk_media 的简化版）。"""
+    for f in walk_media(skin_root, exts):
+        yield f.path
+
+
+def list_images(skin_root: Path, catalogue: Optional[MediaCatalogue] = None) -> List[Path]:
+    return (catalogue or scan_media(skin_root, IMAGE_EXTS_ANY)).images()
+
+
+def list_audio(skin_root: Path, catalogue: Optional[MediaCatalogue] = None) -> List[Path]:
+    return (catalogue or scan_media(skin_root, AUDIO_EXTS_COMMON)).audio()
 
 def stem_conflicts(paths: List[Path]) -> Dict[str, List[Path]]:
     by_stem: Dict[str, List[Path]] = {}
@@ -54,7 +150,9 @@ def replace_image(src: Path, dst: Path, make_png: bool=True) -> Path:
     return dst
 
 def replace_audio(src: Path, dst: Path, prefer_ext: str=".wav") -> Path:
-    """Copy/convert audio to dst with prefer_ext using ffmpeg if needed."""
+    """Copy/convert audio to dst with prefer_ext.
+    转换走 core.audio_queue：按内容哈希命中缓存直接复制；否则 ffmpeg，再不行进程内转换。"""
+    from core.audio_queue import TranscodeError, find_ffmpeg, transcode_one
     prefer_ext = prefer_ext.lower()
     if prefer_ext not in AUDIO_EXTS_ALLOWED:
         prefer_ext = ".wav"
@@ -64,20 +162,25 @@ def replace_audio(src: Path, dst: Path, prefer_ext: str=".wav") -> Path:
         # direct copy
         shutil.copy2(src, dst)
         return dst
-    # fallback convert via ffmpeg
-    cmd = ["ffmpeg", "-y", "-i", str(src), str(dst)]
+    ffmpeg = find_ffmpeg()
     try:
-        subprocess.check_call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        transcode_one(src, dst, ffmpeg)
         return dst
-    except Exception as e:
+    except (TranscodeError, OSError) as e:
+        if ffmpeg:
+            raise RuntimeError(f"音频转换失败：{e}")
         raise RuntimeError("需要 ffmpeg 才能把该音频转换为 " + prefer_ext)
 
-def resolve_audio_conflicts(skin_root: Path, keep_choice: Dict[str, Path]) -> Path:
-    """Move non-kept duplicates into backup folder. keep_choice maps stem->path to keep."""
+def resolve_audio_conflicts(skin_root: Path, keep_choice: Dict[str, Path],
+                            catalogue: Optional[MediaCatalogue] = None) -> Path:
+    """Move non-kept duplicates into backup folder. keep_choice maps stem->path to keep.
+    同主干的文件直接从 catalogue 里查（不传就现扫一遍），不再逐个 rglob。"""
+    cat = catalogue or scan_media(skin_root, AUDIO_EXTS_COMMON)
     bdir = backup_dir(skin_root)
     for stem, keep in keep_choice.items():
-        for p in (skin_root.rglob(stem + ".*")):
-            if p.suffix.lower() in AUDIO_EXTS_COMMON and p != keep:
+        for f in cat.by_stem.get(stem, ()):
+            p = f.path
+            if f.ext in AUDIO_EXTS_COMMON and p != keep:
                 rel = p.relative_to(skin_root)
                 dst = bdir / rel
                 dst.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+音频转码队列。
+- 同时跑 N 个 ffmpeg 子进程（默认 N = CPU 核数），用线程池看管；每个任务通过 `-progress pipe:1`
+  解析 out_time，结合源文件时长（先从 stderr 等到 Duration 再读进度）报告单任务进度；取消按定时检查，不依赖进度输出。
+- 结果按“源文件内容哈希 + 目标格式”缓存在用户缓存目录 audio/ 下，同一个 FLAC 再导入直接复制缓存。
+- 没有 ffmpeg（或 ffmpeg 失败）时尽量在进程内完成：WAV -> WAV 直接复制；装了 soundfile 时
+  可以把 FLAC / OGG / WAV 转成 WAV / OGG。
+- 输出先写同目录临时文件再 os.replace。
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib, os, re, shutil, subprocess, threading, time
+
+from core.user_cache import cache_dir
+
+try:
+    import soundfile  # 可选：进程内解码/编码 FLAC、OGG、WAV
+    _HAS_SOUNDFILE = True
+except Exception:
+    soundfile = None  # type: ignore
+    _HAS_SOUNDFILE = False
+
+# (job 序号, 0..1 的进度, 文件名)
+JobProgressFn = Optional[Callable[[int, float, str], None]]
+ProgressFn = Optional[Callable[[int, int, str], None]]
+CancelFn = Optional[Callable[[], bool]]
+
+# 缓存键里带上这个版本号；改了转码参数就换一个，旧缓存自然失效
+CACHE_VERSION = 1
+_HASH_CHUNK = 1 << 20
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+# 读进度前最多等这么久拿源文件时长（ffmpeg 先打印输入信息再开始转码，通常立刻就有）
+DURATION_WAIT_S = 2.0
+# ffmpeg 不输出进度时（探测 / 卡住）也按这个间隔检查取消
+CANCEL_POLL_S = 0.1
+# 进程内能写的格式
+_SF_FORMATS = {".wav": ("WAV", "PCM_16"), ".ogg": ("OGG", "VORBIS")}
+
+
+@dataclass
+class AudioResult:
+    src: Path
+    dst: Path
+    ok: bool
+    via: str = ""      # "copy" / "cache" / "ffmpeg" / "soundfile"
+    error: str = ""
+
+
+class TranscodeError(RuntimeError):
+    pass
+
+
+def find_ffmpeg() -> Optional[str]:
+    return os.environ.get("OSU_SKIN_EDITOR_FFMPEG") or shutil.which("ffmpeg")
+
+
+def content_hash(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path(src_hash: str, ext: str) -> Path:
+    return cache_dir("audio", src_hash[:2]) / f"{src_hash}.v{CACHE_VERSION}{ext}"
+
+
+def _tmp_for(dst: Path) -> Path:
+    return dst.with_name(f".{dst.stem}.{threading.get_ident()}.part{dst.suffix}")
+
+
+def _copy_atomic(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_for(dst)
+    try:
+        shutil.copyfile(src, tmp); os.replace(tmp, dst)
+    finally:
+        if tmp.exists(): tmp.unlink()
+
+
+# ---------- ffmpeg ----------
+def parse_progress_line(line: str, duration: float) -> Optional[float]:
+    """'out_time_us=1234567' / 'out_time_ms=…'（ffmpeg 里两者单位都是微秒）/ 'progress=end' -> 0..1"""
+    key, _, val = line.strip().partition("=")
+    if key == "progress" and val == "end":
+        return 1.0
+    if key in ("out_time_us", "out_time_ms") and duration > 0:
+        try: return max(0.0, min(1.0, int(val) / 1e6 / duration))
+        except ValueError: return None
+    return None
+
+
+def run_ffmpeg(ffmpeg: str, src: Path, dst: Path, on_progress: Callable[[float], None],
+               cancel: CancelFn = None) -> None:
+    tmp = _tmp_for(dst)
+    cmd = [ffmpeg, "-hide_banner", "-nostdin", "-y", "-i", str(src),
+           "-progress", "pipe:1", "-nostats", str(tmp)]
+    flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, encoding="utf-8", errors="replace", creationflags=flags)
+    duration = [0.0]; err_tail: List[str] = []
+    header_done = threading.Event()     # 时长已解析，或输入信息已经打印完（没有时长的流）
+
+    def read_stderr():
+        for line in proc.stderr:
+            m = _DURATION_RE.search(line)
+            if m and not duration[0]:
+                h, mi, s = m.groups(); duration[0] = int(h) * 3600 + int(mi) * 60 + float(s)
+                header_done.set()
+            elif line.startswith(("Output #", "Stream mapping")):
+                header_done.set()
+            err_tail.append(line); del err_tail[:-20]
+        header_done.set()
+
+    def watch_cancel():
+        while proc.poll() is None:
+            if cancel():
+                proc.kill(); return
+            time.sleep(CANCEL_POLL_S)
+
+    t = threading.Thread(target=read_stderr, daemon=True); t.start()
+    if cancel: threading.Thread(target=watch_cancel, daemon=True).start()
+    try:
+        # 先拿到时长再读进度，否则抢在 Duration 之前的 out_time 行会被当成无效丢掉
+        header_done.wait(DURATION_WAIT_S)
+        for line in proc.stdout:
+            if cancel and cancel():
+                proc.kill(); break
+            frac = parse_progress_line(line, duration[0])
+            if frac is not None: on_progress(frac)
+        rc = proc.wait(); t.join(timeout=1.0)
+        if cancel and cancel():
+            raise TranscodeError("cancelled")
+        if rc != 0 or not tmp.exists():
+            raise TranscodeError(f"ffmpeg exit {rc}: {''.join(err_tail[-3:]).strip()}")
+        os.replace(tmp, dst)
+    finally:
+        if proc.poll() is None: proc.kill()
+        if tmp.exists(): tmp.unlink()
+
+
+# ---------- in-process fallback ----------
+def can_convert_in_process(src: Path, dst: Path) -> bool:
+    s, d = src.suffix.lower(), dst.suffix.lower()
+    if s == d: return True
+    return _HAS_SOUNDFILE and d in _SF_FORMATS and s in (".wav", ".flac", ".ogg", ".aiff", ".aif")
+
+
+def convert_in_process(src: Path, dst: Path) -> str:
+    if src.suffix.lower() == dst.suffix.lower():
+        _copy_atomic(src, dst); return "copy"
+    if not can_convert_in_process(src, dst):
+        raise TranscodeError("需要 ffmpeg 才能把该音频转换为 " + dst.suffix)
+    data, rate = soundfile.read(str(src), always_2d=True)
+    fmt, subtype = _SF_FORMATS[dst.suffix.lower()]
+    tmp = _tmp_for(dst)
+    try:
+        soundfile.write(str(tmp), data, rate, format=fmt, subtype=subtype); os.replace(tmp, dst)
+    finally:
+        if tmp.exists(): tmp.unlink()
+    return "soundfile"
+
+
+# ---------- queue ----------
+def transcode_one(src: Path, dst: Path, ffmpeg: Optional[str] = None,
+                  on_progress: Callable[[float], None] = lambda f: None,
+                  cancel: CancelFn = None, use_cache: bool = True) -> str:
+    """转一个文件；返回走的路径（copy / cache / ffmpeg / soundfile）。失败抛 TranscodeError。"""
+    src, dst = Path(src), Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.suffix.lower() == dst.suffix.lower():
+        _copy_atomic(src, dst); on_progress(1.0); return "copy"
+    key = content_hash(src) if use_cache else ""
+    cached = cache_path(key, dst.suffix.lower()) if key else None
+    if cached is not None and cached.exists():
+        _copy_atomic(cached, dst); on_progress(1.0); return "cache"
+    via = ""
+    if ffmpeg:
+        try:
+            run_ffmpeg(ffmpeg, src, dst, on_progress, cancel); via = "ffmpeg"
+        except TranscodeError as e:
+            if str(e) == "cancelled" or not can_convert_in_process(src, dst): raise
+    if not via:
+        via = convert_in_process(src, dst)
+    if cached is not None:
+        try: _copy_atomic(dst, cached)
+        except OSError: pass
+    on_progress(1.0)
+    return via
+
+
+def transcode_queue(jobs: List[Tuple[Path, Path]], progress: ProgressFn = None,
+                    cancel: CancelFn = None, job_progress: JobProgressFn = None,
+                    workers: int = 0, ffmpeg: Optional[str] = "auto",
+                    use_cache: bool = True) -> List[AudioResult]:
+    """jobs: [(源, 目标)]，目标的后缀决定输出格式。N 个 ffmpeg 同时跑；结果顺序与 jobs 一致。
+    progress(done, total*1000, name) 按“已完成任务 + 进行中任务的进度”汇总，适合直接接进度条。"""
+    if ffmpeg == "auto": ffmpeg = find_ffmpeg()
+    total = len(jobs)
+    fracs = [0.0] * total
+    lock = threading.Lock()
+
+    def report(i: int, frac: float):
+        with lock:   # 在锁内回调，保证汇总进度单调递增
+            fracs[i] = frac; overall = sum(fracs)
+            if job_progress: job_progress(i, frac, jobs[i][0].name)
+            if progress: progress(int(overall * 1000), total * 1000, jobs[i][0].name)
+
+    def run(i: int) -> AudioResult:
+        src, dst = Path(jobs[i][0]), Path(jobs[i][1])
+        if cancel and cancel():
+            return AudioResult(src, dst, False, error="cancelled")
+        try:
+            via = transcode_one(src, dst, ffmpeg, lambda f: report(i, f), cancel, use_cache)
+            report(i, 1.0)
+            return AudioResult(src, dst, True, via)
+        except Exception as e:
+            return AudioResult(src, dst, False, error=str(e))
+
+    n = workers or max(1, min(os.cpu_count() or 1, total or 1))
+    results: Dict[int, AudioResult] = {}
+    with ThreadPoolExecutor(max_workers=n) as ex:
+        futs = {ex.submit(run, i): i for i in range(total)}
+        for fut in as_completed(futs):
+            results[futs[fut]] = fut.result()
+    return [results[i] for i in range(total)]
+
+
+def map_audio_targets(sources: List[Path], catalogue, default_ext: str = ".wav") -> List[Tuple[Path, Path]]:
+    """按文件名主干把源音频对到皮肤里的同名音频：已存在就沿用它的目录和后缀（.wav/.ogg/.mp3），
+    否则放在根目录、用 default_ext。源文件本身是可直接使用的格式时保留原后缀。"""
+    from core.assets_ops import AUDIO_EXTS_ALLOWED
+    jobs: List[Tuple[Path, Path]] = []
+    for src in sources:
+        src = Path(src)
+        hits = [f for f in catalogue.by_stem.get(src.stem, ()) if f.ext in AUDIO_EXTS_ALLOWED]
+        parent = hits[0].path.parent if hits else catalogue.root
+        if src.suffix.lower() in AUDIO_EXTS_ALLOWED:
+            ext = src.suffix.lower()
+        else:
+            ext = hits[0].ext if hits else default_ext
+        jobs.append((src, parent / f"{src.stem}{ext}"))
+    return jobs
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+.osu 谱面的最小解析 + 给预览回放用的时间索引。
+- parse_osu 只取预览需要的部分：[General] Mode、[Metadata] 标题、[Difficulty]、[HitObjects]；
+  解析失败的行跳过，不抛异常。
+- ManiaChart：按列分开、按时间排好的音符。同一列的物件互不重叠，所以开始时间和结束时间都单调，
+  visible(col, t0, t1) 用 bisect 直接定位窗口，每帧只碰可见的那一段。
+- StdChart：std 物件按开始时间排好的平行列表 + 连击序号 / 颜色序号。有持续时间的物件（滑条、转盘）
+  另存一份按开始时间排序的列表，visible() = 开始时间落在窗口里的（bisect）+ 窗口前开始但还没结束的长物件。
+- synthetic_mania / synthetic_std：没有谱面时生成的测试谱，可指定密度，用来压测。
+
+    chart = ManiaChart.from_beatmap(parse_osu(path))
+    for start, end in chart.visible(col, now, now + window): ...
+"""
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Tuple
+import random
+
+MODE_STD, MODE_TAIKO, MODE_CATCH, MODE_MANIA = 0, 1, 2, 3
+TYPE_CIRCLE, TYPE_SLIDER, TYPE_NEW_COMBO, TYPE_SPINNER, TYPE_HOLD = 1, 2, 4, 8, 128
+
+
+class BeatmapError(Exception):
+    """不是 .osu 文件或者读不了。"""
+
+
+@dataclass
+class HitObject:
+    x: float
+    y: float
+    time: int
+    type: int
+    end_time: int                  # 单点 = time
+    params: List[str] = field(default_factory=list)   # type 之后的原始字段（hitSound 起）
+
+    @property
+    def is_hold(self) -> bool:
+        return bool(self.type & TYPE_HOLD)
+
+    @property
+    def is_slider(self) -> bool:
+        return bool(self.type & TYPE_SLIDER)
+
+    @property
+    def is_spinner(self) -> bool:
+        return bool(self.type & TYPE_SPINNER)
+
+    @property
+    def new_combo(self) -> bool:
+        return bool(self.type & TYPE_NEW_COMBO)
+
+
+@dataclass
+class Beatmap:
+    mode: int = MODE_STD
+    title: str = ""
+    version: str = ""
+    circle_size: float = 5.0       # mania 里就是键数
+    approach_rate: float = -1.0    # 老谱没有 AR 时等于 OD
+    overall_difficulty: float = 5.0
+    slider_multiplier: float = 1.4
+    timing_points: List[Tuple[int, float, bool]] = field(default_factory=list)  # (time, beatLength, uninherited)
+    objects: List[HitObject] = field(default_factory=list)
+
+    @property
+    def ar(self) -> float:
+        return self.approach_rate if self.approach_rate >= 0 else self.overall_difficulty
+
+
+def _decode(raw: bytes) -> str:
+    for enc in ("utf-8-sig", "cp1252"):
+        try: return raw.decode(enc)
+        except UnicodeDecodeError: continue
+    return raw.decode("utf-8", errors="replace")
+
+
+def parse_osu(src) -> Beatmap:
+    """src: 路径或 .osu 文本。"""
+    if isinstance(src, (str, Path)) and not str(src).lstrip().startswith("osu file format") and "\n" not in str(src):
+        try:
+            text = _decode(Path(src).read_bytes())
+        except OSError as e:
+            raise BeatmapError(str(e)) from e
+    else:
+        text = str(src)
+    if not text.lstrip().startswith("osu file format"):
+        raise BeatmapError("not an .osu file")
+    bm = Beatmap()
+    section = ""
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("//"): continue
+        if line.startswith("[") and line.endswith("]"):
+            section = line[1:-1].strip().lower(); continue
+        try:
+            if section in ("general", "metadata", "difficulty"):
+                k, _, v = line.partition(":")
+                k = k.strip().lower(); v = v.strip()
+                if k == "mode": bm.mode = int(v)
+                elif k == "title": bm.title = v
+                elif k == "version": bm.version = v
+                elif k == "circlesize": bm.circle_size = float(v)
+                elif k == "approachrate": bm.approach_rate = float(v)
+                elif k == "overalldifficulty": bm.overall_difficulty = float(v)
+                elif k == "slidermultiplier": bm.slider_multiplier = float(v)
+            elif section == "timingpoints":
+                f = line.split(",")
+                uninherited = f[6].strip() != "0" if len(f) > 6 else True
+                bm.timing_points.append((int(float(f[0])), float(f[1]), uninherited))
+            elif section == "hitobjects":
+                f = line.split(",")
+                x, y, t, typ = float(f[0]), float(f[1]), int(float(f[2])), int(f[3])
+                end = t
+                if typ & TYPE_HOLD and len(f) > 5:
+                    end = int(float(f[5].split(":", 1)[0]))
+                elif typ & TYPE_SPINNER and len(f) > 5:
+                    end = int(float(f[5]))
+                bm.objects.append(HitObject(x, y, t, typ, max(t, end), f[4:]))
+        except (ValueError, IndexError):
+            continue
+    bm.objects.sort(key=lambda o: o.time)
+    bm.timing_points.sort(key=lambda tp: tp[0])
+    _slider_ends(bm)
+    return bm
+
+
+def _slider_ends(bm: Beatmap) -> None:
+    """滑条结束时间 = 长度 / (SliderMultiplier * 100 * SV) * 拍长 * 往返次数。物件已按时间排序，timing 点顺序扫一遍。"""
+    tps = bm.timing_points
+    beat = next((bl for _, bl, un in tps if un and bl > 0), 500.0)
+    sv = 1.0; k = 0
+    for o in bm.objects:
+        while k < len(tps) and tps[k][0] <= o.time:
+            _, bl, un = tps[k]; k += 1
+            if un:
+                if bl > 0: beat = bl
+                sv = 1.0
+            elif bl < 0:
+                sv = max(0.1, min(10.0, -100.0 / bl))
+        if not o.is_slider: continue
+        try:
+            slides = max(1, int(o.params[2])); length = float(o.params[3])
+        except (IndexError, ValueError):
+            continue
+        o.end_time = o.time + int(length / (bm.slider_multiplier * 100.0 * sv) * beat * slides)
+
+
+# ---------------- mania ----------------
+@dataclass
+class ManiaChart:
+    keys: int
+    starts: List[List[int]]        # 每列的开始时间（升序）
+    ends: List[List[int]]          # 每列的结束时间；单点与开始相同
+    title: str = ""
+
+    @classmethod
+    def from_notes(cls, keys: int, notes, title: str = "") -> "ManiaChart":
+        """notes: 可迭代的 (列, 开始, 结束)。同列重叠的物件（坏谱）保留先出现的那个。"""
+        cols: List[List[Tuple[int, int]]] = [[] for _ in range(keys)]
+        for c, s, e in notes:
+            if 0 <= c < keys: cols[c].append((int(s), int(max(s, e))))
+        starts, ends = [], []
+        for col in cols:
+            col.sort()
+            s_out, e_out = [], []
+            for s, e in col:
+                if e_out and s <= e_out[-1]: continue
+                s_out.append(s); e_out.append(e)
+            starts.append(s_out); ends.append(e_out)
+        return cls(keys, starts, ends, title)
+
+    @classmethod
+    def from_beatmap(cls, bm: Beatmap) -> "ManiaChart":
+        if bm.mode != MODE_MANIA:
+            raise BeatmapError("not a mania beatmap")
+        keys = max(1, min(18, int(round(bm.circle_size))))
+        notes = ((min(keys - 1, int(o.x * keys // 512)), o.time, o.end_time) for o in bm.objects)
+        return cls.from_notes(keys, notes, bm.title)
+
+    @property
+    def count(self) -> int:
+        return sum(len(s) for s in self.starts)
+
+    @property
+    def first(self) -> int:
+        return min((s[0] for s in self.starts if s), default=0)
+
+    @property
+    def duration(self) -> int:
+        return max((e[-1] for e in self.ends if e), default=0)
+
+    def visible(self, col: int, t0: float, t1: float) -> Iterator[Tuple[int, int]]:
+        """与 [t0, t1] 有交集的物件：结束不早于 t0、开始不晚于 t1。"""
+        starts, ends = self.starts[col], self.ends[col]
+        i = bisect_left(ends, t0)
+        j = bisect_right(starts, t1, lo=i)
+        for k in range(i, j):
+            yield starts[k], ends[k]
+
+    def active(self, col: int, t: float, grace: int = 0) -> bool:
+        """t 时刻这一列是否按着（长条中间，或单点后 grace 毫秒内）。"""
+        starts, ends = self.starts[col], self.ends[col]
+        i = bisect_right(starts, t) - 1
+        return i >= 0 and t <= ends[i] + grace
+
+
+# ---------------- std ----------------
+def preempt_ms(ar: float) -> float:
+    """AR -> 物件提前出现的时间。"""
+    return 1200.0 + 600.0 * (5 - ar) / 5 if ar < 5 else 1200.0 - 750.0 * (ar - 5) / 5
+
+
+def fade_in_ms(ar: float) -> float:
+    return 800.0 + 400.0 * (5 - ar) / 5 if ar < 5 else 800.0 - 500.0 * (ar - 5) / 5
+
+
+def circle_radius(cs: float) -> float:
+    """CS -> 圆圈半径（osu! 像素）；皮肤素材按 SD 尺寸乘 radius / 64 绘制。"""
+    return 54.4 - 4.48 * cs
+
+
+@dataclass
+class StdChart:
+    times: List[int]
+    ends: List[int]
+    xs: List[float]
+    ys: List[float]
+    kinds: List[int]               # type 位
+    numbers: List[int]             # 连击里的序号（1 起）
+    colours: List[int]             # 颜色序号，取皮肤颜色时对颜色数取模
+    circle_size: float = 5.0
+    ar: float = 9.0
+    title: str = ""
+    objects: List[HitObject] = field(default_factory=list)   # 原始物件（滑条曲线等）
+    shapes: list = field(default_factory=list)   # core.slider_curve.attach_shapes 填：滑条折线，其余为 None
+    shape_keys: list = field(default_factory=list)
+    _long: List[int] = field(default_factory=list, repr=False)
+    _long_starts: List[int] = field(default_factory=list, repr=False)
+    _long_span: int = 0
+    _last_end: int = 0
+
+    def __post_init__(self):
+        self._long = [i for i, (t, e) in enumerate(zip(self.times, self.ends)) if e > t]
+        self._long_starts = [self.times[i] for i in self._long]
+        self._long_span = max((self.ends[i] - self.times[i] for i in self._long), default=0)
+        self._last_end = max(self.ends, default=0)
+
+    @classmethod
+    def from_objects(cls, objects: List[HitObject], circle_size: float = 5.0, ar: float = 9.0,
+                     title: str = "") -> "StdChart":
+        """objects 需按时间排好。新连击（或转盘之后）序号归 1，颜色前进 1 + 跳过数（type 的 4-6 位）。"""
+        times, ends, xs, ys, kinds, numbers, colours = [], [], [], [], [], [], []
+        num = 0; colour = -1; after_spinner = True
+        for o in objects:
+            if o.is_spinner:
+                after_spinner = True
+            elif o.new_combo or after_spinner:
+                num = 0; colour += 1 + ((o.type >> 4) & 7 if o.new_combo else 0); after_spinner = False
+            num += 1
+            times.append(o.time); ends.append(o.end_time); xs.append(o.x); ys.append(o.y); kinds.append(o.type)
+            numbers.append(num); colours.append(max(0, colour))
+        return cls(times, ends, xs, ys, kinds, numbers, colours, circle_size, ar, title, list(objects))
+
+    @classmethod
+    def from_beatmap(cls, bm: Beatmap) -> "StdChart":
+        if bm.mode != MODE_STD:
+            raise BeatmapError("not an osu!standard beatmap")
+        return cls.from_objects(bm.objects, bm.circle_size, bm.ar, bm.title)
+
+    @property
+    def count(self) -> int:
+        return len(self.times)
+
+    @property
+    def first(self) -> int:
+        return self.times[0] if self.times else 0
+
+    @property
+    def duration(self) -> int:
+        return self._last_end
+
+    def visible(self, t0: float, t1: float) -> List[int]:
+        """与 [t0, t1] 有交集的物件下标，按开始时间升序。"""
+        ls = self._long_starts
+        lo = bisect_left(ls, t0 - self._long_span)
+        hi = bisect_left(ls, t0, lo=lo)
+        early = [self._long[k] for k in range(lo, hi) if self.ends[self._long[k]] >= t0]
+        i = bisect_left(self.times, t0)
+        j = bisect_right(self.times, t1, lo=i)
+        return early + list(range(i, j)) if early else list(range(i, j))
+
+
+def synthetic_std(seconds: float = 120.0, bpm: float = 200.0, cs: float = 4.0, ar: float = 9.0,
+                  seed: int = 1) -> StdChart:
+    """测试谱：1/4 节奏的串（沿圆弧 / 方形走）、1/2 的跳和滑条（B / P / L，部分往返），每 16 个物件换一次连击；
+    固定 seed 可复现。滑条按 SliderMultiplier 1.4、SV 1 算结束时间。"""
+    import math
+    rng = random.Random(seed)
+    beat = 60000.0 / bpm
+    objs: List[HitObject] = []
+    t = 1000.0; i = 0
+    end = 1000.0 + seconds * 1000.0
+    cx, cy = 256.0, 192.0
+    while t < end:
+        section = (i // 64) % 4
+        if section == 0:        # 圆弧串
+            a = i * 0.35
+            x, y = cx + 140 * math.cos(a), cy + 110 * math.sin(a); step = beat / 4
+        elif section == 1:      # 方形串
+            k = i % 16; side = k // 4; f = (k % 4) / 4.0
+            corners = ((106, 72), (406, 72), (406, 312), (106, 312), (106, 72))
+            (x0, y0), (x1, y1) = corners[side], corners[side + 1]
+            x, y = x0 + (x1 - x0) * f, y0 + (y1 - y0) * f; step = beat / 4
+        elif section == 2:      # 跳
+            x, y = rng.uniform(40, 472), rng.uniform(40, 344); step = beat / 2
+        else:                   # 滑条
+            ti = int(t); x, y = round(rng.uniform(120, 392)), round(rng.uniform(100, 284))
+            slides = 1 + (i % 3 == 2); length = rng.choice((70.0, 105.0, 140.0))
+            a = rng.uniform(0, 2 * math.pi); r = length * 0.6
+            p1 = (round(x + r * math.cos(a)), round(y + r * math.sin(a)))
+            p2 = (round(x + r * math.cos(a + 0.9) * 1.4), round(y + r * math.sin(a + 0.9) * 1.4))
+            kind = "BPL"[i % 3]
+            pts = (p1,) if kind == "L" else (p1, p2)
+            curve = kind + "".join(f"|{px}:{py}" for px, py in pts)
+            dur = int(length / 140.0 * beat * slides)
+            typ = TYPE_SLIDER | (TYPE_NEW_COMBO if i % 16 == 0 else 0)
+            objs.append(HitObject(x, y, ti, typ, ti + dur, ["0", curve, str(slides), f"{length:g}"]))
+            t += dur + beat / 2; i += 1
+            continue
+        typ = TYPE_CIRCLE | (TYPE_NEW_COMBO if i % 16 == 0 else 0)
+        ti = int(t)
+        objs.append(HitObject(round(x), round(y), ti, typ, ti))
+        t += step; i += 1
+    return StdChart.from_objects(objs, cs, ar, f"synthetic {bpm:g} bpm")
+
+
+def synthetic_mania(keys: int = 7, seconds: float = 120.0, nps: float = 40.0,
+                    ln_ratio: float = 0.15, seed: int = 1) -> ManiaChart:
+    """测试谱：按 nps（每秒音符数）铺满整首，混合楼梯、交互和长条；固定 seed 可复现。"""
+    rng = random.Random(seed)
+    step = 1000.0 / max(1.0, nps)
+    busy_until = [-1] * keys
+    notes = []
+    t = 1000.0; i = 0
+    end = 1000.0 + seconds * 1000.0
+    while t < end:
+        pattern = (i // 64) % 3
+        if pattern == 0: col = i % keys                           # 楼梯
+        elif pattern == 1: col = (i * 2 + (i // keys)) % keys     # 交互
+        else: col = rng.randrange(keys)
+        ti = int(t)
+        if busy_until[col] < ti:
+            length = int(step * rng.randint(4, 16)) if rng.random() < ln_ratio else 0
+            notes.append((col, ti, ti + length))
+            busy_until[col] = ti + length + int(step)
+        t += step; i += 1
+    return ManiaChart.from_notes(keys, notes, f"synthetic {keys}K {nps:g} nps")
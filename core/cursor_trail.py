@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+光标拖尾的环形缓冲 + 光标路径。
+- TrailRing：容量固定的环形缓冲，x / y / 生成时间 / 年龄 / 透明度各是一条预先分配好的数组，
+  每个拖尾片段只是数组里的一格，不建 Python 对象；写满后覆盖最旧的。
+  push_segment 一次写入一段直线上均匀分布的 n 个点（连续拖尾 / 高密度时一帧要写很多个）；
+  live(now) 原地算出年龄和透明度，丢掉已经淡完的，按从旧到新返回还活着的片段。
+- 有 NumPy 时写入 / 计算都是向量化的；没有时退回同样布局的定长列表逐个处理。
+- CursorPath：录下的（或生成的）光标轨迹，at(t) 插值出位置和按键状态；synthetic_path 生成测试轨迹。
+
+    ring = TrailRing(); ring.push_segment(x0, y0, x1, y1, t, n)
+    xs, ys, alphas = ring.live(now, TRAIL_FADE_MS)
+"""
+from __future__ import annotations
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import math
+import random
+
+# NumPy 在建第一个 TrailRing 时才导入：光标预览在启动时就创建，别让 NumPy 拖慢首帧
+np = None  # type: ignore
+_HAS_NUMPY: Optional[bool] = None
+
+
+def _numpy() -> bool:
+    global np, _HAS_NUMPY
+    if _HAS_NUMPY is None:
+        try:
+            import numpy
+            np = numpy; _HAS_NUMPY = True
+        except Exception:
+            _HAS_NUMPY = False
+    return _HAS_NUMPY
+
+
+TRAIL_CAPACITY = 2048
+TRAIL_FADE_MS = 150.0           # 拖尾片段从生成到完全透明
+
+
+class TrailRing:
+    def __init__(self, capacity: int = TRAIL_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        self._np = _numpy()             # 数组类型在创建时定下，之后都按它走
+        if self._np:
+            self.xs = np.zeros(self.capacity); self.ys = np.zeros(self.capacity); self.ts = np.zeros(self.capacity)
+            self.ages = np.zeros(self.capacity); self.alphas = np.zeros(self.capacity)
+            self._ramp = np.arange(1, self.capacity + 1, dtype=np.float64)
+        else:
+            self.xs = [0.0] * self.capacity; self.ys = [0.0] * self.capacity; self.ts = [0.0] * self.capacity
+            self.ages = [0.0] * self.capacity; self.alphas = [0.0] * self.capacity
+        self.head = 0                   # 下一个写入位置
+        self.size = 0                   # 有效片段数（从 head - size 到 head - 1）
+
+    def clear(self):
+        self.head = self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, x: float, y: float, t: float):
+        self.push_segment(x, y, x, y, t, 1)
+
+    def push_segment(self, x0: float, y0: float, x1: float, y1: float, t: float, n: int) -> int:
+        """在 (x0, y0) -> (x1, y1) 上等距写 n 个点（不含起点，含终点），生成时间都记为 t；返回写入个数。"""
+        cap = self.capacity
+        n = min(int(n), cap)
+        if n <= 0: return 0
+        if self._np:
+            f = self._ramp[:n] / n
+            idx = (self.head + np.arange(n)) % cap
+            self.xs[idx] = x0 + (x1 - x0) * f
+            self.ys[idx] = y0 + (y1 - y0) * f
+            self.ts[idx] = t
+        else:
+            for k in range(n):
+                f = (k + 1) / n; i = (self.head + k) % cap
+                self.xs[i] = x0 + (x1 - x0) * f; self.ys[i] = y0 + (y1 - y0) * f; self.ts[i] = t
+        self.head = (self.head + n) % cap
+        self.size = min(cap, self.size + n)
+        return n
+
+    def live(self, now: float, fade: float = TRAIL_FADE_MS):
+        """(xs, ys, alphas)，从旧到新，只含还没淡完的片段；同时把淡完的从缓冲里丢掉。"""
+        cap = self.capacity
+        if self.size == 0: return [], [], []
+        start = (self.head - self.size) % cap
+        if self._np:
+            np.subtract(now, self.ts, out=self.ages)
+            np.multiply(self.ages, -1.0 / fade, out=self.alphas); self.alphas += 1.0
+            order = (start + np.arange(self.size)) % cap
+            alive = order[self.alphas[order] > 0.0]
+            self.size = len(alive)      # 时间单调：淡完的一定在最前面
+            return self.xs[alive].tolist(), self.ys[alive].tolist(), np.minimum(self.alphas[alive], 1.0).tolist()
+        xs, ys, als = [], [], []
+        for k in range(self.size):
+            i = (start + k) % cap
+            self.ages[i] = now - self.ts[i]; self.alphas[i] = 1.0 - self.ages[i] / fade
+            if self.alphas[i] > 0.0:
+                xs.append(self.xs[i]); ys.append(self.ys[i]); als.append(min(1.0, self.alphas[i]))
+        self.size = len(xs)
+        return xs, ys, als
+
+
+@dataclass
+class CursorPath:
+    """光标轨迹：时间（ms，从 0 起）、位置（控件宽高的 0..1 比例，缩放窗口也能用）、是否按下。"""
+    ts: List[float]
+    xs: List[float]
+    ys: List[float]
+    down: List[bool]
+
+    @property
+    def duration(self) -> float:
+        return self.ts[-1] if self.ts else 0.0
+
+    def at(self, t: float) -> Tuple[float, float, bool]:
+        ts = self.ts
+        if not ts: return 0.5, 0.5, False
+        i = bisect_right(ts, t)
+        if i <= 0: return self.xs[0], self.ys[0], self.down[0]
+        if i >= len(ts): return self.xs[-1], self.ys[-1], self.down[-1]
+        a, b = ts[i - 1], ts[i]
+        f = (t - a) / (b - a) if b > a else 0.0
+        return (self.xs[i - 1] + (self.xs[i] - self.xs[i - 1]) * f,
+                self.ys[i - 1] + (self.ys[i] - self.ys[i - 1]) * f, self.down[i - 1])
+
+
+class PathRecorder:
+    """录制：按帧追加采样，stop() 得到 CursorPath（时间从第一个采样起算）。"""
+    def __init__(self):
+        self.ts: List[float] = []; self.xs: List[float] = []; self.ys: List[float] = []; self.down: List[bool] = []
+
+    def add(self, t: float, x: float, y: float, down: bool):
+        if self.ts and t <= self.ts[-1]: return
+        self.ts.append(t); self.xs.append(x); self.ys.append(y); self.down.append(bool(down))
+
+    def stop(self) -> CursorPath:
+        t0 = self.ts[0] if self.ts else 0.0
+        return CursorPath([t - t0 for t in self.ts], self.xs, self.ys, self.down)
+
+
+def synthetic_path(seconds: float = 8.0, seed: int = 1) -> CursorPath:
+    """测试轨迹：绕圈的平滑移动和快速跳跃交替，每 300ms 点一下；固定 seed 可复现。"""
+    rng = random.Random(seed)
+    ts, xs, ys, down = [], [], [], []
+    t = 0.0; x, y = 0.5, 0.5
+    while t <= seconds * 1000.0:
+        phase = int(t // 2000) % 2
+        if phase == 0:
+            a = t / 350.0
+            x, y = 0.5 + 0.3 * math.cos(a), 0.5 + 0.3 * math.sin(a * 1.5)
+        elif int(t) % 200 < 16:
+            x, y = rng.uniform(0.15, 0.85), rng.uniform(0.15, 0.85)
+        ts.append(t); xs.append(x); ys.append(y); down.append(int(t) % 300 < 80)
+        t += 8.0
+    return CursorPath(ts, xs, ys, down)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+皮肤目录的内容去重分析。
+- 先按文件大小分桶，大小唯一的文件一定不重复，不读内容；
+- 同大小的再读开头 64 KiB 做一次粗筛，仍然相同的才完整哈希（blake2b，流式读，线程池并行，hashlib 会释放 GIL）；
+- 返回重复组（按浪费字节从大到小）和总浪费字节数；canonical_map() 给出“重复文件 -> 保留的那一份”，
+  osk_io.export_osk(slim=True) 用它只存一份字节。
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib, os
+
+ProgressFn = Optional[Callable[[int, int, str], None]]
+CancelFn = Optional[Callable[[], bool]]
+
+HEAD_BYTES = 64 * 1024
+_CHUNK = 1024 * 1024
+
+
+class DedupCancelled(Exception):
+    """用户取消了分析。"""
+
+
+@dataclass
+class DupGroup:
+    size: int
+    digest: str
+    files: List[Tuple[Path, str]]   # (绝对路径, 相对路径)，按相对路径排序，第一个是保留的那份
+
+    @property
+    def wasted(self) -> int:
+        return self.size * (len(self.files) - 1)
+
+
+@dataclass
+class DedupReport:
+    root: Path
+    groups: List[DupGroup] = field(default_factory=list)
+    files_scanned: int = 0
+    bytes_scanned: int = 0
+    bytes_hashed: int = 0
+
+    @property
+    def wasted_bytes(self) -> int:
+        return sum(g.wasted for g in self.groups)
+
+    @property
+    def duplicate_files(self) -> int:
+        return sum(len(g.files) - 1 for g in self.groups)
+
+    def canonical_map(self) -> Dict[str, str]:
+        """重复文件的相对路径 -> 保留文件的相对路径。"""
+        out: Dict[str, str] = {}
+        for g in self.groups:
+            keep = g.files[0][1]
+            for _p, arc in g.files[1:]:
+                out[arc] = keep
+        return out
+
+
+def hash_file(path: Path, limit: int = -1) -> str:
+    """流式哈希；limit >= 0 时只读前 limit 字节。"""
+    h = hashlib.blake2b(digest_size=20)
+    left = limit
+    with open(path, "rb") as f:
+        while left != 0:
+            buf = f.read(_CHUNK if left < 0 else min(_CHUNK, left))
+            if not buf: break
+            h.update(buf)
+            if left > 0: left -= len(buf)
+    return h.hexdigest()
+
+
+def _regroup(pool: ThreadPoolExecutor, buckets: List[List[Tuple[Path, str, int]]], limit: int,
+             progress: ProgressFn, cancel: CancelFn, counter: List[int], total: int
+             ) -> List[Tuple[str, List[Tuple[Path, str, int]]]]:
+    """对每个桶里的文件算哈希，按 (桶, 哈希) 再分组；只保留 2 个以上的组。"""
+    flat = [(bi, ent) for bi, b in enumerate(buckets) for ent in b]
+
+    def job(ent):
+        if cancel and cancel(): raise DedupCancelled()
+        try:
+            return hash_file(ent[0], limit)
+        except OSError:
+            return None   # 读不了的文件当作不重复
+
+    out: Dict[Tuple[int, str], List[Tuple[Path, str, int]]] = {}
+    for (bi, ent), digest in zip(flat, pool.map(job, [e for _bi, e in flat])):
+        n = ent[2] if limit < 0 else min(ent[2], limit)
+        counter[0] += n
+        if progress: progress(counter[0], total, ent[1])
+        if digest is not None:
+            out.setdefault((bi, digest), []).append(ent)
+    return [(d, g) for (_bi, d), g in out.items() if len(g) > 1]
+
+
+def find_duplicates(entries: Iterable[Tuple[Path, str]], root: Path = Path("."),
+                    progress: ProgressFn = None, cancel: CancelFn = None,
+                    workers: Optional[int] = None) -> DedupReport:
+    """entries: (绝对路径, 相对路径)。空文件不算重复。progress 按已读取的字节报告。"""
+    rep = DedupReport(Path(root))
+    by_size: Dict[int, List[Tuple[Path, str, int]]] = {}
+    for p, arc in entries:
+        try: size = os.stat(p).st_size
+        except OSError: continue
+        rep.files_scanned += 1; rep.bytes_scanned += size
+        if size > 0:
+            by_size.setdefault(size, []).append((Path(p), arc, size))
+    buckets = [b for b in by_size.values() if len(b) > 1]
+    if not buckets:
+        return rep
+    # 粗筛读的字节 + 完整哈希读的字节（上限估计：大文件粗筛后可能大部分被排除）
+    total = sum(min(e[2], HEAD_BYTES) for b in buckets for e in b) + sum(e[2] for b in buckets for e in b)
+    counter = [0]
+    workers = workers or min(8, (os.cpu_count() or 2))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # 小文件粗筛就等于全量哈希，直接一步到位
+        small = [[e for e in b if e[2] <= HEAD_BYTES] for b in buckets]
+        large = [[e for e in b if e[2] > HEAD_BYTES] for b in buckets]
+        groups = _regroup(pool, [b for b in small if len(b) > 1], -1, progress, cancel, counter, total)
+        heads = _regroup(pool, [b for b in large if len(b) > 1], HEAD_BYTES, progress, cancel, counter, total)
+        groups += _regroup(pool, [g for _d, g in heads], -1, progress, cancel, counter, total)
+    rep.bytes_hashed = counter[0]
+    if progress: progress(total, total, "")
+    for digest, g in groups:
+        g.sort(key=lambda e: e[1].lower())
+        rep.groups.append(DupGroup(g[0][2], digest, [(p, arc) for p, arc, _s in g]))
+    rep.groups.sort(key=lambda g: (-g.wasted, g.files[0][1].lower()))
+    return rep
+
+
+def analyze_skin(root: Path, progress: ProgressFn = None, cancel: CancelFn = None,
+                 workers: Optional[int] = None) -> DedupReport:
+    """整个皮肤目录（排除编辑器自己的备份目录，与 .osk 导出的文件集合一致）。"""
+    from core.osk_io import iter_skin_files
+    return find_duplicates(iter_skin_files(Path(root)), root, progress, cancel, workers)
+
+
+def format_size(n: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024: return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
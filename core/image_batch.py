@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+批量图片替换 / 转换（source -> target）。
+- 解码 / 转换 / PNG 编码都在 ProcessPoolExecutor 里做（Pillow 编码吃 CPU，线程会被 GIL 卡住）。
+- 每个目标先写到同目录的临时文件，再 os.replace 覆盖，中途失败不会留下半个 PNG。
+- 逐文件返回结果（成功 / 失败原因 / 写了哪些文件），进度回调按完成的文件数报告。
+- @2x / SD：
+    variants="preserve"（默认）目标的另一个版本已存在时一起更新，避免旧的 @2x 盖住新的 SD；
+    variants="both"     总是同时写 name@2x.png 和 name.png；
+    variants="single"   只写目标文件本身。
+  同时写两个版本时，源图的分辨率按目标文件看待：目标是 @2x 时 @2x 原样写入、SD 为一半尺寸；
+  目标是 SD 时 SD 原样写入、@2x 放大一倍（Lanczos），不会把 SD 尺寸的图当成 @2x 缩成四分之一。
+- generate_sd_variants：给皮肤里每个 name@2x.png 补出 name.png（缺失，或比 @2x 旧的才重新生成），
+  同样走进程池；SD 已经不比 @2x 旧的直接跳过，只看 mtime，不读文件内容。
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import multiprocessing, os, shutil
+
+from core.assets_ops import IMAGE_EXTS_ANY, MediaCatalogue
+from core.skin_index import asset_name
+
+ProgressFn = Optional[Callable[[int, int, str], None]]
+CancelFn = Optional[Callable[[], bool]]
+
+VARIANT_MODES = ("preserve", "both", "single")
+# 少于这个数量就不开进程池了（起进程本身要几百毫秒）
+INLINE_MAX = 3
+
+
+@dataclass
+class ConvertResult:
+    src: Path
+    dst: Path
+    ok: bool
+    written: List[Path] = field(default_factory=list)
+    error: str = ""
+
+
+def variant_paths(dst: Path) -> Tuple[Path, Path]:
+    """'x/hitcircle@2x.png' -> (x/hitcircle@2x.png, x/hitcircle.png)"""
+    name, _scale = asset_name(dst.with_suffix(".png").name)
+    return dst.parent / f"{name}@2x.png", dst.parent / f"{name}.png"
+
+
+def plan_outputs(dst: Path, variants: str = "preserve") -> List[Tuple[Path, float]]:
+    """目标 -> [(输出路径, 相对源图的缩放)]。"""
+    dst = dst.with_suffix(".png")
+    if variants == "single":
+        return [(dst, 1.0)]
+    hd, sd = variant_paths(dst)
+    other = sd if dst == hd else hd
+    if variants == "both" or other.exists():
+        return [(hd, 1.0), (sd, 0.5)] if dst == hd else [(sd, 1.0), (hd, 2.0)]
+    return [(dst, 1.0)]
+
+
+def _tmp_path(p: Path) -> Path:
+    return p.with_name(f".{p.name}.{os.getpid()}.part")
+
+
+def _write_atomic_png(im, out: Path) -> None:
+    tmp = _tmp_path(out)
+    try:
+        im.save(tmp, format="PNG")
+        os.replace(tmp, out)
+    finally:
+        if tmp.exists():
+            try: tmp.unlink()
+            except OSError: pass
+
+
+def convert_one(src: str, outputs: List[Tuple[str, float]]) -> Tuple[bool, List[str], str]:
+    """在工作进程里执行：读一次源图，按 outputs 写出各个版本。返回 (ok, written, error)。"""
+    written: List[str] = []
+    try:
+        srcp = Path(src)
+        # 单个输出、PNG 源、不缩放：原样复制（和旧 replace_image 行为一致，不重新编码）
+        if len(outputs) == 1 and outputs[0][1] == 1.0 and srcp.suffix.lower() == ".png":
+            out = Path(outputs[0][0]); out.parent.mkdir(parents=True, exist_ok=True)
+            tmp = _tmp_path(out)
+            try:
+                shutil.copyfile(srcp, tmp); os.replace(tmp, out)
+            finally:
+                if tmp.exists(): tmp.unlink()
+            return True, [str(out)], ""
+        from PIL import Image
+        with Image.open(srcp) as im0:
+            im = im0.convert("RGBA")
+        for out_s, scale in outputs:
+            out = Path(out_s); out.parent.mkdir(parents=True, exist_ok=True)
+            img = im
+            if scale != 1.0:
+                w = max(1, int(round(im.width * scale))); h = max(1, int(round(im.height * scale)))
+                img = im.resize((w, h), Image.LANCZOS)
+            _write_atomic_png(img, out)
+            written.append(str(out))
+        return True, written, ""
+    except Exception as e:
+        return False, written, f"{type(e).__name__}: {e}"
+
+
+def batch_replace(mapping: Dict[Path, Path], variants: str = "preserve",
+                  progress: ProgressFn = None, cancel: CancelFn = None,
+                  workers: int = 0) -> List[ConvertResult]:
+    """mapping: 源文件 -> 目标路径（后缀会改成 .png）。返回与 mapping 顺序一致的结果列表。"""
+    if variants not in VARIANT_MODES:
+        raise ValueError(f"variants must be one of {VARIANT_MODES}")
+    jobs = [(Path(s), Path(d).with_suffix(".png")) for s, d in mapping.items()]
+    plans = [[(str(p), sc) for p, sc in plan_outputs(d, variants)] for _s, d in jobs]
+    return _run_jobs(jobs, plans, progress, cancel, workers)
+
+
+def _run_jobs(jobs: List[Tuple[Path, Path]], plans: List[List[Tuple[str, float]]],
+              progress: ProgressFn, cancel: CancelFn, workers: int) -> List[ConvertResult]:
+    results: List[Optional[ConvertResult]] = [None] * len(jobs)
+    total = len(jobs); done = 0
+
+    def finish(i, res):
+        nonlocal done
+        ok, written, err = res
+        s, d = jobs[i]
+        results[i] = ConvertResult(s, d, ok, [Path(w) for w in written], err)
+        done += 1
+        if progress: progress(done, total, s.name)
+
+    if total <= INLINE_MAX or workers == 1:
+        for i, (s, _d) in enumerate(jobs):
+            if cancel and cancel(): break
+            finish(i, convert_one(str(s), plans[i]))
+    else:
+        n = workers or max(1, min(8, os.cpu_count() or 1, total))
+        # 一律 spawn：GUI 进程里有很多线程，fork 出来的子进程可能卡在别人持有的锁上
+        with ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn")) as ex:
+            futs = {ex.submit(convert_one, str(s), plans[i]): i for i, (s, _d) in enumerate(jobs)}
+            for fut in as_completed(futs):
+                i = futs[fut]
+                try:
+                    finish(i, fut.result())
+                except Exception as e:  # 工作进程崩了
+                    finish(i, (False, [], f"{type(e).__name__}: {e}"))
+                if cancel and cancel():
+                    for f in futs: f.cancel()
+                    break
+    # 取消后没跑的条目也给出结果
+    for i, r in enumerate(results):
+        if r is None:
+            results[i] = ConvertResult(jobs[i][0], jobs[i][1], False, [], "cancelled")
+    return results  # type: ignore[return-value]
+
+
+def plan_sd_variants(catalogue: MediaCatalogue, force: bool = False) -> List[Tuple[Path, Path]]:
+    """[(name@2x.png, name.png)]：SD 缺失或比 @2x 旧的（force=True 时全部）。catalogue 需要带 stat。"""
+    by_rel = {f.rel.lower(): f for f in catalogue.of_exts((".png",))}
+    out: List[Tuple[Path, Path]] = []
+    for f in catalogue.of_exts((".png",)):
+        name, scale = asset_name(f.path.name)
+        if scale != 2: continue
+        sd_rel = f.rel[:len(f.rel) - len(f.path.name)] + f"{name}.png"
+        sd = by_rel.get(sd_rel.lower())
+        if not force and sd is not None and sd.mtime_ns >= f.mtime_ns:
+            continue
+        out.append((f.path, sd.path if sd is not None else f.path.parent / f"{name}.png"))
+    return out
+
+
+def generate_sd_variants(root: Path, progress: ProgressFn = None, cancel: CancelFn = None,
+                         workers: int = 0, force: bool = False) -> List[ConvertResult]:
+    """给 root 下所有 @2x PNG 生成 / 更新 SD 版本（Lanczos 缩一半）。已是最新的不出现在结果里。"""
+    from core.assets_ops import scan_media
+    pairs = plan_sd_variants(scan_media(Path(root), (".png",), stat=True), force)
+    return _run_jobs(pairs, [[(str(sd), 0.5)] for _hd, sd in pairs], progress, cancel, workers)
+
+
+def map_sources_to_targets(sources: List[Path], catalogue: MediaCatalogue) -> Dict[Path, Path]:
+    """按文件名主干把源文件对到皮肤里的目标：同名图片已存在（可能在子目录里）就放到它旁边，否则放在根目录。"""
+    out: Dict[Path, Path] = {}
+    for src in sources:
+        name, scale = asset_name(src.stem + ".png")
+        hits = [f for stem in (name, f"{name}@2x") for f in catalogue.by_stem.get(stem, ())
+                if f.ext in IMAGE_EXTS_ANY]
+        parent = hits[0].path.parent if hits else catalogue.root
+        out[src] = parent / (f"{name}@2x.png" if scale == 2 else f"{name}.png")
+    return out
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+skin.ini 单遍分词器（不依赖 ConfigParser），loader / Mania 面板 / 两个预览共用。
+- 无损：保留每一行原文、换行风格、BOM、末尾换行，text() 可逐字节还原。
+- 每行只做一次 strip + 少量 startswith/find，不跑多条正则。
+- 同一文件同一版本只解析一次：缓存键为 (path, mtime_ns, size)。
+- 容错与旧 _read_ini_robust 一致：// ► ▶ 等注释/标题行、装饰分隔线、行内 // 注释、重复的 [Mania] 段。
+- 可原地编辑：每段记录行区间和 key -> 行 的索引，改值只重写那一行，新增 key/段只移动后面各段的区间，
+  不重新分词；没动过的行原样写回。
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import os, re, threading
+
+BLANK, COMMENT, SECTION, KV, OTHER = range(5)
+
+COMMENT_PREFIXES = ('#', ';', '//', '►', '▶', '•', '★', '※')
+_DECOR_RE = re.compile(r'[=\-_.~`|/*\\]{3,}')
+_KEY_RE = re.compile(r'[A-Za-z0-9_][A-Za-z0-9_ ]*')
+
+
+@dataclass
+class IniSection:
+    name: str                 # 原名，如 "Mania"
+    uid: str                  # 去重后的名字，如 "Mania#2"（与旧 ConfigParser 版一致）
+    start: int                # 段头所在行；前导区为 -1
+    end: int                  # 下一段开始的行（开区间）
+    # (key, value, off)：行号 = start + off。存相对偏移，前面插行时只需挪 start/end
+    kv: List[Tuple[str, str, int]] = field(default_factory=list)
+    index: Dict[str, int] = field(default_factory=dict, repr=False)  # key.lower() -> kv 下标（最后一次出现）
+
+    def get(self, key: str, default=None):
+        """同名 key 后者覆盖前者（和 ConfigParser(strict=False) 相同）。"""
+        for k, v, _ in reversed(self.kv):
+            if k == key: return v
+        return default
+
+    def line_of(self, key: str) -> int:
+        """key 所在的行号（大小写不敏感），没有返回 -1。"""
+        pos = self.index.get(key.lower())
+        return -1 if pos is None else self.start + self.kv[pos][2]
+
+    def _copy(self) -> "IniSection":
+        return IniSection(self.name, self.uid, self.start, self.end, list(self.kv), dict(self.index))
+
+    def as_dict(self) -> Dict[str, str]:
+        return {k: v for k, v, _ in self.kv}
+
+
+def decode_ini_bytes(raw: bytes) -> Tuple[str, str]:
+    """-> (text, encoding)。BOM 优先；无 BOM 时按 utf-8 -> gbk -> cp1252 依次尝试。"""
+    if raw.startswith(b'\xef\xbb\xbf'):
+        return raw[3:].decode('utf-8', errors='replace'), 'utf-8-sig'
+    if raw.startswith(b'\xff\xfe') or raw.startswith(b'\xfe\xff'):
+        return raw.decode('utf-16', errors='replace'), 'utf-16'
+    # 无 BOM 的 UTF-16：ASCII 字符之间夹着大量 NUL
+    if raw[:200].count(b'\x00') > 20:
+        le = raw[1:200:2].count(b'\x00') > raw[0:200:2].count(b'\x00')
+        enc = 'utf-16-le' if le else 'utf-16-be'
+        return raw.decode(enc, errors='replace'), enc
+    for enc in ('utf-8', 'gbk', 'cp1252'):
+        try:
+            return raw.decode(enc), enc
+        except UnicodeDecodeError:
+            continue
+    return raw.decode('utf-8', errors='ignore'), 'utf-8'
+
+
+def _split_lines(text: str) -> Tuple[List[str], str, bool]:
+    """按 \\n 切分；只有全部行都是 CRLF 时才把 \\r 当作换行的一部分，否则原样留在行内（保证无损）。"""
+    lines = text.split('\n')
+    trailing = len(lines) > 1 and lines[-1] == ''
+    if trailing: lines.pop()
+    if len(lines) == 1 and lines[0] == '' and not trailing:
+        return [], '\n', False
+    body = lines if trailing else lines[:-1]
+    if body and all(l.endswith('\r') for l in body):
+        lines = [l[:-1] if l.endswith('\r') else l for l in lines]
+        return lines, '\r\n', trailing
+    return lines, '\n', trailing
+
+
+class IniDocument:
+    """lines[i] 不含换行符；kinds[i] 是行类型；sections 按出现顺序（含前导区 sections[0]）。"""
+
+    def __init__(self, text: str, encoding: str = 'utf-8'):
+        self.encoding = encoding
+        self.bom = encoding == 'utf-8-sig'
+        self.lines, self.newline, self.trailing_newline = _split_lines(text)
+        self.kinds: List[int] = []
+        self.sections: List[IniSection] = []
+        self._by_uid: Dict[str, IniSection] = {}
+        self._tokenize()
+
+    # ---------- construction ----------
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "IniDocument":
+        text, enc = decode_ini_bytes(raw)
+        return cls(text, enc)
+
+    def copy(self) -> "IniDocument":
+        """可编辑的副本（缓存里的文档是共享只读的）。"""
+        inst = IniDocument.__new__(IniDocument)
+        inst.encoding, inst.bom = self.encoding, self.bom
+        inst.newline, inst.trailing_newline = self.newline, self.trailing_newline
+        inst.lines, inst.kinds = list(self.lines), list(self.kinds)
+        inst.sections = [sec._copy() for sec in self.sections]
+        inst._by_uid = {sec.uid: sec for sec in inst.sections[1:]}
+        return inst
+
+    def _tokenize(self) -> None:
+        kinds = self.kinds
+        cur = IniSection("", "", -1, 0)
+        self.sections.append(cur)
+        dup: Dict[str, int] = {}
+        decor = _DECOR_RE.fullmatch; keyok = _KEY_RE.fullmatch
+        for i, line in enumerate(self.lines):
+            s = line.strip()
+            if not s:
+                kinds.append(BLANK); continue
+            c0 = s[0]
+            if c0 == '[' and s[-1] == ']' and len(s) > 2:
+                cur.end = i
+                name = s[1:-1].strip()
+                n = dup.get(name, 0) + 1; dup[name] = n
+                cur = IniSection(name, name if n == 1 else f"{name}#{n}", i, len(self.lines))
+                self.sections.append(cur)
+                kinds.append(SECTION); continue
+            if s.startswith(COMMENT_PREFIXES) or decor(s):
+                kinds.append(COMMENT); continue
+            if '//' in s:
+                s = s.split('//', 1)[0].rstrip()
+                if not s:
+                    kinds.append(COMMENT); continue
+            ci = s.find(':'); ei = s.find('=')
+            sep = ci if ei < 0 or (0 <= ci < ei) else ei
+            if sep > 0:
+                key = s[:sep].rstrip()
+                if keyok(key):
+                    cur.index[key.lower()] = len(cur.kv)
+                    cur.kv.append((key, s[sep + 1:].strip(), i - cur.start))
+                    kinds.append(KV); continue
+            kinds.append(OTHER)
+        cur.end = len(self.lines)
+        self._by_uid = {sec.uid: sec for sec in self.sections[1:]}
+
+    # ---------- output ----------
+    def text(self) -> str:
+        out = self.newline.join(self.lines)
+        if self.trailing_newline and self.lines:
+            out += self.newline
+        return out
+
+    def to_bytes(self) -> bytes:
+        # gbk / cp1252 读进来的统一写回 utf-8（和旧版 save 行为一致），utf-16 / BOM 保持原样
+        enc = self.encoding if self.encoding.startswith('utf-') else 'utf-8'
+        return self.text().encode(enc, errors='replace')
+
+    # ---------- in-place edits ----------
+    def set_value(self, sec: IniSection, key: str, value: str) -> bool:
+        """改 / 加一个 key；返回这一行是否真的变了。
+        已有的 key 保留原大小写，只重写它最后一次出现的那一行（值相同则一个字节都不动）；
+        没有的 key 插在本段最后一个键值行后面。"""
+        pos = sec.index.get(key.lower())
+        if pos is not None:
+            k, old, off = sec.kv[pos]
+            if old == value:
+                return False
+            sec.kv[pos] = (k, value, off)
+            line = self.lines[sec.start + off]
+            ci = line.find('//')
+            tail = line[ci:] if ci >= 0 else ""  # 行内注释原样保留
+            self.lines[sec.start + off] = f"{k}: {value}  {tail}" if tail else f"{k}: {value}"
+            return True
+        at = sec.start + (sec.kv[-1][2] + 1 if sec.kv else 1)
+        self._insert(at, [f"{key}: {value}"], [KV], sec)
+        sec.index[key.lower()] = len(sec.kv)
+        sec.kv.append((key, value, at - sec.start))
+        return True
+
+    def append_section(self, name: str, pairs: List[Tuple[str, str]]) -> IniSection:
+        """在文件末尾追加 [name] 段（前面空一行，以换行结尾，和旧版写法一致）。"""
+        if self.lines and self.lines[-1].strip():
+            self._insert(len(self.lines), [""], [BLANK], self.sections[-1])
+        n = sum(1 for sec in self.iter_sections() if sec.name == name) + 1
+        start = len(self.lines)
+        sec = IniSection(name, name if n == 1 else f"{name}#{n}", start, start)
+        self.lines.append(f"[{name}]"); self.lines.extend(f"{k}: {v}" for k, v in pairs)
+        self.kinds.append(SECTION); self.kinds.extend([KV] * len(pairs))
+        self.trailing_newline = True
+        for j, (k, v) in enumerate(pairs):
+            sec.index[k.lower()] = j
+            sec.kv.append((k, v, j + 1))
+        sec.end = len(self.lines)
+        self.sections.append(sec)
+        self._by_uid[sec.uid] = sec
+        return sec
+
+    def _insert(self, at: int, new_lines: List[str], new_kinds: List[int], owner: IniSection) -> None:
+        """在 owner 段内第 at 行前插入；只移动其后各段的 start/end，kv 偏移不用改。"""
+        n = len(new_lines)
+        self.lines[at:at] = new_lines
+        self.kinds[at:at] = new_kinds
+        owner.end += n
+        after = False
+        for sec in self.sections:
+            if after:
+                sec.start += n; sec.end += n
+            elif sec is owner:
+                after = True
+
+    # ---------- queries ----------
+    def iter_sections(self, name: Optional[str] = None) -> Iterator[IniSection]:
+        low = name.lower() if name else None
+        for sec in self.sections[1:]:
+            if low is None or sec.name.lower() == low:
+                yield sec
+
+    def section(self, uid: str) -> Optional[IniSection]:
+        return self._by_uid.get(uid)
+
+    def mania_sections(self) -> List[Tuple[int, IniSection]]:
+        """[(keys, section)]；没有合法 Keys 的 [Mania] 段忽略。"""
+        out = []
+        for sec in self.iter_sections("mania"):
+            k = None
+            for key, v, _ in sec.kv:
+                if key.lower() in ("keys", "keycount"):
+                    try: k = int(v)
+                    except ValueError: k = None
+                    break
+            if k:
+                out.append((k, sec))
+        return out
+
+    # ---------- ConfigParser 兼容（Skin.ini 的老用法：sections()/get()/items()） ----------
+    def sections_list(self) -> List[str]:
+        return [sec.uid for sec in self.sections[1:]]
+
+    def has_section(self, uid: str) -> bool:
+        return uid in self._by_uid
+
+    def items(self, uid: str) -> List[Tuple[str, str]]:
+        sec = self._by_uid.get(uid)
+        return list(sec.as_dict().items()) if sec else []
+
+    def get(self, uid: str, key: str, fallback=None):
+        sec = self._by_uid.get(uid)
+        return sec.get(key, fallback) if sec else fallback
+
+
+class IniView:
+    """给 Skin.ini 用的只读视图，接口与原来的 ConfigParser 用法一致。"""
+    def __init__(self, doc: IniDocument):
+        self.doc = doc
+
+    def sections(self) -> List[str]:
+        return self.doc.sections_list()
+
+    def has_section(self, sec: str) -> bool:
+        return self.doc.has_section(sec)
+
+    def items(self, sec: str) -> List[Tuple[str, str]]:
+        return self.doc.items(sec)
+
+    def get(self, sec: str, key: str, fallback=None, **_kw):
+        return self.doc.get(sec, key, fallback)
+
+
+# ---------- shared cache ----------
+_CACHE: Dict[str, Tuple[int, int, IniDocument]] = {}
+_LOCK = threading.Lock()
+
+
+def _key(path: Path) -> str:
+    try: return os.path.normcase(str(Path(path).resolve()))
+    except Exception: return str(path)
+
+
+def load_ini(path: Path) -> IniDocument:
+    """按 (path, mtime_ns, size) 缓存的解析结果。返回的文档是共享的，只读使用。"""
+    path = Path(path)
+    st = path.stat()
+    k = _key(path)
+    with _LOCK:
+        hit = _CACHE.get(k)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+    doc = IniDocument.from_bytes(path.read_bytes())
+    with _LOCK:
+        _CACHE[k] = (st.st_mtime_ns, st.st_size, doc)
+    return doc
+
+
+def store_ini(path: Path, doc: IniDocument) -> IniDocument:
+    """写盘后把刚写的文档直接放进缓存，省掉下一次读取+解析。"""
+    path = Path(path)
+    try:
+        st = path.stat()
+        with _LOCK:
+            _CACHE[_key(path)] = (st.st_mtime_ns, st.st_size, doc)
+    except OSError:
+        pass
+    return doc
+
+
+def clear_cache() -> None:
+    with _LOCK:
+        _CACHE.clear()
@@ -1,18 +1,384 @@
 # -*- coding: utf-8 -*-
 """
-OSK 导入/导出工具（骨架）。
+OSK 导入/导出工具。
 - .osk 实际上是 zip，保留相对路径即可。
-- 这里先给出最小实现，后续可加：排除大文件/只导出被修改的文件/进度条等。
+- 导出：PNG/OGG/MP3 等本身已压缩的格式直接 ZIP_STORED，只对文本和 WAV 做 deflate；
+  deflate 在线程池里并行（zlib 会释放 GIL），写入顺序固定（按相对路径排序）。
+- 跳过 __conflicts_backup / .skin_ini_history 这类编辑器自己的目录。
+- progress(done_bytes, total_bytes, name) / cancel() -> bool 两个回调给 UI 用。
+- 导入：先检查所有条目（路径穿越、绝对路径、声明大小、压缩比），解压时再按实际字节数二次把关；
+  可以先解出 skin.ini + 预览要用的素材并回调 on_first_ready，其余条目随后在后台继续解压。
+- 精简导出（slim=True）：内容完全相同的文件只存一份，其余写进 DEDUP_MANIFEST（重复文件 -> 保留文件）；
+  import_osk 解压后按清单把重复文件复制回来。osu! 本身不认这个清单，精简包用于备份 / 在编辑器之间传递。
+- optimize_png=True：导出前先把 PNG 无损优化到临时目录（core.png_optimize，进程池），只把变小的版本打进包，
+  皮肤目录本身不动。
 """
-from zipfile import ZipFile
-from pathlib import Path
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Callable, List, Optional, Tuple
+from zipfile import ZipFile, ZipInfo, ZIP_STORED, ZIP_DEFLATED
+import json, os, shutil, tempfile, threading, zlib
 
-def import_osk(osk_path: Path, dest_dir: Path):
+# 编辑器自己产生的目录，不进 .osk
+EXCLUDE_DIRS = {"__conflicts_backup", ".skin_ini_history"}
+# 只有这些才值得 deflate；其它（png/jpg/ogg/mp3/...）原样存储
+DEFLATE_EXTS = {".ini", ".txt", ".json", ".cfg", ".osu", ".md", ".xml", ".csv", ".wav"}
+DEFLATE_LEVEL = 6
+# 精简包里的去重清单：{"version": 1, "duplicates": {重复文件: 保留文件}}
+DEDUP_MANIFEST = ".osu-skin-editor-dedup.json"
+# 超过这个大小的文件不整块读进内存，交给 ZipFile.write 顺序流式写
+STREAM_THRESHOLD = 32 * 1024 * 1024
+
+ProgressFn = Callable[[int, int, str], None]
+CancelFn = Callable[[], bool]
+
+
+class OskCancelled(Exception):
+    """用户取消了导入/导出。"""
+
+
+class OskImportError(Exception):
+    """不安全或超限的 .osk（路径穿越、zip 炸弹等）。"""
+
+
+@dataclass
+class ImportLimits:
+    max_total: int = 2 * 1024 ** 3       # 解压后总大小
+    max_entry: int = 512 * 1024 ** 2     # 单个条目解压后大小
+    max_entries: int = 100_000
+    max_ratio: float = 200.0             # 单条目压缩比上限
+    ratio_min_size: int = 16 * 1024 ** 2 # 小于这个的不查压缩比（静音 wav 压缩比本来就很夸张）
+
+
+# 预览最先需要的素材（skin_loader.KNOWN_ASSETS 的超集）
+PREVIEW_FIRST = {
+    "cursor", "cursortrail", "cursormiddle", "hitcircle", "hitcircleoverlay", "approachcircle",
+    *(f"default-{i}" for i in range(10)), *(f"score-{i}" for i in range(10)),
+    "mania-note1", "mania-note1l", "mania-note1t", "mania-key1", "mania-key1d", "mania-key1l",
+}
+
+_CHUNK = 1024 * 1024
+
+
+def is_preview_entry(arc: str) -> bool:
+    """skin.ini 和预览要用的根目录素材。"""
+    p = PurePosixPath(arc)
+    if len(p.parts) != 1: return False
+    low = p.name.lower()
+    if low == "skin.ini": return True
+    if not low.endswith(".png"): return False
+    return low[:-4].replace("@2x", "") in PREVIEW_FIRST
+
+
+def safe_member_path(name: str) -> PurePosixPath:
+    """拒绝绝对路径、盘符、'..'；返回规范化后的相对路径。"""
+    norm = name.replace("\\", "/")
+    p = PurePosixPath(norm)
+    if not norm or p.is_absolute() or norm.startswith("/") or (len(norm) > 1 and norm[1] == ":"):
+        raise OskImportError(f"absolute path in archive: {name!r}")
+    parts = [x for x in p.parts if x not in ("", ".")]
+    if any(x == ".." for x in parts):
+        raise OskImportError(f"path traversal in archive: {name!r}")
+    if not parts:
+        raise OskImportError(f"empty path in archive: {name!r}")
+    return PurePosixPath(*parts)
+
+
+def plan_import(osk_path: Path, limits: Optional[ImportLimits] = None) -> List[Tuple[ZipInfo, PurePosixPath]]:
+    """只看中央目录：校验路径和声明的大小，返回要解压的文件条目。"""
+    limits = limits or ImportLimits()
     with ZipFile(osk_path) as z:
-        z.extractall(dest_dir)
+        infos = [i for i in z.infolist() if not i.is_dir()]
+    if len(infos) > limits.max_entries:
+        raise OskImportError(f"too many entries: {len(infos)}")
+    total = 0; out = []
+    for i in infos:
+        rel = safe_member_path(i.filename)
+        if i.file_size > limits.max_entry:
+            raise OskImportError(f"entry too large: {i.filename} ({i.file_size} bytes)")
+        if (i.file_size > limits.ratio_min_size and i.compress_size > 0
+                and i.file_size / i.compress_size > limits.max_ratio):
+            raise OskImportError(f"suspicious compression ratio: {i.filename}")
+        total += i.file_size
+        if total > limits.max_total:
+            raise OskImportError(f"archive too large (> {limits.max_total} bytes)")
+        out.append((i, rel))
+    return out
+
+
+class _Budget:
+    """多个解压线程共享的“实际已写字节”计数。"""
+    def __init__(self, limits: ImportLimits):
+        self.limits = limits; self.used = 0; self._lock = threading.Lock()
+
+    def take(self, n: int) -> None:
+        with self._lock:
+            self.used += n
+            if self.used > self.limits.max_total:
+                raise OskImportError("archive expands beyond the total size limit")
+
+
+def _extract_one(osk_path: Path, local: threading.local, info: ZipInfo, rel: PurePosixPath,
+                 dest: Path, budget: _Budget, cancel: Optional[CancelFn]) -> int:
+    z = getattr(local, "zf", None)
+    if z is None:
+        z = local.zf = ZipFile(osk_path)
+    target = dest.joinpath(*rel.parts)
+    # 再确认一次真的落在 dest 里（防已有的符号链接目录把文件带出去）
+    parent = target.parent.resolve()
+    if parent != dest and dest not in parent.parents:
+        raise OskImportError(f"entry escapes destination: {info.filename}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".part")
+    written = 0
+    try:
+        with z.open(info) as src, open(tmp, "wb") as out:
+            while True:
+                if cancel and cancel(): raise OskCancelled()
+                buf = src.read(_CHUNK)
+                if not buf: break
+                written += len(buf)
+                # 中央目录里的大小可以伪造，按实际解出来的字节再卡一次
+                if written > budget.limits.max_entry:
+                    raise OskImportError(f"entry expands beyond its size limit: {info.filename}")
+                budget.take(len(buf))
+                out.write(buf)
+        os.replace(tmp, target)
+    except BaseException:
+        try: tmp.unlink()
+        except OSError: pass
+        raise
+    return written
+
+
+def import_osk(osk_path: Path, dest_dir: Path,
+               progress: Optional[ProgressFn] = None,
+               cancel: Optional[CancelFn] = None,
+               limits: Optional[ImportLimits] = None,
+               only: Optional[Callable[[str], bool]] = None,
+               first: Optional[Callable[[str], bool]] = is_preview_entry,
+               on_first_ready: Optional[Callable[[Path], None]] = None,
+               workers: Optional[int] = None) -> Path:
+    """安全导入 .osk。
+    only:  只解压满足条件的条目（按 zip 内路径）。
+    first: 优先解压的条目；全部落盘后调用 on_first_ready(dest_dir)，然后继续解压其余条目。
+    """
+    osk_path = Path(osk_path); dest = Path(dest_dir)
+    limits = limits or ImportLimits()
+    plan = plan_import(osk_path, limits)
+    if only is not None:
+        plan = [(i, r) for (i, r) in plan if only(r.as_posix())]
+    head = [(i, r) for (i, r) in plan if first and first(r.as_posix())]
+    tail = [(i, r) for (i, r) in plan if not (first and first(r.as_posix()))]
+    dest.mkdir(parents=True, exist_ok=True)
+    dest = dest.resolve()
+
+    total = sum(i.file_size for i, _ in plan); done = 0
+    budget = _Budget(limits)
+    local = threading.local()
+    handles: List[ZipFile] = []
+    workers = workers or min(8, (os.cpu_count() or 2))
+
+    def job(info, rel):
+        try:
+            n = _extract_one(osk_path, local, info, rel, dest, budget, cancel)
+        finally:
+            # 第一个条目就失败时句柄也要登记，否则导入中止后 .osk 一直被占着（Windows 上删不掉）
+            zf = getattr(local, "zf", None)
+            if zf is not None and zf not in handles: handles.append(zf)
+        return n, rel.as_posix()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for phase in (head, tail):
+                futs = [pool.submit(job, i, r) for (i, r) in phase]
+                try:
+                    for f in futs:
+                        n, name = f.result()
+                        done += n
+                        if progress: progress(done, total, name)
+                except BaseException:
+                    for f in futs: f.cancel()
+                    raise
+                if phase is head and head and on_first_ready:
+                    on_first_ready(dest)
+        if any(r.as_posix() == DEDUP_MANIFEST for _i, r in plan):
+            _restore_duplicates(dest, len(plan), budget, cancel)
+    finally:
+        for zf in handles:
+            try: zf.close()
+            except Exception: pass
+    return dest
+
+
+def _inside(dest: Path, target: Path) -> bool:
+    parent = target.parent.resolve()
+    return parent == dest or dest in parent.parents
+
+
+def _restore_duplicates(dest: Path, n_entries: int, budget: _Budget, cancel: Optional[CancelFn]) -> None:
+    """按精简包的清单把重复文件复制回来；清单里的路径和解压条目走同一套检查与总量限制。"""
+    manifest = dest / DEDUP_MANIFEST
+    try:
+        dups = json.loads(manifest.read_text(encoding="utf-8")).get("duplicates", {})
+    except (OSError, ValueError, AttributeError) as e:
+        raise OskImportError(f"bad dedup manifest: {e}")
+    if not isinstance(dups, dict) or n_entries + len(dups) > budget.limits.max_entries:
+        raise OskImportError("bad dedup manifest")
+    for dup, keep in dups.items():
+        if cancel and cancel(): raise OskCancelled()
+        src = dest.joinpath(*safe_member_path(str(keep)).parts)
+        dst = dest.joinpath(*safe_member_path(str(dup)).parts)
+        if not (_inside(dest, src) and _inside(dest, dst)) or not src.is_file():
+            raise OskImportError(f"bad dedup manifest entry: {dup!r} -> {keep!r}")
+        budget.take(src.stat().st_size)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(dst.name + ".part")
+        try:
+            shutil.copyfile(src, tmp); os.replace(tmp, dst)
+        finally:
+            if tmp.exists(): tmp.unlink()
+    manifest.unlink()
+
+
+def iter_skin_files(src_dir: Path) -> List[Tuple[Path, str]]:
+    """(绝对路径, zip 内路径) 列表；排除目录在下探前就剪掉。"""
+    src_dir = Path(src_dir)
+    out: List[Tuple[Path, str]] = []
+    for cur, dirs, files in os.walk(src_dir):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDE_DIRS)
+        rel_dir = Path(cur).relative_to(src_dir)
+        for f in files:
+            arc = (rel_dir / f).as_posix()
+            out.append((Path(cur) / f, arc))
+    out.sort(key=lambda t: t[1].lower())
+    return out
+
+
+def compress_type_for(path: Path) -> int:
+    return ZIP_DEFLATED if path.suffix.lower() in DEFLATE_EXTS else ZIP_STORED
+
+
+def _prepare_entry(path: Path, arc: str):
+    """工作线程：读文件、算 CRC、按需 deflate。返回 (ZipInfo, payload)。"""
+    zinfo = ZipInfo.from_file(path, arc, strict_timestamps=False)
+    data = path.read_bytes()
+    zinfo.file_size = len(data)
+    zinfo.CRC = zlib.crc32(data) & 0xFFFFFFFF
+    zinfo.compress_type = compress_type_for(path)
+    if zinfo.compress_type == ZIP_DEFLATED:
+        co = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+        data = co.compress(data) + co.flush()
+    zinfo.compress_size = len(data)
+    return zinfo, data
+
+
+def _write_prepared(z: ZipFile, zinfo: ZipInfo, payload: bytes) -> None:
+    """把已经压缩好的数据直接写进归档（ZipFile 没有公开这个入口）。"""
+    zip64 = zinfo.file_size > 0x7FFFFFFF or zinfo.compress_size > 0x7FFFFFFF
+    zinfo.header_offset = z.fp.tell()
+    z.fp.write(zinfo.FileHeader(zip64))
+    z.fp.write(payload)
+    z.filelist.append(zinfo)
+    z.NameToInfo[zinfo.filename] = zinfo
+    z.start_dir = z.fp.tell()
+
+
+def export_osk(src_dir: Path, out_path: Path,
+               progress: Optional[ProgressFn] = None,
+               cancel: Optional[CancelFn] = None,
+               workers: Optional[int] = None, slim: bool = False,
+               optimize_png: bool = False) -> Path:
+    """导出 .osk。先写 .part 临时文件，完成后再替换，取消/失败不会留下半个文件。
+    slim=True 时重复内容只存一份（见 DEDUP_MANIFEST）；optimize_png=True 时 PNG 先做无损优化。"""
+    src_dir = Path(src_dir); out_path = Path(out_path)
+    entries = iter_skin_files(src_dir)
+    # 别把正在写的输出文件自己也打进去
+    try:
+        out_res = out_path.resolve()
+        entries = [(p, a) for (p, a) in entries if p.resolve() != out_res]
+    except Exception:
+        pass
+    dups: dict = {}
+    if slim:
+        from core.dedup import find_duplicates, DedupCancelled
+        try:
+            dups = find_duplicates(entries, src_dir, cancel=cancel, workers=workers).canonical_map()
+        except DedupCancelled:
+            raise OskCancelled()
+        entries = [(p, a) for (p, a) in entries if a not in dups and a != DEDUP_MANIFEST]
+    stage = tempfile.mkdtemp(prefix="osk-png-") if optimize_png else None
+    try:
+        if stage:
+            entries = _optimized_entries(entries, Path(stage), progress, cancel)
+        return _write_osk(entries, out_path, dups, progress, cancel, workers)
+    finally:
+        if stage: shutil.rmtree(stage, ignore_errors=True)
+
+
+def _optimized_entries(entries: List[Tuple[Path, str]], stage: Path,
+                       progress: Optional[ProgressFn], cancel: Optional[CancelFn]) -> List[Tuple[Path, str]]:
+    """PNG 优化到 stage 目录；变小的条目换成优化后的文件，其余原样。"""
+    from core.png_optimize import optimize_files
+    pngs = [(i, p) for i, (p, a) in enumerate(entries) if a.lower().endswith(".png")]
+    results = optimize_files([(p, stage / f"{n}.png") for n, (_i, p) in enumerate(pngs)], progress, cancel)
+    if cancel and cancel(): raise OskCancelled()
+    out = list(entries)
+    for n, ((i, _p), r) in enumerate(zip(pngs, results)):
+        if r.changed:
+            out[i] = (stage / f"{n}.png", entries[i][1])
+    return out
+
+
+def _write_osk(entries: List[Tuple[Path, str]], out_path: Path, dups: dict,
+               progress: Optional[ProgressFn], cancel: Optional[CancelFn],
+               workers: Optional[int]) -> Path:
+    sizes = []
+    for p, _ in entries:
+        try: sizes.append(p.stat().st_size)
+        except OSError: sizes.append(0)
+    total = sum(sizes); done = 0
+    workers = workers or min(8, (os.cpu_count() or 2))
+    window = workers * 2
+
+    tmp = out_path.with_name(out_path.name + ".part")
+    try:
+        with ZipFile(tmp, "w", allowZip64=True) as z, ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            it = iter(zip(entries, sizes))
+
+            def fill():
+                while len(pending) < window:
+                    nxt = next(it, None)
+                    if nxt is None: return
+                    (p, arc), size = nxt
+                    fut = None if size >= STREAM_THRESHOLD else pool.submit(_prepare_entry, p, arc)
+                    pending.append((p, arc, size, fut))
 
-def export_osk(src_dir: Path, out_path: Path):
-    with ZipFile(out_path, "w") as z:
-        for p in Path(src_dir).rglob("*"):
-            if p.is_file():
-                z.write(p, p.relative_to(src_dir))
+            fill()
+            while pending:
+                if cancel and cancel():
+                    for *_, f in pending:
+                        if f is not None: f.cancel()
+                    raise OskCancelled()
+                p, arc, size, fut = pending.popleft()
+                if fut is None:
+                    z.write(p, arc, compress_type=compress_type_for(p), compresslevel=DEFLATE_LEVEL)
+                else:
+                    zinfo, payload = fut.result()
+                    _write_prepared(z, zinfo, payload)
+                done += size
+                if progress: progress(done, total, arc)
+                fill()
+            if dups:
+                z.writestr(DEDUP_MANIFEST, json.dumps({"version": 1, "duplicates": dups}, ensure_ascii=False,
+                                                      indent=1, sort_keys=True), compress_type=ZIP_DEFLATED)
+        os.replace(tmp, out_path)
+    except BaseException:
+        try: tmp.unlink()
+        except OSError: pass
+        raise
+    return out_path
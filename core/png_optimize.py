@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+皮肤 PNG 无损优化。
+- 每张图在工作进程里尝试几种更小的表示：去掉全不透明的 alpha、灰度图转 L/LA、
+  不超过 256 色转调色板（≤16 色再降位深），全部用最高压缩级别重新编码；
+  辅助块（tEXt/iTXt/zTXt/tIME/pHYs/iCCP/gAMA…）一律不写回去，osu! 不读这些。
+- 选最小的候选，重新解码后与原图逐像素（RGBA，包括全透明像素下的颜色）比对、并确认只剩关键块和 tRNS，才替换；
+  比原文件不小就不动。16 位 / 动画 PNG 跳过。
+- 替换走临时文件 + os.replace，保留原 mtime（像素没变，依赖 mtime 的缓存不必失效；导出时 zip 里的时间戳也不变）。
+- 调色板转换优先用 NumPy 精确建表；没有 NumPy 时退回 Pillow 的量化，靠逐像素校验兜底。
+
+    results = optimize_skin(root, progress, cancel)
+    sum(r.saved for r in results)
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+import multiprocessing, os
+
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    np = None  # type: ignore
+    _HAS_NUMPY = False
+
+ProgressFn = Optional[Callable[[int, int, str], None]]
+CancelFn = Optional[Callable[[], bool]]
+
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+# 输出里允许出现的块：关键块 + 调色板 / 透明色需要的 tRNS，其余辅助块都不应写回
+_KEEP_CHUNKS = frozenset((b"IHDR", b"PLTE", b"tRNS", b"IDAT", b"IEND"))
+# 少于这个数量就不开进程池了
+INLINE_MAX = 3
+
+
+@dataclass
+class OptimizeResult:
+    path: Path
+    before: int
+    after: int
+    ok: bool = True
+    mode: str = ""      # 采用的表示，例如 "P4" / "RGB" / "LA"；没有变化时为空
+    error: str = ""
+
+    @property
+    def saved(self) -> int:
+        return self.before - self.after if self.ok else 0
+
+    @property
+    def changed(self) -> bool:
+        return self.ok and self.after < self.before
+
+
+def _ihdr_bit_depth(data: bytes) -> int:
+    if data[:8] != _PNG_SIG or data[12:16] != b"IHDR": return 0
+    return data[24]
+
+
+def _chunk_types(data: bytes) -> List[bytes]:
+    out, i = [], 8
+    while i + 8 <= len(data):
+        n = int.from_bytes(data[i:i + 4], "big")
+        out.append(data[i + 4:i + 8]); i += 12 + n
+    return out
+
+
+def _encode(im, **params) -> bytes:
+    buf = BytesIO()
+    # 不传 icc_profile 时 Pillow 会从 im.info 里取回原图的 ICC，写出 iCCP
+    params.setdefault("icc_profile", None)
+    im.save(buf, format="PNG", optimize=True, **params)
+    return buf.getvalue()
+
+
+def _palette_exact(rgba):
+    """≤256 色的 RGBA 图 -> (P 图, save 参数, 标签)；颜色更多时返回 None。"""
+    from PIL import Image
+    if _HAS_NUMPY:
+        arr = np.asarray(rgba)
+        flat = np.ascontiguousarray(arr).reshape(-1, 4).view(np.uint32).ravel()
+        colors, inverse = np.unique(flat, return_inverse=True)
+        if colors.size > 256: return None
+        cols = colors.view(np.uint8).reshape(-1, 4)
+        # 半透明颜色排在前面，tRNS 块只需要覆盖这一段
+        order = np.argsort(cols[:, 3] == 255, kind="stable")
+        remap = np.empty_like(order); remap[order] = np.arange(order.size)
+        cols = [tuple(int(v) for v in c) for c in cols[order]]
+        p = Image.fromarray(remap[inverse.ravel()].astype(np.uint8).reshape(arr.shape[:2]), "P")
+    else:
+        got = rgba.getcolors(256)
+        if got is None: return None
+        # 量化不保证精确，靠后面的逐像素校验兜底
+        p = rgba.quantize(colors=len(got), method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+        pal = p.getpalette("RGBA") or []
+        cols = [tuple(pal[i:i + 4]) for i in range(0, len(pal), 4)][:len(got)]
+    p.putpalette(bytes(v for c in cols for v in c[:3]), "RGB")
+    n_trns = max((i + 1 for i, c in enumerate(cols) if c[3] < 255), default=0)
+    params = {"transparency": bytes(c[3] for c in cols[:n_trns])} if n_trns else {}
+    n = len(cols)
+    bits = 1 if n <= 2 else 2 if n <= 4 else 4 if n <= 16 else 8
+    if bits < 8: params["bits"] = bits
+    return p, params, f"P{bits}"
+
+
+def _candidates(rgba) -> Iterable[Tuple[str, object, dict]]:
+    """(标签, 图, save 参数)；都应当与 rgba 逐像素一致，最终以校验为准。"""
+    opaque = rgba.getchannel("A").getextrema() == (255, 255)
+    r, g, b, _a = rgba.split()
+    gray = r.tobytes() == g.tobytes() == b.tobytes()
+    if gray:
+        yield ("L", rgba.convert("L"), {}) if opaque else ("LA", rgba.convert("LA"), {})
+    yield ("RGB", rgba.convert("RGB"), {}) if opaque else ("RGBA", rgba, {})
+    pal = _palette_exact(rgba)
+    if pal is not None:
+        p, params, label = pal
+        yield label, p, params
+
+
+def _same_pixels(data: bytes, ref_rgba) -> bool:
+    from PIL import Image
+    with Image.open(BytesIO(data)) as im:
+        return im.size == ref_rgba.size and im.convert("RGBA").tobytes() == ref_rgba.tobytes()
+
+
+def optimize_bytes(data: bytes) -> Tuple[bytes, str]:
+    """返回 (更小且逐像素一致的 PNG, 标签)；没有更好的结果时返回 (原数据, "")。"""
+    from PIL import Image
+    if _ihdr_bit_depth(data) not in (1, 2, 4, 8):
+        return data, ""       # 16 位：Pillow 读进来会降成 8 位，不能算无损
+    with Image.open(BytesIO(data)) as im:
+        if getattr(im, "is_animated", False) or im.mode not in ("1", "L", "LA", "P", "PA", "RGB", "RGBA"):
+            return data, ""
+        im.load()
+        rgba = im.convert("RGBA")
+        best, label = data, ""
+        for tag, cand, params in _candidates(rgba):
+            try:
+                out = _encode(cand, **params)
+            except Exception:
+                continue
+            if len(out) < len(best) and _KEEP_CHUNKS.issuperset(_chunk_types(out)) and _same_pixels(out, rgba):
+                best, label = out, tag
+    return best, label
+
+
+def optimize_file(src: str, dst: Optional[str] = None) -> Tuple[int, int, str, str]:
+    """工作进程入口。dst 为空时原地替换。返回 (原大小, 新大小, 标签, 错误)；没有变小时不写文件。"""
+    try:
+        data = Path(src).read_bytes()
+        out, label = optimize_bytes(data)
+        if len(out) >= len(data):
+            return len(data), len(data), "", ""
+        target = Path(dst or src)
+        st = os.stat(src)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.part")
+        try:
+            tmp.write_bytes(out)
+            os.replace(tmp, target)
+        finally:
+            if tmp.exists(): tmp.unlink()
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+        return len(data), len(out), label, ""
+    except Exception as e:
+        try: n = os.path.getsize(src)
+        except OSError: n = 0
+        return n, n, "", f"{type(e).__name__}: {e}"
+
+
+def optimize_files(jobs: List[Tuple[Path, Optional[Path]]], progress: ProgressFn = None,
+                   cancel: CancelFn = None, workers: int = 0) -> List[OptimizeResult]:
+    """jobs: [(源 PNG, 输出路径或 None=原地)]；结果顺序与 jobs 一致，取消后没跑的条目不出现在结果里。"""
+    total = len(jobs); done = 0
+    results: List[Optional[OptimizeResult]] = [None] * total
+
+    def finish(i, res):
+        nonlocal done
+        before, after, label, err = res
+        results[i] = OptimizeResult(Path(jobs[i][0]), before, after, not err, label, err)
+        done += 1
+        if progress: progress(done, total, Path(jobs[i][0]).name)
+
+    def args(i):
+        s, d = jobs[i]
+        return str(s), (str(d) if d is not None else None)
+
+    if total <= INLINE_MAX or workers == 1:
+        for i in range(total):
+            if cancel and cancel(): break
+            finish(i, optimize_file(*args(i)))
+    else:
+        n = workers or max(1, min(8, os.cpu_count() or 1, total))
+        with ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn")) as ex:
+            futs = {ex.submit(optimize_file, *args(i)): i for i in range(total)}
+            for fut in as_completed(futs):
+                i = futs[fut]
+                try:
+                    finish(i, fut.result())
+                except Exception as e:  # 工作进程崩了
+                    finish(i, (0, 0, "", f"{type(e).__name__}: {e}"))
+                if cancel and cancel():
+                    for f in futs: f.cancel()
+                    break
+    return [r for r in results if r is not None]
+
+
+def optimize_skin(root: Path, progress: ProgressFn = None, cancel: CancelFn = None,
+                  workers: int = 0) -> List[OptimizeResult]:
+    """原地优化皮肤目录里的所有 PNG（跳过编辑器的备份目录）。"""
+    from core.assets_ops import walk_media
+    files = [f.path for f in walk_media(Path(root), (".png",))]
+    return optimize_files([(p, None) for p in files], progress, cancel, workers)
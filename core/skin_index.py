@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+皮肤目录增量索引。
+- 每个皮肤一份 JSON（用户缓存目录 skin_index/），记录根目录下每个 .png 的 size / mtime_ns / @2x scale。
+- 再次加载时先 stat 目录本身：目录 mtime 没变 => 文件集合没变，直接复用上次的条目，不再列目录。
+- 目录变了才 scandir 一遍，并算出新增/删除/修改的文件名（热重载可以只处理这些）。
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+import json, os, time
+
+from core.user_cache import cache_dir, path_key
+
+INDEX_VERSION = 1
+# 目录 mtime 落在扫描时刻附近时不可信（同一时间片内的改动看不出来），下次强制重扫
+_RACY_NS = 2_000_000_000
+
+
+@dataclass
+class FileEntry:
+    size: int
+    mtime_ns: int
+    scale: int  # 1 or 2
+
+    def fingerprint(self) -> Tuple[int, int]:
+        return (self.size, self.mtime_ns)
+
+
+def asset_name(filename: str) -> Tuple[str, int]:
+    """'hitcircle@2x.png' -> ('hitcircle', 2)"""
+    stem = filename[:-4] if filename.lower().endswith(".png") else filename
+    if "@2x" in stem:
+        return stem.replace("@2x", ""), 2
+    return stem, 1
+
+
+@dataclass
+class SkinIndex:
+    root: Path
+    dir_mtime_ns: int = 0
+    scanned_at_ns: int = 0
+    files: Dict[str, FileEntry] = field(default_factory=dict)
+    # 最近一次 refresh 的变化（文件名）
+    changed: Set[str] = field(default_factory=set)
+    rescanned: bool = False
+    _lower: Optional[Dict[str, str]] = field(default=None, repr=False)
+
+    # ---------- persistence ----------
+    @staticmethod
+    def index_path(root: Path) -> Path:
+        return cache_dir("skin_index") / f"{path_key(root)}.json"
+
+    @classmethod
+    def open(cls, root: Path) -> "SkinIndex":
+        inst = cls(root=Path(root))
+        try:
+            data = json.loads(cls.index_path(root).read_text(encoding="utf-8"))
+            if data.get("version") == INDEX_VERSION:
+                inst.dir_mtime_ns = int(data.get("dir_mtime_ns", 0))
+                inst.scanned_at_ns = int(data.get("scanned_at_ns", 0))
+                inst.files = {n: FileEntry(*v) for n, v in data.get("files", {}).items()}
+        except Exception:
+            pass
+        return inst
+
+    def save(self) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "root": str(self.root),
+            "dir_mtime_ns": self.dir_mtime_ns,
+            "scanned_at_ns": self.scanned_at_ns,
+            "files": {n: [e.size, e.mtime_ns, e.scale] for n, e in self.files.items()},
+        }
+        try:
+            p = self.index_path(self.root)
+            tmp = p.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, p)
+        except Exception:
+            pass
+
+    # ---------- scanning ----------
+    def _is_fresh(self, dir_mtime_ns: int) -> bool:
+        if not self.scanned_at_ns or dir_mtime_ns != self.dir_mtime_ns:
+            return False
+        return dir_mtime_ns < self.scanned_at_ns - _RACY_NS
+
+    def refresh(self, force: bool = False) -> bool:
+        """同步磁盘状态；返回是否真的重扫了目录。"""
+        self.changed = set()
+        try:
+            dir_mtime_ns = os.stat(self.root).st_mtime_ns
+        except OSError:
+            self.changed = set(self.files); self.files = {}; self._lower = None
+            self.rescanned = True
+            return True
+        if not force and self._is_fresh(dir_mtime_ns):
+            self.rescanned = False
+            return False
+
+        new_files: Dict[str, FileEntry] = {}
+        with os.scandir(self.root) as it:
+            for de in it:
+                if not de.name.lower().endswith(".png"):
+                    continue
+                try:
+                    if not de.is_file(): continue
+                    st = de.stat()
+                except OSError:
+                    continue
+                new_files[de.name] = FileEntry(st.st_size, st.st_mtime_ns, asset_name(de.name)[1])
+
+        old = self.files
+        self.changed = {n for n in old.keys() - new_files.keys()}
+        self.changed |= {n for n, e in new_files.items()
+                         if n not in old or old[n].fingerprint() != e.fingerprint()}
+        self.files = new_files; self._lower = None
+        self.dir_mtime_ns = dir_mtime_ns
+        self.scanned_at_ns = time.time_ns()
+        self.rescanned = True
+        self.save()
+        return True
+
+    def entry(self, filename: str) -> Optional[FileEntry]:
+        return self.files.get(filename)
+
+    def lookup(self, filename: str) -> Optional[str]:
+        """按文件名找实际存在的文件（大小写不敏感兜底，照顾 Windows 下的命名）。"""
+        if filename in self.files:
+            return filename
+        if self._lower is None:
+            self._lower = {n.lower(): n for n in self.files}
+        return self._lower.get(filename.lower())
@@ -1,13 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
-import re
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Tuple, Any
 
-SECTION_RE = re.compile(r'^\s*\[(?P<name>[^\]]+)\]\s*$')
-KV_RE = re.compile(r'^\s*([A-Za-z0-9_]+)\s*:\s*(.*?)\s*$')
-COMMENT_RE = re.compile(r'^\s*//')
+from core.ini_doc import IniDocument, IniSection, load_ini, store_ini
 
 @dataclass
 class ManiaBlock:
@@ -18,136 +16,117 @@ class ManiaBlock:
 
 @dataclass
 class SkinIni:
+    """skin.ini 的可编辑包装，底层是 core.ini_doc.IniDocument。
+
+    编辑是增量的：改值只重写对应行，加 key / 加段只挪后面各段的行区间，不会整文件重新分词。
+    多个 K 一起改用 transaction()，中途出错整批回滚。
+    """
     path: Path
-    lines: List[str] = field(default_factory=list)
-    sections: List[Tuple[str, int, int]] = field(default_factory=list)
-    mania_by_keys: Dict[int, ManiaBlock] = field(default_factory=dict)
+    doc: IniDocument = field(default_factory=lambda: IniDocument(""), repr=False)
+    # 刚从缓存拿到的文档是共享的，第一次编辑前复制一份（写时复制）
+    _shared: bool = field(default=False, repr=False)
+    _mania: Dict[int, IniSection] = field(default_factory=dict, repr=False)
 
     @classmethod
     def read(cls, path: Path) -> "SkinIni":
-        text = Path(path).read_text(encoding="utf-8", errors="ignore")
-        lines = text.splitlines(keepends=False)
-        inst = cls(path=Path(path), lines=lines)
-        inst._parse_sections()
-        inst._parse_mania_blocks()
+        # 共享 core.ini_doc 的缓存：loader / 预览 / 面板读同一个文件只分词一次
+        inst = cls(path=Path(path), doc=load_ini(Path(path)), _shared=True)
+        inst._index_mania()
         return inst
 
-    def _parse_sections(self) -> None:
-        self.sections.clear()
-        cur_name = None
-        cur_start = 0
-        for i, line in enumerate(self.lines):
-            m = SECTION_RE.match(line)
-            if m:
-                if cur_name is not None:
-                    self.sections.append((cur_name, cur_start, i))
-                cur_name = m.group("name").strip()
-                cur_start = i
-        if cur_name is not None:
-            self.sections.append((cur_name, cur_start, len(self.lines)))
-
-    def _parse_mania_blocks(self) -> None:
-        self.mania_by_keys.clear()
-        for name, s, e in self.sections:
-            if name.lower() != "mania":
-                continue
-            keys_val = None
-            kv_pairs: List[Tuple[str, str]] = []
-            for i in range(s + 1, e):
-                line = self.lines[i]
-                if not line.strip() or COMMENT_RE.match(line):
-                    continue
-                if SECTION_RE.match(line):
-                    break
-                kv = KV_RE.match(line)
-                if kv:
-                    k = kv.group(1).strip()
-                    v = kv.group(2).strip()
-                    kv_pairs.append((k, v))
-                    if k.lower() == "keys":
-                        try: keys_val = int(v)
-                        except Exception: pass
-            if keys_val is None:
-                continue
-            self.mania_by_keys[keys_val] = ManiaBlock(s, e, keys_val, kv_pairs)
+    def _index_mania(self) -> None:
+        self._mania = {}
+        for k, sec in self.doc.mania_sections():
+            self._mania[k] = sec  # 同一个 K 出现多次时后者生效
+
+    def _editable(self) -> IniDocument:
+        if self._shared:
+            self.doc = self.doc.copy(); self._shared = False
+            self._index_mania()
+        return self.doc
+
+    # ---------- 兼容旧字段 ----------
+    @property
+    def lines(self) -> List[str]:
+        return self.doc.lines
+
+    @property
+    def sections(self) -> List[Tuple[str, int, int]]:
+        return [(sec.name, sec.start, sec.end) for sec in self.doc.iter_sections()]
+
+    @property
+    def mania_by_keys(self) -> Dict[int, ManiaBlock]:
+        return {k: ManiaBlock(sec.start, sec.end, k, [(key, v) for key, v, _ in sec.kv])
+                for k, sec in self._mania.items()}
 
+    # ---------- queries ----------
     def available_mania_keys(self) -> List[int]:
-        return sorted(self.mania_by_keys.keys())
+        return sorted(self._mania.keys())
 
     def mania_get(self, keys: int) -> Dict[str, str]:
-        blk = self.mania_by_keys.get(keys)
-        if not blk:
+        sec = self._mania.get(keys)
+        if not sec:
             return {}
-        return {k: v for (k, v) in blk.kv_pairs}
+        return sec.as_dict()
 
-    def mania_set_values(self, keys: int, updates: Dict[str, Any]) -> None:
+    # ---------- edits ----------
+    @staticmethod
+    def _normalize(updates: Dict[str, Any]) -> Dict[str, str]:
         norm: Dict[str, str] = {}
         for k, v in updates.items():
             if v is None: continue
+            if k.lower() == "keys": continue  # 块由 K 决定，不允许借 updates 改 Keys
             if isinstance(v, (list, tuple)):
                 norm[k] = ",".join(str(int(x)) for x in v)
             elif isinstance(v, bool):
                 norm[k] = "1" if v else "0"
             else:
                 norm[k] = str(v)
-
-        blk = self.mania_by_keys.get(keys)
-        if blk is None:
-            if self.lines and self.lines[-1].strip():
-                self.lines.append("")
-            self.lines.append("[Mania]")
-            self.lines.append(f"Keys: {keys}")
-            for k, v in norm.items():
-                self.lines.append(f"{k}: {v}")
-            self.lines.append("")
-            self._parse_sections(); self._parse_mania_blocks()
-            return
-
-        # Preserve case/order of existing keys; update or append
-        preserve_names = {k.lower(): k for (k, _) in blk.kv_pairs}
-        current = {k: v for (k, v) in blk.kv_pairs}
+        return norm
+
+    def mania_set_values(self, keys: int, updates: Dict[str, Any]) -> int:
+        """更新 / 新建 K 键的 [Mania] 段；返回实际改动的行数。"""
+        norm = self._normalize(updates)
+        doc = self._editable()
+        sec = self._mania.get(keys)
+        if sec is None:
+            sec = doc.append_section("Mania", [("Keys", str(keys))] + list(norm.items()))
+            self._mania[keys] = sec
+            return len(norm) + 1
+        changed = 0
         for k, v in norm.items():
-            key_pres = preserve_names.get(k.lower(), k)
-            current[key_pres] = v
-            preserve_names[k.lower()] = key_pres
-
-        new_block_lines: List[str] = []
-        seen = set()
-        ordered_keys = [k for (k, _) in blk.kv_pairs]
-        for k in current.keys():
-            if k not in ordered_keys:
-                ordered_keys.append(k)
-
-        for i in range(blk.start_idx + 1, blk.end_idx):
-            line = self.lines[i]
-            if COMMENT_RE.match(line) or not line.strip() or SECTION_RE.match(line):
-                new_block_lines.append(line); continue
-            m = KV_RE.match(line)
-            if not m:
-                new_block_lines.append(line); continue
-            k = m.group(1).strip()
-            if k.lower() == "keys":
-                new_block_lines.append(f"Keys: {keys}"); seen.add("Keys")
-            elif k in current:
-                new_block_lines.append(f"{k}: {current[k]}"); seen.add(k)
-            else:
-                new_block_lines.append(line)
-
-        for k in ordered_keys:
-            if k in seen: continue
-            new_block_lines.append(f"{k}: {current[k]}")
-
-        self.lines[blk.start_idx + 1 : blk.end_idx] = new_block_lines
-        self._parse_sections(); self._parse_mania_blocks()
+            changed += doc.set_value(sec, k, v)
+        return changed
+
+    def mania_set_many(self, updates_by_keys: Dict[int, Dict[str, Any]]) -> int:
+        """一次改多个 K（例如 1K..18K 统一列宽），在同一个事务里完成。"""
+        with self.transaction():
+            return sum(self.mania_set_values(k, upd) for k, upd in updates_by_keys.items())
+
+    @contextmanager
+    def transaction(self):
+        """with ini.transaction(): ...  —— 块内抛异常时文档恢复到进入前的状态。"""
+        doc = self._editable()
+        snapshot = doc.copy()
+        try:
+            yield self
+        except BaseException:
+            self.doc = snapshot; self._index_mania()
+            raise
 
     def save(self, create_backup: bool = True) -> None:
         p = Path(self.path)
+        # 换行风格 / BOM / 末尾换行沿用原文件，没改动的行逐字节不变
+        data = self.doc.to_bytes()
         if create_backup:
             bak = p.with_suffix(p.suffix + ".bak")
             if not bak.exists():
-                try: bak.write_text("\n".join(self.lines), encoding="utf-8")
+                try: bak.write_bytes(p.read_bytes() if p.exists() else data)
                 except Exception: pass
-        p.write_text("\n".join(self.lines), encoding="utf-8")
+        p.write_bytes(data)
+        # 写出去的文档进缓存，之后就是共享的了；再编辑会先复制
+        store_ini(p, self.doc)
+        self._shared = True
 
 
 def parse_list_csv(s: str) -> List[int]:
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+osu! Skins 目录的皮肤库：后台索引每个皮肤 + 磁盘缩略图缓存。
+- 缩略图是两格拼图：左格按 Combo1 着色的 hitcircle + hitcircleoverlay + 数字 1，右格 cursor；
+  PNG 存在用户缓存目录 thumbs/ 下，文件名取皮肤路径的哈希。
+- 失效按签名：skin.ini 和参与拼图的几个候选文件（name@2x.png / name.png）的 (size, mtime_ns)。
+  只 stat 这十来个文件，不列皮肤目录；签名没变就直接用上次的缩略图和显示名。
+- 库索引每个 Skins 目录一份 JSON（library/），记签名、显示名（[General] Name）和作者。
+- 需要重画的缩略图在进程池里生成（Pillow 解码 + 缩放吃 CPU），数量少时就地生成；
+  index_library 的 emit 分批交付已就绪的条目，界面可以边索引边显示。
+
+    entries = index_library(skins_dir, progress, cancel, emit)
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib, json, multiprocessing, os
+
+from core.user_cache import cache_dir, path_key
+
+ProgressFn = Optional[Callable[[int, int, str], None]]
+CancelFn = Optional[Callable[[], bool]]
+EmitFn = Optional[Callable[[List["LibraryEntry"]], None]]
+
+LIBRARY_VERSION = 1
+THUMB_CELL = 64          # 单格边长（px），缩略图为 2 格宽
+INLINE_MAX = 3
+EMIT_BATCH = 16
+# 拼图用到的素材：角色 -> 按优先级的候选名
+THUMB_SOURCES = (
+    ("circle", ("hitcircle",)),
+    ("overlay", ("hitcircleoverlay",)),
+    ("number", ("default-1",)),
+    ("cursor", ("cursor",)),
+)
+
+
+@dataclass
+class LibraryEntry:
+    root: Path
+    name: str                   # 显示名：skin.ini 的 Name，没有就用目录名
+    author: str = ""
+    thumb: Optional[Path] = None
+    sig: str = ""
+
+    @property
+    def folder(self) -> str:
+        return self.root.name
+
+
+def thumb_path(root: Path) -> Path:
+    return cache_dir("thumbs") / f"{path_key(root)}.png"
+
+
+def _index_path(skins_dir: Path) -> Path:
+    return cache_dir("library") / f"{path_key(skins_dir)}.json"
+
+
+def list_skin_dirs(skins_dir: Path) -> List[Path]:
+    """Skins/ 下的每个子目录（跳过隐藏目录），按名字排序。"""
+    out = []
+    try:
+        with os.scandir(skins_dir) as it:
+            for de in it:
+                if de.name.startswith("."): continue
+                try:
+                    if de.is_dir(): out.append(Path(de.path))
+                except OSError:
+                    continue
+    except OSError:
+        return []
+    out.sort(key=lambda p: p.name.lower())
+    return out
+
+
+def _stat(p: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(p)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+
+def thumb_sources(root: Path) -> Tuple[str, Dict[str, Tuple[str, int]]]:
+    """(签名, 角色 -> (文件名, 缩放))。@2x 优先，与 SkinLoader 的选择一致。"""
+    parts = [f"v{LIBRARY_VERSION}", f"cell{THUMB_CELL}", f"ini:{_stat(root / 'skin.ini')}"]
+    sources: Dict[str, Tuple[str, int]] = {}
+    for role, names in THUMB_SOURCES:
+        for n in names:
+            for fn, scale in ((f"{n}@2x.png", 2), (f"{n}.png", 1)):
+                st = _stat(root / fn)
+                if st is None: continue
+                parts.append(f"{fn}:{st}")
+                if role not in sources: sources[role] = (fn, scale)
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=12).hexdigest(), sources
+
+
+def _ini_info(root: Path) -> Tuple[str, str, Tuple[int, int, int]]:
+    """(Name, Author, Combo1)；读不到就是空串和白色。"""
+    from core.ini_doc import IniDocument
+    name = author = ""; combo = (255, 255, 255)
+    try:
+        doc = IniDocument.from_bytes((root / "skin.ini").read_bytes())
+    except (OSError, ValueError):
+        return name, author, combo
+    for sec in doc.sections_list():
+        low = sec.lower()
+        if low == "general":
+            name = name or (doc.get(sec, "Name", "") or "").strip()
+            author = author or (doc.get(sec, "Author", "") or "").strip()
+        elif low in ("colours", "colors"):
+            parts = [p.strip() for p in str(doc.get(sec, "Combo1", "") or "").split(",")]
+            try:
+                vals = [max(0, min(255, int(p))) for p in parts[:3]]
+                if len(vals) == 3: combo = tuple(vals)
+            except ValueError:
+                pass
+    return name, author, combo
+
+
+def _fit(im, box: int, scale: float):
+    """按 SD 尺寸（@2x 先减半）看待，再整体缩到 box 以内；不放大。"""
+    from PIL import Image
+    w, h = im.width * scale, im.height * scale
+    k = min(1.0, box / max(1.0, w, h))
+    size = (max(1, round(w * k)), max(1, round(h * k)))
+    return im.resize(size, Image.LANCZOS) if size != im.size else im
+
+
+def render_thumbnail(root: str, sources: Dict[str, Tuple[str, int]], out: str) -> Tuple[str, str, str]:
+    """工作进程入口：画缩略图写到 out（临时文件 + os.replace）。返回 (显示名, 作者, 错误)。"""
+    from PIL import Image, ImageChops
+    rootp = Path(root)
+    name, author, combo = _ini_info(rootp)
+    if not sources:
+        return name, author, ""
+    try:
+        cell = THUMB_CELL
+        canvas = Image.new("RGBA", (cell * 2, cell), (0, 0, 0, 0))
+
+        def load(role):
+            fn = sources.get(role)
+            if not fn: return None, 1.0
+            with Image.open(rootp / fn[0]) as im:
+                return im.convert("RGBA"), (0.5 if fn[1] == 2 else 1.0)
+
+        circle, cs = load("circle")
+        # 圆圈、overlay、数字共用同一个缩放，保持它们之间的相对大小
+        ref, rs = (circle, cs) if circle is not None else load("overlay")
+        if ref is not None:
+            refw = max(ref.width, ref.height) * rs
+            k = min(1.0, (cell - 4) / max(1.0, refw))
+            for role in ("circle", "overlay", "number"):
+                im, s = (circle, cs) if role == "circle" else load(role)
+                if im is None: continue
+                size = (max(1, round(im.width * s * k)), max(1, round(im.height * s * k)))
+                im = im.resize(size, Image.LANCZOS)
+                if role == "circle":
+                    im = ImageChops.multiply(im, Image.new("RGBA", im.size, (*combo, 255)))
+                canvas.alpha_composite(im, ((cell - im.width) // 2, (cell - im.height) // 2))
+        cursor, cus = load("cursor")
+        if cursor is not None:
+            im = _fit(cursor, cell - 4, cus)
+            canvas.alpha_composite(im, (cell + (cell - im.width) // 2, (cell - im.height) // 2))
+        outp = Path(out)
+        tmp = outp.with_name(f".{outp.name}.{os.getpid()}.part")
+        try:
+            canvas.save(tmp, format="PNG", optimize=True)
+            os.replace(tmp, outp)
+        finally:
+            if tmp.exists(): tmp.unlink()
+        return name, author, ""
+    except Exception as e:
+        return name, author, f"{type(e).__name__}: {e}"
+
+
+def _load_index(skins_dir: Path) -> Dict[str, dict]:
+    try:
+        data = json.loads(_index_path(skins_dir).read_text(encoding="utf-8"))
+        if data.get("version") == LIBRARY_VERSION:
+            return dict(data.get("skins", {}))
+    except Exception:
+        pass
+    return {}
+
+
+def _save_index(skins_dir: Path, skins: Dict[str, dict]) -> None:
+    p = _index_path(skins_dir)
+    tmp = p.with_suffix(".tmp")
+    try:
+        tmp.write_text(json.dumps({"version": LIBRARY_VERSION, "root": str(skins_dir), "skins": skins},
+                                  ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, p)
+    except OSError:
+        pass
+
+
+def index_library(skins_dir: Path, progress: ProgressFn = None, cancel: CancelFn = None,
+                  emit: EmitFn = None, workers: int = 0) -> List[LibraryEntry]:
+    """索引 Skins 目录。签名没变的条目先整批交付，需要重画缩略图的画完一批交付一批。
+    返回全部条目（按目录名排序）；取消时返回已就绪的部分。"""
+    skins_dir = Path(skins_dir)
+    dirs = list_skin_dirs(skins_dir)
+    old = _load_index(skins_dir)
+    known: Dict[str, dict] = {}
+    ready: Dict[str, LibraryEntry] = {}
+    jobs: List[Tuple[Path, str, Dict[str, Tuple[str, int]]]] = []
+    for d in dirs:
+        if cancel and cancel(): break
+        sig, sources = thumb_sources(d)
+        rec = old.get(d.name)
+        thumb = thumb_path(d)
+        if rec and rec.get("sig") == sig and (not sources or thumb.exists()):
+            known[d.name] = rec
+            ready[d.name] = LibraryEntry(d, rec.get("name") or d.name, rec.get("author", ""),
+                                         thumb if sources else None, sig)
+        else:
+            jobs.append((d, sig, sources))
+    total = len(dirs); done = len(ready)
+    if progress: progress(done, total, "")
+    if emit and ready: emit(list(ready.values()))
+
+    batch: List[LibraryEntry] = []
+
+    def finish(job, res):
+        nonlocal done
+        d, sig, sources = job
+        name, author, err = res
+        ok = bool(sources) and not err
+        ent = LibraryEntry(d, name or d.name, author, thumb_path(d) if ok else None, sig)
+        ready[d.name] = ent
+        known[d.name] = {"sig": sig, "name": ent.name, "author": author}
+        done += 1
+        if progress: progress(done, total, d.name)
+        batch.append(ent)
+        if emit and len(batch) >= EMIT_BATCH:
+            emit(list(batch)); batch.clear()
+
+    def args(job):
+        d, _sig, sources = job
+        return str(d), sources, str(thumb_path(d))
+
+    if len(jobs) <= INLINE_MAX or workers == 1:
+        for job in jobs:
+            if cancel and cancel(): break
+            finish(job, render_thumbnail(*args(job)))
+    elif jobs:
+        n = workers or max(1, min(8, os.cpu_count() or 1, len(jobs)))
+        with ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn")) as ex:
+            futs = {ex.submit(render_thumbnail, *args(job)): job for job in jobs}
+            for fut in as_completed(futs):
+                try:
+                    finish(futs[fut], fut.result())
+                except Exception as e:  # 工作进程崩了
+                    finish(futs[fut], ("", "", f"{type(e).__name__}: {e}"))
+                if cancel and cancel():
+                    for f in futs: f.cancel()
+                    break
+    if emit and batch: emit(list(batch))
+    # 已删除的皮肤从索引里去掉；取消时保留旧记录，下次接着用
+    if not (cancel and cancel()):
+        _save_index(skins_dir, known)
+    else:
+        _save_index(skins_dir, {**old, **known})
+    return [ready[d.name] for d in dirs if d.name in ready]
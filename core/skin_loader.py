@@ -2,17 +2,27 @@
 # -*- coding: utf-8 -*-
 """
 SkinLoader (robust INI):
+- skin.ini goes through the shared single-pass tokenizer in core.ini_doc (no ConfigParser).
 - Tolerates non-INI lines (//, ►/▶ bullets, plain headings) by filtering them out.
 - Allows duplicate [Mania] sections by renaming to [Mania#2], [Mania#3]...
 - Collects all [Mania*] blocks into skin.mania_variants: keys(int) -> kv dict.
 - Picks default preview keys (4 or 7 if available, else first).
+- Asset discovery goes through core.skin_index (persistent mtime/size index):
+  an unchanged skin folder is not listed or stat'ed file-by-file again.
+- When an @2x asset also has an up-to-date SD file (mtime >= @2x), the SD path is kept
+  as SkinAsset.sd_path so previews can load native-resolution pixels without rescaling.
+  The pair is stat'ed on every load (an in-place edit does not always touch the directory mtime).
+- load() may run on a worker thread (see MainWindow.load_skin): the loader's state is guarded by
+  a lock, and a cancel callback is checked between stages (raises LoadCancelled).
 """
+from collections import OrderedDict
 from dataclasses import dataclass
-from configparser import ConfigParser
 from pathlib import Path
-from typing import Dict, Tuple, List
-from io import StringIO
-import re
+from typing import Callable, Dict, Optional, Tuple, List, Set
+import threading
+
+from core.ini_doc import IniView, load_ini
+from core.skin_index import SkinIndex, asset_name
 
 KNOWN_ASSETS = [
     "cursor", "cursortrail",
@@ -23,80 +33,130 @@ KNOWN_ASSETS = [
     "mania-key1", "mania-key1D", "mania-key1L",
 ]
 
+# SkinLoader 在内存里保留多少个皮肤的目录索引
+INDEX_CACHE_MAX = 8
+
+class LoadCancelled(Exception):
+    """有更新的加载请求，这一次不用再做完。"""
+
 @dataclass
 class SkinAsset:
     name: str
     path: Path
     scale: int  # 1 or 2
+    sd_path: Optional[Path] = None  # @2x 素材对应的、不比它旧的 SD 文件
+
+    def preview_source(self) -> Tuple[Path, float]:
+        """预览按 SD 尺寸画：有现成的 SD 就原样读，否则把 @2x 缩一半。"""
+        if self.sd_path is not None:
+            return self.sd_path, 1.0
+        return self.path, (0.5 if self.scale == 2 else 1.0)
 
 @dataclass
 class Skin:
     root: Path
-    ini: ConfigParser
+    ini: IniView
     assets: Dict[str, SkinAsset]
     mode_keys: int = 4
     mania_variants: Dict[int, Dict[str, str]] = None
 
-def _read_ini_robust(path: Path) -> ConfigParser:
-    # decode bytes with utf-8-sig first, fallback several encodings
-    raw = path.read_bytes()
-    text = None
-    for enc in ("utf-8-sig", "utf-16", "utf-16-le", "utf-16-be", "gbk", "cp936", "cp1252"):
-        try:
-            text = raw.decode(enc)
-            break
-        except Exception:
-            continue
-    if text is None:
-        text = raw.decode("utf-8", errors="ignore")
-
-    sec_re = re.compile(r'^\s*\[(.+?)\]\s*$')
-    comment_prefixes = ('#',';','//','►','▶','•','★','※')
-    dup_count: Dict[str,int] = {}
-    out_lines: List[str] = []
-
-    for raw_line in text.splitlines():
-        s = raw_line.strip()
-        if not s:
-            out_lines.append('')
-            continue
-        m = sec_re.match(s)
-        if m:
-            name = m.group(1).strip()
-            dup_count[name] = dup_count.get(name, 0) + 1
-            if dup_count[name] > 1:
-                out_lines.append(f'[{name}#{dup_count[name]}]')
-            else:
-                out_lines.append(f'[{name}]')
-            continue
-        # skip comment-like or heading lines
-        if any(s.startswith(p) for p in comment_prefixes):
-            continue
-        # also drop pure decoration separators like ======= or ----
-        if re.fullmatch(r'[=\-_.~`|/*\\]{3,}', s):
-            continue
-        # strip inline // comments
-        if '//' in s:
-            s = s.split('//', 1)[0].rstrip()
-            if not s:
-                continue
-        # accept only key-like lines: Key: val  /  Key=val
-        if re.match(r'^[A-Za-z0-9_][A-Za-z0-9_ ]*\s*[:=]', s):
-            out_lines.append(s)
-        # else drop silently
-
-    cfg = ConfigParser(strict=False)  # allow duplicate keys within section
-    cfg.optionxform = str
-    cfg.read_file(StringIO('\n'.join(out_lines)))
-    return cfg
+def _sd_if_fresh(hd: Path, sd: Path) -> Optional[Path]:
+    """SD 不比 @2x 旧时返回 sd。直接 stat 两个文件：原地改写文件不一定改变目录 mtime，索引里的 mtime 可能是旧的。"""
+    try:
+        return sd if sd.stat().st_mtime_ns >= hd.stat().st_mtime_ns else None
+    except OSError:
+        return None
+
+def _read_ini_robust(path: Path) -> IniView:
+    # 单遍分词 + (path, mtime, size) 缓存，见 core/ini_doc.py
+    return IniView(load_ini(path))
 
 class SkinLoader:
-    def load(self, directory: str) -> Skin:
-        root = Path(directory)
-        ini_path = root / "skin.ini"
-        if not ini_path.exists():
-            raise FileNotFoundError("skin.ini not found in selected folder")
+    def __init__(self, use_index: bool = True):
+        self.use_index = use_index
+        # root -> (index, assets from last load)；同一会话内 reload 直接复用。
+        # 皮肤库会预加载相邻皮肤，按 LRU 只留最近用过的 INDEX_CACHE_MAX 个（被挤掉的下次从磁盘索引重建）
+        self._indexes: "OrderedDict[str, Tuple[SkinIndex, Dict[str, SkinAsset]]]" = OrderedDict()
+        self.last_changed: set = set()  # 上次 load 发现变化的文件名
+        # 后台加载与 GUI 线程的热重载共用索引，串行化
+        self._lock = threading.RLock()
+
+    def _index_for(self, root: Path) -> Tuple[SkinIndex, Dict[str, SkinAsset]]:
+        key = str(root)
+        if key not in self._indexes:
+            self._indexes[key] = (SkinIndex.open(root), {})
+            while len(self._indexes) > INDEX_CACHE_MAX:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(key)
+        return self._indexes[key]
+
+    def discover_assets(self, root: Path, force: bool = False) -> Dict[str, SkinAsset]:
+        """@2x 优先的素材发现；目录未变化时原样复用上次的 SkinAsset。"""
+        if not self.use_index:
+            return self._discover_uncached(root)
+        index, prev = self._index_for(root)
+        rescanned = index.refresh(force=force)
+        self.last_changed = set(index.changed)
+        if not rescanned and prev:
+            # 目录没变也要重新比较 @2x / SD 的新旧：只改了 name@2x.png 时要回到用 @2x
+            for name, a in list(prev.items()):
+                if a.scale != 2: continue
+                f1 = index.lookup(f"{name}.png")
+                sd = _sd_if_fresh(a.path, root / f1) if f1 else None
+                if sd != a.sd_path:
+                    prev[name] = SkinAsset(name, a.path, 2, sd)
+            return dict(prev)
+
+        assets: Dict[str, SkinAsset] = {}
+        def take(name: str, filename: str, scale: int):
+            old = prev.get(name)
+            p = root / filename
+            sd = None
+            if scale == 2:
+                f1 = index.lookup(f"{name}.png")
+                if f1: sd = _sd_if_fresh(p, root / f1)
+            if old is not None and old.path == p and old.scale == scale and old.sd_path == sd:
+                assets[name] = old
+            else:
+                assets[name] = SkinAsset(name, p, scale, sd)
+
+        def pick(name: str):
+            f2 = index.lookup(f"{name}@2x.png")
+            f1 = index.lookup(f"{name}.png")
+            if f2: take(name, f2, 2)
+            elif f1: take(name, f1, 1)
+
+        for n in KNOWN_ASSETS:
+            pick(n)
+        for fn in sorted(index.files):
+            nm, scale = asset_name(fn)
+            if nm in assets: continue
+            if scale == 1 and index.lookup(f"{nm}@2x.png"):
+                continue  # 让 @2x 版本接管
+            take(nm, fn, scale)
+        self._indexes[str(root)] = (index, assets)
+        return dict(assets)
+
+    def _discover_uncached(self, root: Path) -> Dict[str, SkinAsset]:
+        assets: Dict[str, SkinAsset] = {}
+        def pick(name: str):
+            p2 = root / f"{name}@2x.png"
+            p1 = root / f"{name}.png"
+            if p2.exists():
+                sd = p1 if p1.exists() and p1.stat().st_mtime_ns >= p2.stat().st_mtime_ns else None
+                assets[name] = SkinAsset(name, p2, 2, sd)
+            elif p1.exists():
+                assets[name] = SkinAsset(name, p1, 1)
 
+        for n in KNOWN_ASSETS:
+            pick(n)
+        for p in root.glob("*.png"):
+            nm = p.stem.replace("@2x", "")
+            if nm not in assets:
+                assets[nm] = SkinAsset(nm, p, 2 if "@2x" in p.stem else 1)
+        return assets
+
+    def _parse_ini(self, ini_path: Path) -> Tuple[IniView, Dict[int, Dict[str, str]], int]:
         ini = _read_ini_robust(ini_path)
 
         # collect mania variants and decide default keys
@@ -119,22 +179,47 @@ class SkinLoader:
                         default_keys = k
         if default_keys is None:
             default_keys = 4
+        return ini, variants, default_keys
 
-        # assets discovery with @2x priority
-        assets: Dict[str, SkinAsset] = {}
-        def pick(name: str):
-            p2 = root / f"{name}@2x.png"
-            p1 = root / f"{name}.png"
-            if p2.exists():
-                assets[name] = SkinAsset(name, p2, 2)
-            elif p1.exists():
-                assets[name] = SkinAsset(name, p1, 1)
+    def load(self, directory: str, cancel: Optional[Callable[[], bool]] = None) -> Skin:
+        root = Path(directory)
+        ini_path = root / "skin.ini"
+        if not ini_path.exists():
+            raise FileNotFoundError("skin.ini not found in selected folder")
 
-        for n in KNOWN_ASSETS:
-            pick(n)
-        for p in root.glob("*.png"):
-            nm = p.stem.replace("@2x", "")
-            if nm not in assets:
-                assets[nm] = SkinAsset(nm, p, 2 if "@2x" in p.stem else 1)
+        def check():
+            if cancel and cancel(): raise LoadCancelled()
+
+        with self._lock:
+            check()
+            ini, variants, default_keys = self._parse_ini(ini_path)
+            check()
+            # assets discovery with @2x priority
+            assets = self.discover_assets(root)
+            check()
 
         return Skin(root=root, ini=ini, assets=assets, mode_keys=default_keys, mania_variants=variants)
+
+    # ---------- partial reload (hot reload) ----------
+    def reload_ini(self, skin: Skin) -> None:
+        """只重新解析 skin.ini，素材不动。"""
+        ini_path = Path(skin.root) / "skin.ini"
+        if not ini_path.exists(): return
+        with self._lock:
+            skin.ini, skin.mania_variants, skin.mode_keys = self._parse_ini(ini_path)
+
+    def refresh_assets(self, skin: Skin, touched=()) -> Set[str]:
+        """重扫目录并就地更新 skin.assets；返回受影响的素材名（新增/删除/修改）。
+        touched: 监视器报告的文件名（同尺寸同 mtime 的覆盖写也算进来）。"""
+        root = Path(skin.root)
+        before = skin.assets
+        with self._lock:
+            after = self.discover_assets(root, force=True)
+            changed = {asset_name(fn)[0] for fn in self.last_changed}
+        changed |= {asset_name(fn)[0] for fn in touched if fn.lower().endswith(".png")}
+        changed |= {n for n in before.keys() ^ after.keys()}
+        changed |= {n for n in before.keys() & after.keys()
+                    if (before[n].path, before[n].scale, before[n].sd_path)
+                    != (after[n].path, after[n].scale, after[n].sd_path)}
+        skin.assets = after
+        return changed
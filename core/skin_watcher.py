@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+皮肤目录热重载监视器。
+- 有 watchdog 就用 watchdog（能拿到具体改了哪个文件）；没有就退回 QFileSystemWatcher。
+- 一批连续事件（图像编辑器一次保存好几个文件）会被合并：最后一个事件后 DEBOUNCE_MS 才发一次信号。
+- 只关心皮肤根目录下的 .png 和 skin.ini，其它文件（快照、.bak、音频）忽略。
+- watchdog 在第一次 watch() 时才导入（要几十毫秒），不算进冷启动。
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, Optional, Set
+import os, time
+
+from PySide6.QtCore import QObject, QTimer, Signal, QFileSystemWatcher
+
+# None = 还没试过；False = 没装；否则 (Observer, handler 类)
+_WATCHDOG = None
+
+DEBOUNCE_MS = 40
+# QFileSystemWatcher 只告诉我们“目录变了”，用这个占位
+DIR_CHANGED = "<dir>"
+
+
+def _interesting(name: str) -> bool:
+    low = name.lower()
+    return low.endswith(".png") or low == "skin.ini"
+
+
+def _load_watchdog():
+    global _WATCHDOG
+    if _WATCHDOG is None:
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except Exception:
+            _WATCHDOG = False
+        else:
+            _WATCHDOG = (Observer, type("_Handler", (_HandlerMixin, FileSystemEventHandler), {}))
+    return _WATCHDOG or None
+
+
+class _HandlerMixin:
+    def __init__(self, emit):
+        super().__init__()
+        self._emit = emit
+
+    def on_any_event(self, event):
+        if getattr(event, "is_directory", False):
+            return
+        for attr in ("src_path", "dest_path"):
+            p = getattr(event, attr, None)
+            if p:
+                name = os.path.basename(os.fsdecode(p))
+                if _interesting(name):
+                    try:
+                        self._emit(name)
+                    except RuntimeError:  # SkinWatcher 已随窗口销毁，observer 线程还没停
+                        return
+
+
+class SkinWatcher(QObject):
+    """files_changed(names, ini_changed, t_first_event)
+
+    names: 变化的 .png 文件名集合（QFileSystemWatcher 模式下可能含 DIR_CHANGED，需要调用方重扫）。
+    t_first_event: 这一批里第一个事件的 time.perf_counter()，用来量“保存 -> 重绘”的延迟。
+    """
+    files_changed = Signal(object, bool, float)
+    _raw = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root: Optional[Path] = None
+        self._pending: Set[str] = set()
+        self._t_first: Optional[float] = None
+        self._observer = None
+        self._qfsw: Optional[QFileSystemWatcher] = None
+        self._paused = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self._flush)
+        # watchdog 回调在它自己的线程里；走信号排队回到 GUI 线程
+        self._raw.connect(self._on_raw)
+
+    @property
+    def backend(self) -> str:
+        if self._observer is not None: return "watchdog"
+        if self._qfsw is not None: return "qt"
+        return ""
+
+    # ---------- public ----------
+    def watch(self, root, extra_files: Iterable[Path] = ()) -> None:
+        self.stop()
+        self.root = Path(root)
+        wd = _load_watchdog()
+        if wd is not None:
+            Observer, Handler = wd
+            try:
+                obs = Observer()
+                obs.schedule(Handler(self._raw.emit), str(self.root), recursive=False)
+                obs.daemon = True
+                obs.start()
+                self._observer = obs
+                return
+            except Exception:
+                self._observer = None
+        self._qfsw = QFileSystemWatcher(self)
+        self._qfsw.addPath(str(self.root))
+        self.add_files(extra_files)
+        self._qfsw.directoryChanged.connect(lambda _p: self._on_raw(DIR_CHANGED))
+        self._qfsw.fileChanged.connect(self._on_qt_file_changed)
+
+    def add_files(self, files: Iterable[Path]) -> None:
+        """QFileSystemWatcher 模式下，覆盖写入已有文件不会触发 directoryChanged，需要逐个盯住。"""
+        if self._qfsw is None: return
+        paths = [str(p) for p in files if Path(p).exists()]
+        ini = self.root / "skin.ini" if self.root else None
+        if ini and ini.exists(): paths.append(str(ini))
+        have = set(self._qfsw.files())
+        paths = [p for p in paths if p not in have]
+        if paths: self._qfsw.addPaths(paths)
+
+    def stop(self) -> None:
+        self._timer.stop(); self._pending.clear(); self._t_first = None
+        if self._observer is not None:
+            try:
+                self._observer.stop(); self._observer.join(timeout=1.0)
+            except Exception:
+                pass
+            self._observer = None
+        if self._qfsw is not None:
+            self._qfsw.deleteLater(); self._qfsw = None
+        self.root = None
+
+    def set_paused(self, paused: bool) -> None:
+        self._paused = bool(paused)
+        if paused:
+            self._timer.stop(); self._pending.clear(); self._t_first = None
+
+    # ---------- internals ----------
+    def _on_qt_file_changed(self, path: str):
+        # 很多编辑器是“写临时文件再 rename”，旧 inode 会从监视列表里掉出去，这里补回来
+        if self._qfsw is not None and Path(path).exists() and path not in self._qfsw.files():
+            self._qfsw.addPath(path)
+        self._on_raw(os.path.basename(path))
+
+    def _on_raw(self, name: str):
+        if self._paused or self.root is None: return
+        if self._t_first is None:
+            self._t_first = time.perf_counter()
+        self._pending.add(name)
+        self._timer.start()  # 重新计时：合并一批事件
+
+    def _flush(self):
+        names, self._pending = self._pending, set()
+        t0, self._t_first = self._t_first, None
+        if not names: return
+        ini_changed = any(n.lower() == "skin.ini" for n in names)
+        pngs = {n for n in names if n.lower() != "skin.ini"}
+        self.files_changed.emit(pngs, ini_changed, t0 or time.perf_counter())
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+滑条曲线：把 .osu 的曲线描述（B / P / L / C + 控制点 + 像素长度）展开成折线，给预览画滑条身体和滑条球。
+- NumPy 批量求值：同阶、同采样数的 Bezier 段堆成 (段数, 阶+1, 2) 的数组，和预先算好的 Bernstein 矩阵
+  做一次 matmul；完美圆弧同样成组求值。只有一段的滑条（绝大多数）也成组按像素长度截断 / 沿末端方向延长。
+- 形状按 (类型, 相对滑条头的控制点, 长度) 缓存：同一形状出现在谱面的不同位置只算一次，光栅缓存也用这个 key。
+- C（Catmull）按折线处理；没有 NumPy 时所有曲线都退回控制点折线，只影响外观。
+
+    attach_shapes(chart)               # 谱面载入时（后台线程）一次性展开全部滑条
+    shape = chart.shapes[i]; x, y = shape.at(distance)
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from math import atan2, comb, hypot
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+
+# NumPy 第一次展开滑条时才导入：本模块在启动路径上（StdPreview），别让 NumPy 拖慢首帧
+np = None  # type: ignore
+_HAS_NUMPY: Optional[bool] = None
+
+
+def _numpy() -> bool:
+    global np, _HAS_NUMPY
+    if _HAS_NUMPY is None:
+        try:
+            import numpy
+            np = numpy; _HAS_NUMPY = True
+        except Exception:
+            _HAS_NUMPY = False
+    return _HAS_NUMPY
+
+# (类型, 相对控制点, 像素长度)；控制点含滑条头 (0, 0)
+ShapeKey = Tuple[str, Tuple[Tuple[float, float], ...], float]
+
+SAMPLE_PX = 3.0                 # Bezier / 圆弧大约每隔多少 osu! 像素取一个点
+SAMPLE_BUCKETS = (8, 16, 32, 64, 128, 256)
+MAX_BEZIER_DEGREE = 500         # 更高阶的段（极少见）直接当折线
+SHAPE_CACHE_MAX = 50000
+
+_cache: "OrderedDict[ShapeKey, SliderShape]" = OrderedDict()
+_lock = threading.Lock()        # 谱面在后台线程展开，预览在 GUI 线程取
+
+
+@dataclass
+class SliderShape:
+    points: list                # (N, 2)，相对滑条头，osu! 像素；有 NumPy 时是 ndarray
+    cum: list                   # (N,) 累积长度
+    length: float
+
+    def at(self, d: float) -> Tuple[float, float]:
+        """沿路径距离 d 处的点（相对滑条头）。"""
+        d = max(0.0, min(self.length, d))
+        if _numpy():
+            return float(np.interp(d, self.cum, self.points[:, 0])), float(np.interp(d, self.cum, self.points[:, 1]))
+        for k in range(1, len(self.cum)):
+            if self.cum[k] >= d:
+                a, b = self.cum[k - 1], self.cum[k]
+                f = (d - a) / (b - a) if b > a else 0.0
+                (x0, y0), (x1, y1) = self.points[k - 1], self.points[k]
+                return x0 + (x1 - x0) * f, y0 + (y1 - y0) * f
+        return tuple(self.points[-1])
+
+    def end_angle(self, at_end: bool = True) -> float:
+        """端点处朝外的方向角（弧度）：at_end 为尾部沿前进方向，否则为头部沿后退方向。反向箭头指向它的反方向。"""
+        pts = [tuple(p) for p in self.points]
+        seq = pts[::-1] if at_end else pts
+        x0, y0 = seq[0]
+        for x1, y1 in seq[1:]:
+            if hypot(x0 - x1, y0 - y1) > 1e-3:
+                return atan2(y0 - y1, x0 - x1)
+        return 0.0
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        if _numpy():
+            lo, hi = self.points.min(axis=0), self.points.max(axis=0)
+            return float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1])
+        xs = [p[0] for p in self.points]; ys = [p[1] for p in self.points]
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+def shape_key(obj) -> Optional[ShapeKey]:
+    """HitObject（滑条）-> ShapeKey；曲线字段读不懂时返回 None。"""
+    try:
+        curve = obj.params[1]; length = float(obj.params[3])
+    except (IndexError, ValueError):
+        return None
+    parts = curve.split("|")
+    kind = parts[0].strip().upper()[:1] or "B"
+    pts = [(0.0, 0.0)]
+    for tok in parts[1:]:
+        x, _, y = tok.partition(":")
+        try:
+            pts.append((float(x) - obj.x, float(y) - obj.y))
+        except ValueError:
+            return None
+    if len(pts) < 2 or length <= 0:
+        return None
+    return kind, tuple(pts), round(length, 3)
+
+
+# ---------------- 求值 ----------------
+def _bucket(n: float) -> int:
+    for b in SAMPLE_BUCKETS:
+        if n <= b: return b
+    return SAMPLE_BUCKETS[-1]
+
+
+def _poly_len(pts) -> float:
+    return sum(hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(pts, pts[1:]))
+
+
+_bernstein: Dict[Tuple[int, int], "np.ndarray"] = {}
+
+
+def _bernstein_matrix(order: int, n: int):
+    """(n, order) 矩阵：第 i 行是 t_i 处各控制点的 Bernstein 权重。"""
+    m = _bernstein.get((order, n))
+    if m is None:
+        d = order - 1
+        t = np.linspace(0.0, 1.0, n)[:, None]
+        k = np.arange(order)[None, :]
+        coef = np.array([comb(d, j) for j in range(order)], dtype=float)[None, :]
+        m = coef * t ** k * (1.0 - t) ** (d - k)
+        _bernstein[(order, n)] = m
+    return m
+
+
+def _bezier_segments(pts) -> List[list]:
+    """相邻两个相同的控制点（红色锚点）把 Bezier 切成几段。"""
+    segs, cur = [], [pts[0]]
+    for p in pts[1:]:
+        if p == cur[-1]:
+            if len(cur) > 1: segs.append(cur)
+            cur = [p]
+        else:
+            cur.append(p)
+    if len(cur) > 1: segs.append(cur)
+    return segs
+
+
+def _circle(pts):
+    """三点定圆：(圆心, 半径, 起始角, 方向)；三点共线时 None。"""
+    (ax, ay), (bx, by), (cx, cy) = pts
+    d = 2.0 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < 1e-3: return None
+    a2, b2, c2 = ax * ax + ay * ay, bx * bx + by * by, cx * cx + cy * cy
+    ux = (a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d
+    uy = (a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d
+    r = hypot(ax - ux, ay - uy)
+    cross = (bx - ax) * (cy - by) - (by - ay) * (cx - bx)
+    return (ux, uy), r, atan2(ay - uy, ax - ux), (1.0 if cross > 0 else -1.0)
+
+
+def _fit(points, length: float) -> SliderShape:
+    """折线截断到 length；不够长时沿最后一段的方向延长（与游戏一致）。"""
+    pts = np.asarray(points, dtype=float)
+    seg = np.hypot(*np.diff(pts, axis=0).T)
+    cum = np.concatenate(([0.0], np.cumsum(seg)))
+    total = cum[-1]
+    if total >= length:
+        k = int(np.searchsorted(cum, length))
+        k = max(1, min(k, len(cum) - 1))
+        f = (length - cum[k - 1]) / (cum[k] - cum[k - 1]) if cum[k] > cum[k - 1] else 0.0
+        end = pts[k - 1] + (pts[k] - pts[k - 1]) * f
+        pts = np.vstack((pts[:k], end)); cum = np.concatenate((cum[:k], [length]))
+    else:
+        nz = np.flatnonzero(seg > 1e-6)
+        if nz.size:
+            j = nz[-1]
+            direction = (pts[j + 1] - pts[j]) / seg[j]
+            pts = np.vstack((pts, pts[-1] + direction * (length - total)))
+            cum = np.concatenate((cum, [length]))
+    return SliderShape(pts, cum, float(length))
+
+
+def _fit_py(points, length: float) -> SliderShape:
+    pts = [tuple(p) for p in points]; cum = [0.0]
+    out = [pts[0]]
+    for a, b in zip(pts, pts[1:]):
+        seg = hypot(b[0] - a[0], b[1] - a[1])
+        if cum[-1] + seg >= length and seg > 0:
+            f = (length - cum[-1]) / seg
+            out.append((a[0] + (b[0] - a[0]) * f, a[1] + (b[1] - a[1]) * f)); cum.append(length)
+            return SliderShape(out, cum, float(length))
+        out.append(b); cum.append(cum[-1] + seg)
+    return SliderShape(out, cum, float(cum[-1]))
+
+
+def tessellate(keys: Iterable[ShapeKey]) -> Dict[ShapeKey, SliderShape]:
+    """批量展开；已缓存的直接返回。"""
+    keys = list(dict.fromkeys(k for k in keys if k is not None))
+    out: Dict[ShapeKey, SliderShape] = {}
+    with _lock:
+        for k in keys:
+            s = _cache.get(k)
+            if s is not None:
+                _cache.move_to_end(k); out[k] = s
+    todo = [k for k in keys if k not in out]
+    if not todo: return out
+    if not _numpy():
+        fresh = {k: _fit_py(k[1], k[2]) for k in todo}
+    else:
+        fresh = _tessellate_np(todo)
+    with _lock:
+        for k, s in fresh.items():
+            _cache[k] = s
+        while len(_cache) > SHAPE_CACHE_MAX:
+            _cache.popitem(last=False)
+    out.update(fresh)
+    return out
+
+
+def _fit_batch(pts, length):
+    """_fit 的批量版：pts (S, n, 2)、length (S,)。不改变数组形状——截断点之后的采样都并到终点上，
+    末尾再加一列做延长，所以整组一次算完；返回 (S, n+1, 2) 的点和 (S, n+1) 的累积长度。"""
+    S, n, _ = pts.shape
+    d = np.diff(pts, axis=1)
+    seg = np.hypot(d[..., 0], d[..., 1])                                 # (S, n-1)
+    cum = np.concatenate((np.zeros((S, 1)), np.cumsum(seg, axis=1)), axis=1)
+    total = cum[:, -1]
+    L = length[:, None]
+    # 截断：第一个 cum >= L 的下标 k，终点在 (k-1, k) 之间插值
+    over = total >= length
+    k = np.clip(np.argmax(cum >= L, axis=1), 1, n - 1)
+    rows = np.arange(S)
+    c0, c1 = cum[rows, k - 1], cum[rows, k]
+    f = np.where(c1 > c0, (length - c0) / np.where(c1 > c0, c1 - c0, 1.0), 0.0)
+    end = pts[rows, k - 1] + (pts[rows, k] - pts[rows, k - 1]) * f[:, None]
+    # 延长：沿最后一段非零长度的方向
+    nz = seg > 1e-6
+    last = (n - 2) - np.argmax(nz[:, ::-1], axis=1)
+    dvec = d[rows, last] / np.where(seg[rows, last] > 0, seg[rows, last], 1.0)[:, None]
+    ext = pts[:, -1] + dvec * (length - total)[:, None]
+    tail = np.where(over[:, None], end, ext)
+    cut = over[:, None] & (np.arange(n)[None, :] >= k[:, None])
+    pts = np.where(cut[..., None], end[:, None, :], pts)
+    cum = np.where(cut, L, cum)
+    return np.concatenate((pts, tail[:, None, :]), axis=1), np.concatenate((cum, L), axis=1)
+
+
+def _tessellate_np(keys: List[ShapeKey]) -> Dict[ShapeKey, SliderShape]:
+    # 1) 拆成 Bezier 段 / 圆弧 / 折线，同阶同采样数的 Bezier 段归到一组，圆弧按采样数归组
+    bez_groups: Dict[Tuple[int, int], List[Tuple[int, int, list]]] = {}
+    arc_groups: Dict[int, List[Tuple[int, tuple]]] = {}
+    pieces: List[List] = [[] for _ in keys]     # 每条滑条的各段采样结果（按顺序）
+    for si, (kind, pts, length) in enumerate(keys):
+        if kind == "P" and len(pts) == 3:
+            c = _circle(pts)
+            if c is not None:
+                arc_groups.setdefault(_bucket(length / SAMPLE_PX), []).append((si, c))
+                pieces[si].append(None)
+                continue
+            kind = "L"
+        if kind in ("L", "C"):
+            pieces[si].append(np.asarray(pts, dtype=float)); continue
+        for seg in _bezier_segments(list(pts)):
+            if len(seg) == 2 or len(seg) > MAX_BEZIER_DEGREE + 1:
+                pieces[si].append(np.asarray(seg, dtype=float)); continue
+            pieces[si].append(None)
+            bez_groups.setdefault((len(seg), _bucket(_poly_len(seg) / SAMPLE_PX)), []).append((si, len(pieces[si]) - 1, seg))
+    out: Dict[ShapeKey, SliderShape] = {}
+    lengths = np.asarray([k[2] for k in keys], dtype=float)
+
+    def settle(sis, samples):
+        """整条滑条就是这一段的，成组截断 / 延长后直接出结果；其余的先记下，最后逐条拼接。"""
+        single = [j for j, si in enumerate(sis) if len(pieces[si]) == 1]
+        if single:
+            pts, cum = _fit_batch(samples[single], lengths[[sis[j] for j in single]])
+            for j, p, c in zip(single, pts, cum):
+                si = sis[j]; out[keys[si]] = SliderShape(p, c, float(lengths[si]))
+
+    # 2) 分组批量求值
+    for (order, n), items in bez_groups.items():
+        ctrl = np.asarray([seg for _, _, seg in items], dtype=float)          # (S, order, 2)
+        samples = np.matmul(_bernstein_matrix(order, n), ctrl)                # (S, n, 2)
+        for (si, pi, _), arr in zip(items, samples):
+            pieces[si][pi] = arr
+        settle([si for si, _, _ in items], samples)
+    for n, items in arc_groups.items():
+        centre = np.asarray([c[0] for _, c in items], dtype=float)           # (S, 2)
+        r, a0, sign = np.asarray([c[1:] for _, c in items], dtype=float).T
+        span = lengths[[si for si, _ in items]] / r
+        ang = a0[:, None] + (sign * span)[:, None] * np.linspace(0.0, 1.0, n)[None, :]   # (S, n)
+        xy = np.stack((centre[:, 0:1] + r[:, None] * np.cos(ang), centre[:, 1:2] + r[:, None] * np.sin(ang)), axis=-1)
+        settle([si for si, _ in items], xy)
+    # 3) 多段的逐条拼接、截断 / 延长
+    for si, k in enumerate(keys):
+        if k in out: continue
+        parts = pieces[si]
+        pts = np.concatenate([parts[0]] + [q[1:] for q in parts[1:]]) if len(parts) > 1 else parts[0]
+        out[k] = _fit(pts, k[2])
+    return out
+
+
+def attach_shapes(chart):
+    """给 StdChart 填上 shapes（与物件一一对应，非滑条为 None）；返回 chart，方便串在谱面载入的后台任务里。"""
+    from core.beatmap import TYPE_SLIDER
+    keys = [shape_key(o) if o.type & TYPE_SLIDER else None for o in chart.objects]
+    shapes = tessellate(keys)
+    chart.shape_keys = keys
+    chart.shapes = [shapes.get(k) if k is not None else None for k in keys]
+    return chart
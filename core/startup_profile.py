@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+启动耗时剖析（app.py --profile-startup）。
+- mark(label)：记录从进程起点（本模块被导入的时刻）到现在的毫秒数，按阶段列出。
+- 导入钩子：包装 builtins.__import__，记录每个模块第一次导入的总耗时和自身耗时（扣掉它再导入的子模块），
+  效果类似 python -X importtime，但打包后的 onefile 也能用。
+- report() 给出 JSON 可序列化的 dict；format_report() 给终端看。
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import builtins, sys, time
+
+_T0 = time.perf_counter()
+# 启动阶段不希望出现的重模块：出现在“首帧前已导入”列表里就说明有人提前拉进来了
+HEAVY_MODULES = ("PySide6.QtMultimedia", "PIL.Image", "numpy", "watchdog.observers",
+                 "ui.assets_manager", "ui.mania_ini_dock", "concurrent.futures.process")
+
+
+class StartupProfile:
+    def __init__(self):
+        self.t0 = _T0
+        self.marks: List[Tuple[str, float]] = []
+        self.imports: Dict[str, List[float]] = {}   # 模块 -> [总耗时 ms, 自身耗时 ms]
+        self._stack: List[List[float]] = []
+        self._orig_import = None
+
+    def now_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def mark(self, label: str) -> float:
+        ms = self.now_ms()
+        self.marks.append((label, ms))
+        return ms
+
+    # ---------- import hook ----------
+    def install_import_hook(self) -> None:
+        if self._orig_import is not None: return
+        orig = self._orig_import = builtins.__import__
+        modules = sys.modules
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in modules:
+                return orig(name, globals, locals, fromlist, level)
+            frame = [0.0]                 # 子模块累计耗时
+            self._stack.append(frame)
+            t = time.perf_counter()
+            try:
+                return orig(name, globals, locals, fromlist, level)
+            finally:
+                dt = (time.perf_counter() - t) * 1000.0
+                self._stack.pop()
+                if self._stack: self._stack[-1][0] += dt
+                if name not in self.imports:
+                    self.imports[name] = [dt, dt - frame[0]]
+
+        builtins.__import__ = timed_import
+
+    def remove_import_hook(self) -> None:
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    # ---------- report ----------
+    def report(self, top: int = 15) -> dict:
+        slow = sorted(self.imports.items(), key=lambda kv: -kv[1][0])[:top]
+        return {
+            "marks_ms": {k: round(v, 2) for k, v in self.marks},
+            "slowest_imports_ms": [{"module": m, "total": round(t, 2), "self": round(s, 2)} for m, (t, s) in slow],
+            "heavy_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+            "modules_loaded": len(sys.modules),
+        }
+
+    def format_report(self, top: int = 15) -> str:
+        rep = self.report(top)
+        lines = ["== startup profile =="]
+        prev = 0.0
+        for label, ms in self.marks:
+            lines.append(f"  {ms:9.1f} ms  (+{ms - prev:7.1f})  {label}")
+            prev = ms
+        lines.append(f"  modules loaded: {rep['modules_loaded']}")
+        lines.append("  heavy modules loaded: " + (", ".join(rep["heavy_loaded"]) or "none"))
+        if rep["slowest_imports_ms"]:
+            lines.append("  slowest imports (total / self ms):")
+            for e in rep["slowest_imports_ms"]:
+                lines.append(f"    {e['total']:8.1f} {e['self']:8.1f}  {e['module']}")
+        return "\n".join(lines)
+
+
+_PROFILE: Optional[StartupProfile] = None
+
+
+def profile() -> Optional[StartupProfile]:
+    """--profile-startup 打开时的全局实例；没开就是 None。"""
+    return _PROFILE
+
+
+def enable(hook_imports: bool = True) -> StartupProfile:
+    global _PROFILE
+    if _PROFILE is None:
+        _PROFILE = StartupProfile()
+        if hook_imports: _PROFILE.install_import_hook()
+    return _PROFILE
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""用户缓存目录（索引、缩略图、转码结果等可以随时删掉重建的东西）。"""
+from __future__ import annotations
+from pathlib import Path
+import hashlib, os, sys
+
+APP_DIR_NAME = "OsuSkinEditor"
+
+
+def cache_root() -> Path:
+    override = os.environ.get("OSU_SKIN_EDITOR_CACHE")
+    if override:
+        return Path(override)
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/AppData/Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(base) / APP_DIR_NAME
+
+
+def cache_dir(*parts: str) -> Path:
+    p = cache_root().joinpath(*parts)
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def path_key(p: Path) -> str:
+    """把一个目录映射成稳定的缓存文件名。"""
+    try: s = str(Path(p).resolve())
+    except Exception: s = str(p)
+    if sys.platform.startswith("win"):
+        s = s.lower()
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()[:20]
@@ -8,8 +8,8 @@ import sys, os
 from PySide6.QtWidgets import (
     QDialog, QTabWidget, QWidget,
     QVBoxLayout, QHBoxLayout,
-    QTableWidget, QTableWidgetItem,
-    QPushButton, QLabel, QFileDialog, QMessageBox, QSlider, QSizePolicy
+    QTableView, QAbstractItemView, QLineEdit,
+    QPushButton, QLabel, QFileDialog, QMessageBox, QSlider, QSizePolicy, QInputDialog
 )
 from PySide6.QtCore import Qt, QUrl, QSize
 from PySide6.QtGui import QPixmap
@@ -29,13 +29,46 @@ def resource_path(rel: str) -> str:
     base = getattr(sys, "_MEIPASS", Path(__file__).resolve().parent.parent)
     return str(Path(base) / rel)
 
+from ui.image_cache import image_cache
+from ui.widgets.asset_list import AssetTableModel, make_proxy, source_row
+from ui.workers import TaskThread, run_with_progress
+from core.image_batch import batch_replace, map_sources_to_targets
+from core.audio_queue import map_audio_targets, transcode_queue
 from core.assets_ops import (
-    list_images, list_audio,
+    walk_media, scan_media, IMAGE_EXTS_ANY,
     replace_image, replace_audio,
-    stem_conflicts, resolve_audio_conflicts,
+    resolve_audio_conflicts,
     IMAGE_EXTS, AUDIO_EXTS_ALLOWED, AUDIO_EXTS_COMMON,
 )
 
+# 后台扫描每攒多少行交给表格一次
+SCAN_BATCH = 500
+# kind -> (扫描的后缀, 直接支持的后缀)
+_KINDS = {"image": (IMAGE_EXTS_ANY, IMAGE_EXTS), "audio": (tuple(AUDIO_EXTS_COMMON), AUDIO_EXTS_ALLOWED)}
+# 行数据：(文件名, 是否支持, 相对路径)
+_COLUMNS = [("文件名", lambda r: r[0]), ("支持", lambda r: "✓" if r[1] else "✗"), ("相对路径", lambda r: r[2])]
+
+
+def _make_table(parent):
+    model = AssetTableModel(_COLUMNS, parent)
+    proxy = make_proxy(model, parent=parent)
+    view = QTableView(parent)
+    view.setModel(proxy)
+    view.setSelectionBehavior(QAbstractItemView.SelectRows)
+    view.setSelectionMode(QAbstractItemView.SingleSelection)
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    view.setAlternatingRowColors(True)
+    view.verticalHeader().setDefaultSectionSize(22)   # 固定行高，不按内容逐行测量
+    view.verticalHeader().setVisible(False)
+    view.horizontalHeader().setStretchLastSection(True)
+    view.setSortingEnabled(True)
+    proxy.sort(-1)                                     # 默认保持扫描顺序，点表头再排序
+    filt = QLineEdit(parent)
+    filt.setPlaceholderText("筛选文件名…")
+    filt.setClearButtonEnabled(True)
+    filt.textChanged.connect(proxy.setFilterFixedString)
+    return model, proxy, view, filt
+
 
 class AssetsManagerDialog(QDialog):
     def __init__(self, skin_root: Path, parent=None, start_tab: str="image"):
@@ -51,11 +84,10 @@ class AssetsManagerDialog(QDialog):
         self.img_tab = QWidget(self.tabs)
         self.tabs.addTab(self.img_tab, "图片")
 
-        # 左侧表格
-        self.img_table = QTableWidget(0, 3, self.img_tab)
-        self.img_table.setHorizontalHeaderLabels(["文件名", "支持", "相对路径"])
-        self.img_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.img_table.setAlternatingRowColors(True)
+        # 左侧表格（model/view，后台扫描分批追加）
+        self.img_model, self.img_proxy, self.img_table, self.img_filter = _make_table(self.img_tab)
+        self._scans = {}      # kind -> 当前这一轮扫描线程
+        self._retired = set() # 已取消但还没退出的旧扫描线程，关窗口时要等它们
 
         # 右侧预览
         self.img_preview = QLabel("预览区：请选择一张图片", self.img_tab)
@@ -63,18 +95,22 @@ class AssetsManagerDialog(QDialog):
         self.img_preview.setMinimumSize(320, 280)
         self.img_preview.setStyleSheet("background:#111; color:#888; border-radius:8px;")
         self.img_preview_path = None  # 当前预览路径
+        self._img_preview_pm = None   # 当前预览的原图（来自共享缓存），缩放窗口时只重新缩放
 
         # 底部按钮
         self.btn_img_replace = QPushButton("替换…", self.img_tab)
+        self.btn_img_batch = QPushButton("批量替换…", self.img_tab)
         self.btn_img_refresh = QPushButton("刷新", self.img_tab)
 
         # 布局：左（表+按钮）/ 右（预览）
         img_left = QVBoxLayout()
+        img_left.addWidget(self.img_filter)
         img_left.addWidget(self.img_table, 1)
         left_bar = QHBoxLayout()
         left_bar.addWidget(QLabel("仅接受：.png"))
         left_bar.addStretch(1)
         left_bar.addWidget(self.btn_img_replace)
+        left_bar.addWidget(self.btn_img_batch)
         left_bar.addWidget(self.btn_img_refresh)
         img_left.addLayout(left_bar)
 
@@ -90,10 +126,7 @@ class AssetsManagerDialog(QDialog):
         self.tabs.addTab(self.aud_tab, "音频")
 
         # 左侧表格
-        self.aud_table = QTableWidget(0, 3, self.aud_tab)
-        self.aud_table.setHorizontalHeaderLabels(["文件名", "支持", "相对路径"])
-        self.aud_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.aud_table.setAlternatingRowColors(True)
+        self.aud_model, self.aud_proxy, self.aud_table, self.aud_filter = _make_table(self.aud_tab)
 
         # 右侧预览（播放器）
         self.aud_info = QLabel("预览区：请选择一个音频", self.aud_tab)
@@ -105,6 +138,7 @@ class AssetsManagerDialog(QDialog):
         self.btn_aud_stop = QPushButton("■ 停止", self.aud_tab)
         self.btn_aud_conflicts = QPushButton("处理冲突…", self.aud_tab)
         self.btn_aud_replace = QPushButton("替换…", self.aud_tab)
+        self.btn_aud_batch = QPushButton("批量替换…", self.aud_tab)
         self.btn_aud_refresh = QPushButton("刷新", self.aud_tab)
 
         # 播放进度
@@ -124,12 +158,14 @@ class AssetsManagerDialog(QDialog):
         self.row_volume.addWidget(self.slider_vol)
 
         aud_left = QVBoxLayout()
+        aud_left.addWidget(self.aud_filter)
         aud_left.addWidget(self.aud_table, 1)
         aud_left_bar = QHBoxLayout()
         aud_left_bar.addWidget(QLabel("接受：.wav / .ogg / .mp3（其他尝试转换）"))
         aud_left_bar.addStretch(1)
         aud_left_bar.addWidget(self.btn_aud_conflicts)
         aud_left_bar.addWidget(self.btn_aud_replace)
+        aud_left_bar.addWidget(self.btn_aud_batch)
         aud_left_bar.addWidget(self.btn_aud_refresh)
         aud_left.addLayout(aud_left_bar)
 
@@ -154,10 +190,12 @@ class AssetsManagerDialog(QDialog):
         self.btn_img_refresh.clicked.connect(self.refresh_images)
         self.btn_aud_refresh.clicked.connect(self.refresh_audio)
         self.btn_img_replace.clicked.connect(self._replace_image)
+        self.btn_img_batch.clicked.connect(self._batch_replace_images)
         self.btn_aud_replace.clicked.connect(self._replace_audio)
+        self.btn_aud_batch.clicked.connect(self._batch_replace_audio)
         self.btn_aud_conflicts.clicked.connect(self._resolve_conflicts)
-        self.img_table.itemSelectionChanged.connect(self._on_img_selection_changed)
-        self.aud_table.itemSelectionChanged.connect(self._on_audio_selection_changed)
+        self.img_table.selectionModel().currentRowChanged.connect(lambda *_: self._on_img_selection_changed())
+        self.aud_table.selectionModel().currentRowChanged.connect(lambda *_: self._on_audio_selection_changed())
 
         # 播放器初始化
         if _HAS_MULTIMEDIA:
@@ -182,9 +220,9 @@ class AssetsManagerDialog(QDialog):
             self.lbl_volume.setText("未安装 QtMultimedia，无法预览音频。")
             self.aud_info.setText("未安装 QtMultimedia，无法预览音频。")
 
-        # ---- 初始化数据 ----
-        self.refresh_images()
-        self.refresh_audio()
+        # ---- 初始化数据（图片和音频一次遍历） ----
+        self._start_scan(("image", "audio"))
+        self._show_img_placeholder(); self._show_aud_placeholder()
         if start_tab == "audio":
             self.tabs.setCurrentIndex(1)
 
@@ -195,29 +233,71 @@ class AssetsManagerDialog(QDialog):
             return None
         return Path(self.skin_root)
 
-    def _selected_path(self, table: QTableWidget) -> Path | None:
+    def _selected_path(self, table: QTableView) -> Path | None:
         root = self._ensure_root()
         if not root:
             return None
-        r = table.currentRow()
+        model, proxy = (self.img_model, self.img_proxy) if table is self.img_table else (self.aud_model, self.aud_proxy)
+        r = source_row(table, proxy)
         if r < 0:
             return None
-        rel = table.item(r, 2).text()
+        rel = model.row_data(r)[2]
         return (root / rel)
 
-    # ========== 图片 ==========
-    def refresh_images(self):
+    def _start_scan(self, kinds):
+        """后台线程单遍走目录，按后缀分到各自的表格，每 SCAN_BATCH 行追加一次；
+        再次刷新时丢弃上一轮还没处理的批次。"""
         root = self._ensure_root()
         if not root: return
-        files = list_images(root)
-        self.img_table.setRowCount(0)
-        for p in files:
-            support = "✓" if p.suffix.lower() in IMAGE_EXTS else "✗"
-            row = self.img_table.rowCount()
-            self.img_table.insertRow(row)
-            self.img_table.setItem(row, 0, QTableWidgetItem(p.name))
-            self.img_table.setItem(row, 1, QTableWidgetItem(support))
-            self.img_table.setItem(row, 2, QTableWidgetItem(str(p.relative_to(root))))
+        models = {"image": self.img_model, "audio": self.aud_model}
+        for kind in kinds:
+            old = self._scans.pop(kind, None)
+            if old is not None and old not in self._scans.values():
+                old.cancel(); self._retired.add(old)   # 另一张表还在用这轮扫描时不取消
+            models[kind].clear()
+        ext_kind = {e: k for k in kinds for e in _KINDS[k][0]}
+
+        def scan(progress, cancel, emit_partial):
+            batch = {k: [] for k in kinds}; pending = 0; n = 0
+            for f in walk_media(root, ext_kind):
+                if cancel(): break
+                kind = ext_kind[f.ext]
+                batch[kind].append((f.path.name, f.ext in _KINDS[kind][1], f.rel))
+                n += 1; pending += 1
+                if pending >= SCAN_BATCH:
+                    emit_partial(batch); batch = {k: [] for k in kinds}; pending = 0
+            if pending and not cancel(): emit_partial(batch)
+            return n
+
+        task = TaskThread(scan, self, with_partial=True)
+
+        def on_rows(batch, task=task):
+            for kind, rows in batch.items():
+                if self._scans.get(kind) is task: models[kind].append_rows(rows)
+
+        task.partial.connect(on_rows)
+        task.finished.connect(lambda task=task: self._on_scan_finished(task))
+        for kind in kinds:
+            self._scans[kind] = task
+        task.start()
+
+    def _on_scan_finished(self, task):
+        for kind in [k for k, t in self._scans.items() if t is task]:
+            del self._scans[kind]
+        self._retired.discard(task)
+        task.deleteLater()
+
+    def _stop_scans(self):
+        for task in set(self._scans.values()) | self._retired:
+            task.cancel(); task.wait(2000)
+
+    def done(self, r):
+        self._stop_scans()
+        super().done(r)
+
+    # ========== 图片 ==========
+    def refresh_images(self):
+        self._start_scan(("image",))
         # 清空预览
         self._show_img_placeholder()
 
@@ -225,19 +305,31 @@ class AssetsManagerDialog(QDialog):
         self.img_preview.setPixmap(QPixmap())
         self.img_preview.setText(msg)
         self.img_preview_path = None
+        self._img_preview_pm = None
 
     def _update_img_preview_pixmap(self):
-        """根据预览控件尺寸重新缩放已加载的图片。"""
+        """根据预览控件尺寸重新缩放已加载的图片；原图在后台解码，之后只做缩放。"""
         if not self.img_preview_path:
             return
-        pm = QPixmap(self.img_preview_path)
-        if pm.isNull():
-            self._show_img_placeholder("无法预览该图片")
+        pm = self._img_preview_pm
+        if pm is None:
+            path = self.img_preview_path
+            self.img_preview.setText("加载中…")
+            image_cache().request(path, 1.0, lambda pm, path=path: self._on_img_decoded(path, pm))
             return
         scaled = pm.scaled(self.img_preview.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
         self.img_preview.setPixmap(scaled)
         self.img_preview.setText("")
 
+    def _on_img_decoded(self, path: str, pm):
+        if path != self.img_preview_path:
+            return  # 解码期间已经换了选中项
+        if pm is None or pm.isNull():
+            self._show_img_placeholder("无法预览该图片")
+            return
+        self._img_preview_pm = pm
+        self._update_img_preview_pixmap()
+
     def resizeEvent(self, e):
         super().resizeEvent(e)
         # 在图片页签时，窗口尺寸变化重算预览
@@ -250,6 +342,7 @@ class AssetsManagerDialog(QDialog):
             self._show_img_placeholder()
             return
         self.img_preview_path = str(p)
+        self._img_preview_pm = None
         self._update_img_preview_pixmap()
 
     def _replace_image(self):
@@ -269,19 +362,39 @@ class AssetsManagerDialog(QDialog):
             QMessageBox.critical(self, "失败", str(e))
         self.refresh_images()
 
-    # ========== 音频 ==========
-    def refresh_audio(self):
+    def _batch_replace_images(self):
+        """选一批图片，按文件名主干对到皮肤里的同名素材，后台进程池转换成 PNG。"""
         root = self._ensure_root()
         if not root: return
-        files = list_audio(root)
-        self.aud_table.setRowCount(0)
-        for p in files:
-            support = "✓" if p.suffix.lower() in AUDIO_EXTS_ALLOWED else "✗"
-            row = self.aud_table.rowCount()
-            self.aud_table.insertRow(row)
-            self.aud_table.setItem(row, 0, QTableWidgetItem(p.name))
-            self.aud_table.setItem(row, 1, QTableWidgetItem(support))
-            self.aud_table.setItem(row, 2, QTableWidgetItem(str(p.relative_to(root))))
+        srcs, _ = QFileDialog.getOpenFileNames(self, "选择替换用的图片（按文件名对应）", "",
+                                               "Images (*.png *.jpg *.jpeg *.bmp *.webp)")
+        if not srcs: return
+        modes = [("preserve", "@2x / SD 已有哪个就一起更新（推荐）"),
+                 ("both", "同时生成 @2x 和 SD"),
+                 ("single", "只写同名目标文件")]
+        label, ok = QInputDialog.getItem(self, "批量替换", f"共 {len(srcs)} 个文件。@2x / SD 处理方式：",
+                                         [m[1] for m in modes], 0, False)
+        if not ok: return
+        variants = next(k for k, text in modes if text == label)
+        mapping = map_sources_to_targets([Path(s) for s in srcs], scan_media(root, IMAGE_EXTS_ANY))
+
+        def done(results):
+            bad = [r for r in results if not r.ok]
+            written = sum(len(r.written) for r in results)
+            msg = f"成功 {len(results) - len(bad)} 个，写入 {written} 个 PNG。"
+            if bad:
+                msg += "\n\n失败：\n" + "\n".join(f"{r.src.name}: {r.error}" for r in bad[:10])
+                if len(bad) > 10: msg += f"\n……另有 {len(bad) - 10} 个"
+            (QMessageBox.warning if bad else QMessageBox.information)(self, "批量替换", msg)
+            self.refresh_images()
+
+        run_with_progress(self, "批量替换图片",
+                          lambda progress, cancel: batch_replace(mapping, variants, progress, cancel),
+                          on_done=done, on_error=lambda m: QMessageBox.critical(self, "失败", m))
+
+    # ========== 音频 ==========
+    def refresh_audio(self):
+        self._start_scan(("audio",))
         self._show_aud_placeholder()
 
     def _show_aud_placeholder(self, msg: str = "预览区：请选择一个音频"):
@@ -341,19 +454,45 @@ class AssetsManagerDialog(QDialog):
         src, _ = QFileDialog.getOpenFileName(self, "选择音频", "", "Audio (*.wav *.ogg *.mp3 *.flac)")
         if not src: return
         prefer = ".wav"
-        try:
-            dst = replace_audio(Path(src), cur.with_suffix(prefer), prefer_ext=prefer)
+
+        def done(dst):
             self._on_audio_selection_changed()  # 刷新预览/播放器
             QMessageBox.information(self, "成功", f"已替换为 {dst.name}")
-        except Exception as e:
-            QMessageBox.critical(self, "失败", str(e))
-        self.refresh_audio()
+            self.refresh_audio()
+
+        # 需要转码时可能要几秒，放到后台线程
+        run_with_progress(self, "替换音频",
+                          lambda progress, cancel: replace_audio(Path(src), cur.with_suffix(prefer), prefer_ext=prefer),
+                          on_done=done, on_error=lambda m: QMessageBox.critical(self, "失败", m))
+
+    def _batch_replace_audio(self):
+        """选一批音频，按文件名主干对到皮肤里的同名音效；需要转码的并行交给 ffmpeg，同一文件再导入走缓存。"""
+        root = self._ensure_root()
+        if not root: return
+        srcs, _ = QFileDialog.getOpenFileNames(self, "选择替换用的音频（按文件名对应）", "",
+                                               "Audio (*.wav *.ogg *.mp3 *.flac)")
+        if not srcs: return
+        jobs = map_audio_targets([Path(s) for s in srcs], scan_media(root, AUDIO_EXTS_COMMON))
+
+        def done(results):
+            bad = [r for r in results if not r.ok]
+            cached = sum(1 for r in results if r.via == "cache")
+            msg = f"成功 {len(results) - len(bad)} 个（其中 {cached} 个来自转码缓存）。"
+            if bad:
+                msg += "\n\n失败：\n" + "\n".join(f"{r.src.name}: {r.error}" for r in bad[:10])
+                if len(bad) > 10: msg += f"\n……另有 {len(bad) - 10} 个"
+            (QMessageBox.warning if bad else QMessageBox.information)(self, "批量替换", msg)
+            self.refresh_audio()
+
+        run_with_progress(self, "批量替换音频",
+                          lambda progress, cancel: transcode_queue(jobs, progress, cancel),
+                          on_done=done, on_error=lambda m: QMessageBox.critical(self, "失败", m))
 
     def _resolve_conflicts(self):
         root = self._ensure_root()
         if not root: return
-        files = list_audio(root)
-        dups = stem_conflicts(files)
+        cat = scan_media(root, AUDIO_EXTS_COMMON)
+        dups = cat.stem_conflicts()
         if not dups:
             QMessageBox.information(self, "冲突处理", "未发现同名不同后缀的音频。")
             return
@@ -366,5 +505,5 @@ class AssetsManagerDialog(QDialog):
                 if hit:
                     preferred = hit[0]; break
             keep[stem] = preferred or paths[0]
-        bdir = resolve_audio_conflicts(root, keep)
+        bdir = resolve_audio_conflicts(root, keep, cat)
         QMessageBox.information(self, "完成", f"已移动冲突文件到：{bdir}")
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+进程内共享的图片缓存：预览、素材对话框都从这里取图。
+- 键为 (path, mtime_ns, size, scale)：文件没变就不会再解码；文件一改（热重载）键自然失效。
+- 按字节预算做 LRU（默认 256 MiB），切换皮肤再切回来时常用素材仍在缓存里。
+- 解码在 QThreadPool 里做成 QImage，QPixmap 只在 GUI 线程里生成（QPixmap 不能跨线程）。
+
+    cache = image_cache()
+    pm = cache.pixmap(path, 0.5)                 # 同步：命中直接返回；正在后台解码就等它；否则当场解码
+    cache.prefetch([(p1, 1.0), (p2, 0.5)])      # 异步预取，多张图并行解码
+    cache.request(path, 1.0, lambda pm: ...)     # 异步：命中立即回调，否则解码完在 GUI 线程回调
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import os, threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Qt
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+# (normcase 路径, mtime_ns, size, scale)
+ImageKey = Tuple[str, int, int, float]
+
+
+def image_key(path, scale: float = 1.0) -> Optional[ImageKey]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.normcase(os.path.abspath(str(path))), st.st_mtime_ns, st.st_size, float(scale))
+
+
+def decode_image(path: str, scale: float = 1.0) -> QImage:
+    """读图并按 scale 平滑缩放（@2x -> SD 用 0.5）。任何线程都可以调用。"""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    img = reader.read()
+    if img.isNull():
+        return QImage()
+    if scale != 1.0:
+        w = max(1, int(img.width() * scale)); h = max(1, int(img.height() * scale))
+        img = img.scaled(w, h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return img
+
+
+class _Pending:
+    """一次在途解码；同步调用方可以 wait() 等它，不必重复解码。"""
+    __slots__ = ("event", "image", "callbacks")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.image: Optional[QImage] = None
+        self.callbacks: List[Callable[[QPixmap], None]] = []
+
+
+class _DecodeJob(QRunnable):
+    def __init__(self, key: ImageKey, path: str, pending: _Pending, done):
+        super().__init__()
+        self.setAutoDelete(True)
+        self._key, self._path, self._pending, self._done = key, path, pending, done
+
+    def run(self):
+        try:
+            img = decode_image(self._path, self._key[3])
+        except Exception:
+            img = QImage()
+        self._pending.image = img
+        self._pending.event.set()
+        self._done.emit(self._key)
+
+
+class ImageCache(QObject):
+    _decoded = Signal(object)  # key；工作线程 -> GUI 线程
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET, max_threads: int = 0, parent=None):
+        super().__init__(parent)
+        self.budget = int(budget_bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[ImageKey, Tuple[QPixmap, int]]" = OrderedDict()
+        self._by_path: Dict[str, ImageKey] = {}   # 路径 -> 最近一次 (mtime, size) 的键前缀，用于丢弃旧版本
+        self._pending: Dict[ImageKey, _Pending] = {}
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads or max(2, min(8, os.cpu_count() or 2)))
+        self._decoded.connect(self._on_decoded)
+
+    # ---------- public ----------
+    def pixmap(self, path, scale: float = 1.0) -> Optional[QPixmap]:
+        """同步取图（GUI 线程）。文件不存在或解码失败返回 None。"""
+        key = image_key(path, scale)
+        if key is None: return None
+        pm = self._get(key)
+        if pm is not None:
+            return pm
+        pend = self._pending.get(key)
+        if pend is not None:
+            pend.event.wait()
+            self._on_decoded(key)          # 信号还没轮到处理，这里先收下
+            return self._get(key, count=False)
+        self.misses += 1
+        return self._put(key, decode_image(str(path), scale))
+
+    def request(self, path, scale: float, callback: Callable[[Optional[QPixmap]], None]) -> Optional[QPixmap]:
+        """异步取图：命中时立即回调并返回 pixmap；否则排队解码，完成后在 GUI 线程回调。"""
+        key = image_key(path, scale)
+        if key is None:
+            callback(None); return None
+        pm = self._get(key)
+        if pm is not None:
+            callback(pm); return pm
+        self._schedule(key, str(path)).callbacks.append(callback)
+        return None
+
+    def prefetch(self, items: Iterable[Tuple[object, float]]) -> int:
+        """后台并行解码一批 (path, scale)；返回实际排队的数量。"""
+        n = 0
+        for path, scale in items:
+            key = image_key(path, scale)
+            if key is None or key in self._lru or key in self._pending: continue
+            self._schedule(key, str(path)); n += 1
+        return n
+
+    def contains(self, path, scale: float = 1.0) -> bool:
+        key = image_key(path, scale)
+        return key is not None and key in self._lru
+
+    def invalidate(self, path=None) -> None:
+        """丢弃某个文件（或全部）的缓存。mtime 变化本来就会换键，这里用于手动清理。"""
+        if path is None:
+            self._lru.clear(); self._by_path.clear(); self.bytes = 0; return
+        p = os.path.normcase(os.path.abspath(str(path)))
+        for key in [k for k in self._lru if k[0] == p]:
+            self._drop(key)
+        self._by_path.pop(p, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._lru), "bytes": self.bytes, "budget": self.budget,
+                "hits": self.hits, "misses": self.misses}
+
+    def wait_idle(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
+
+    # ---------- internals ----------
+    def _get(self, key: ImageKey, count: bool = True) -> Optional[QPixmap]:
+        hit = self._lru.get(key)
+        if hit is None: return None
+        self._lru.move_to_end(key)
+        if count: self.hits += 1
+        return hit[0]
+
+    def _schedule(self, key: ImageKey, path: str) -> _Pending:
+        pend = self._pending.get(key)
+        if pend is None:
+            pend = self._pending[key] = _Pending()
+            self.misses += 1
+            self._pool.start(_DecodeJob(key, path, pend, self._decoded))
+        return pend
+
+    def _on_decoded(self, key: ImageKey):
+        pend = self._pending.pop(key, None)
+        if pend is None: return   # 已被同步路径收下
+        pm = self._put(key, pend.image)
+        for cb in pend.callbacks:
+            try: cb(pm)
+            except Exception: pass
+
+    def _put(self, key: ImageKey, img: Optional[QImage]) -> Optional[QPixmap]:
+        if img is None or img.isNull():
+            return None
+        pm = QPixmap.fromImage(img)
+        # 同一路径的旧版本（文件被改过）不会再被命中，直接丢掉
+        prev = self._by_path.get(key[0])
+        if prev is not None and prev[1:3] != key[1:3]:
+            for k in [k for k in self._lru if k[:3] == prev[:3]]:
+                self._drop(k)
+        self._by_path[key[0]] = key
+        nbytes = pm.width() * pm.height() * max(1, pm.depth() // 8)
+        old = self._lru.pop(key, None)
+        if old is not None: self.bytes -= old[1]
+        self._lru[key] = (pm, nbytes); self.bytes += nbytes
+        while self.bytes > self.budget and len(self._lru) > 1:
+            k, (_pm, nb) = self._lru.popitem(last=False)
+            self.bytes -= nb
+        return pm
+
+    def _drop(self, key: ImageKey) -> None:
+        ent = self._lru.pop(key, None)
+        if ent is not None: self.bytes -= ent[1]
+
+
+_INSTANCE: Optional[ImageCache] = None
+
+
+def image_cache() -> ImageCache:
+    """进程级单例（需要先有 QApplication）。"""
+    global _INSTANCE
+    if _INSTANCE is None:
+        _INSTANCE = ImageCache()
+    return _INSTANCE
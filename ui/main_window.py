@@ -1,28 +1,37 @@
 # -*- coding: utf-8 -*-
 import os
+import time
 from pathlib import Path
 
 from PySide6.QtWidgets import (
-    QMainWindow, QFileDialog, QSplitter, QListWidget, QWidget, QVBoxLayout, QTabWidget,
-    QMessageBox, QMenu, QDockWidget, QPushButton, QHBoxLayout, QGridLayout, QLabel, QSpinBox, QCheckBox, QDialog, QDialogButtonBox
+    QMainWindow, QFileDialog, QSplitter, QWidget, QVBoxLayout, QTabWidget,
+    QMessageBox, QMenu, QDockWidget, QPushButton, QHBoxLayout, QGridLayout, QLabel, QSpinBox, QCheckBox, QDialog, QDialogButtonBox,
+    QInputDialog
 )
 from PySide6.QtGui import QAction, QActionGroup, QDesktopServices
-from PySide6.QtCore import Qt, QSettings, QByteArray, QTimer, QUrl
+from PySide6.QtCore import Qt, QSettings, QByteArray, QUrl, Signal
 from core.app_links import get_links
 from core import i18n
 
-from core.skin_loader import SkinLoader
-from ui.assets_manager import AssetsManagerDialog
-from pathlib import Path
+from core.skin_loader import SkinLoader, KNOWN_ASSETS
+from core.skin_watcher import SkinWatcher, DIR_CHANGED
+from ui.workers import run_with_progress, TaskThread
+from ui.image_cache import image_cache
+from ui.widgets.asset_list import AssetListWidget
 from ui.preview.std_preview import StdPreview
+from ui.preview.cursor_preview import CursorPreview
 from ui.preview.mania_preview import ManiaPreview
-from ui.mania_ini_dock import ManiaIniDock
-from core import i18n
+# 素材对话框（QtMultimedia）、Mania INI 面板、osk/去重/PNG 优化/SD 生成（PIL、NumPy、进程池）
+# 都在第一次用到时才导入 / 创建，冷启动只加载首帧需要的东西
 
 RECENT_LIMIT = 12
+# 预览真正用到的素材（QFileSystemWatcher 模式下只逐个盯这些，避免上万个 watch）
+PREVIEW_ASSETS = set(KNOWN_ASSETS) | {"approachcircle", "cursormiddle"} | {f"default-{i}" for i in range(10)}
 
 
 class MainWindow(QMainWindow):
+    skin_loaded = Signal(object)   # 后台加载完成、素材列表已填好（预览素材可能还在解码）
+
     def _open_assets_manager(self, tab: str = "image"):
         """打开皮肤文件小工具：优先使用已加载皮肤目录；没有则引导选择。"""
         from PySide6.QtWidgets import QMessageBox, QFileDialog
@@ -60,6 +69,7 @@ class MainWindow(QMainWindow):
                 return
         # 3) 打开管理器
         try:
+            from ui.assets_manager import AssetsManagerDialog
             dlg = AssetsManagerDialog(_P(str(skin_root)), self, start_tab=tab)
             dlg.exec()
         except Exception as e:
@@ -71,12 +81,19 @@ class MainWindow(QMainWindow):
 
         self.skin = None
         self.loader = SkinLoader()
+        self._load_task = None
+        self.last_load_ms = None
         self.settings = QSettings()
         self.osu_root = self._load_osu_root()
 
+        # 热重载：监视当前皮肤目录，只推送变化的素材
+        self.watcher = SkinWatcher(self)
+        self.watcher.files_changed.connect(self._on_skin_files_changed)
+        self.last_hot_reload_ms = None
+
         # ---------- Central UI ----------
         splitter = QSplitter(Qt.Horizontal, self)
-        self.asset_list = QListWidget()
+        self.asset_list = AssetListWidget()
         self.asset_list.setMinimumWidth(280)
 
         right = QWidget()
@@ -87,8 +104,10 @@ class MainWindow(QMainWindow):
         self.mania_preview = ManiaPreview()
         self.std_preview.setMinimumSize(800, 520)
         self.mania_preview.setMinimumSize(800, 520)
+        self.cursor_preview = CursorPreview()
         self.tabs.addTab(self.std_preview, "")
         self.tabs.addTab(self.mania_preview, "")
+        self.tabs.addTab(self.cursor_preview, "")
         right_layout.addWidget(self.tabs)
 
         splitter.addWidget(self.asset_list)
@@ -104,6 +123,7 @@ class MainWindow(QMainWindow):
         self.settings_menu = menubar.addMenu("")
         self.debug_menu = menubar.addMenu("")      # Debug 顶栏
         self.mania_menu = menubar.addMenu("")
+        self.cursor_menu = menubar.addMenu("")
         self.assets_menu = menubar.addMenu("")  # 资产管理      # MANIA SETTINGS 顶栏
 
         self.author_menu = menubar.addMenu("")      # 作者 顶栏
@@ -112,14 +132,22 @@ class MainWindow(QMainWindow):
         self.act_open = QAction(self)
         self.act_open_osu = QAction(self)
         self.act_open_last = QAction(self)
+        self.act_skin_library = QAction(self); self.act_skin_library.setCheckable(True)
         self.act_reload = QAction(self)
         self.act_set_osu = QAction(self)
+        self.act_import_osk = QAction(self)
+        self.act_export_osk = QAction(self)
+        self.act_hot_reload = QAction(self); self.act_hot_reload.setCheckable(True)
+        self.act_hot_reload.setChecked(self.settings.value("ui/hot_reload", True, bool))
         self.act_quit = QAction(self)
 
         # 作者信息动作
         self.act_about_author = QAction(self)
         self.act_assets_images = QAction(self)
         self.act_assets_audio = QAction(self)
+        self.act_storage_report = QAction(self)
+        self.act_optimize_png = QAction(self)
+        self.act_generate_sd = QAction(self)
 
         # 作者链接动作
         self.act_link_github = QAction(self)
@@ -130,8 +158,12 @@ class MainWindow(QMainWindow):
         self.act_open.triggered.connect(self.on_open_generic)
         self.act_open_osu.triggered.connect(self.on_open_osu_skins)
         self.act_open_last.triggered.connect(self.on_open_last_skin)
+        self.act_skin_library.triggered.connect(self.on_toggle_skin_library)
         self.act_reload.triggered.connect(self.reload_skin)
         self.act_set_osu.triggered.connect(self.on_set_osu_root)
+        self.act_hot_reload.toggled.connect(self.on_toggle_hot_reload)
+        self.act_import_osk.triggered.connect(self.on_import_osk)
+        self.act_export_osk.triggered.connect(lambda: self.on_export_osk())
         self.act_quit.triggered.connect(self.close)
 
         # 连接作者链接动作（点击后在浏览器打开）
@@ -142,6 +174,9 @@ class MainWindow(QMainWindow):
         self.act_about_author.triggered.connect(self._show_author_info_dialog)
         self.act_assets_images.triggered.connect(lambda: self._open_assets_manager('image'))
         self.act_assets_audio.triggered.connect(lambda: self._open_assets_manager('audio'))
+        self.act_storage_report.triggered.connect(self.on_storage_report)
+        self.act_optimize_png.triggered.connect(self.on_optimize_png)
+        self.act_generate_sd.triggered.connect(self.on_generate_sd)
 
 
         # language menu
@@ -159,6 +194,9 @@ class MainWindow(QMainWindow):
         self.author_menu.addAction(self.act_about_author)
         self.assets_menu.addAction(self.act_assets_images)
         self.assets_menu.addAction(self.act_assets_audio)
+        self.assets_menu.addAction(self.act_storage_report)
+        self.assets_menu.addAction(self.act_optimize_png)
+        self.assets_menu.addAction(self.act_generate_sd)
 
         self.author_menu.addSeparator()
         self.author_menu.addAction(self.act_link_github)
@@ -172,52 +210,272 @@ class MainWindow(QMainWindow):
         self.act_center_alpha.triggered.connect(lambda: self.on_set_center_mode("alpha"))
 
         # build menus（去掉 Settings 里的 “STD OFFSETS” 条目）
-        self.file_menu.addAction(self.act_open); self.file_menu.addAction(self.act_open_osu); self.file_menu.addAction(self.act_open_last); self.file_menu.addMenu(self.recent_menu)
-        self.file_menu.addAction(self.act_reload); self.file_menu.addSeparator(); self.file_menu.addAction(self.act_set_osu); self.file_menu.addSeparator(); self.file_menu.addAction(self.act_quit)
+        self.file_menu.addAction(self.act_open); self.file_menu.addAction(self.act_open_osu); self.file_menu.addAction(self.act_skin_library); self.file_menu.addAction(self.act_open_last); self.file_menu.addMenu(self.recent_menu)
+        self.file_menu.addAction(self.act_reload); self.file_menu.addAction(self.act_hot_reload); self.file_menu.addSeparator()
+        self.file_menu.addAction(self.act_import_osk); self.file_menu.addAction(self.act_export_osk); self.file_menu.addSeparator(); self.file_menu.addAction(self.act_set_osu); self.file_menu.addSeparator(); self.file_menu.addAction(self.act_quit)
         self.settings_menu.addMenu(self.lang_menu); self.settings_menu.addMenu(self.center_menu)
         # 不再添加 self.act_offsets 到 Settings（它现在在 Debug 面板里）
 
-        # ---------- Debug Dock ----------
-        self._init_debug_dock()
+        # ---------- Debug Dock（第一次打开时才创建） ----------
+        self.debug_dock = None
         # Debug 菜单里的“显示调试面板”开关（默认关闭）
         self.act_debug_show = QAction(self); self.act_debug_show.setCheckable(True)
         self.debug_menu.addAction(self.act_debug_show)
-        self.act_debug_show.triggered.connect(lambda c: self.debug_dock.setVisible(bool(c)))
-        self.debug_dock.visibilityChanged.connect(self.act_debug_show.setChecked)
-        self.debug_dock.hide()
+        self.act_debug_show.triggered.connect(lambda c: self._ensure_debug_dock().setVisible(bool(c)))
         self.act_debug_show.setChecked(False)
 
-        # ---------- Mania INI Dock（与 Debug 完全分离） ----------
-        self.mania_ini_dock = ManiaIniDock(self)
-        self.addDockWidget(Qt.RightDockWidgetArea, self.mania_ini_dock)
-        self.mania_ini_dock.hide()
-        try:
-            self.mania_ini_dock.keys_changed.connect(self._apply_mania_keys)
-        except Exception:
-            pass
+        # 谱面回放：.osu 或生成的测试谱
+        self.act_std_chart = QAction(self); self.act_std_demo = QAction(self)
+        self.act_std_play = QAction(self); self.act_std_play.setCheckable(True); self.act_std_play.setEnabled(False)
+        self.act_std_stop = QAction(self); self.act_std_stop.setEnabled(False)
+        self.debug_menu.addSeparator()
+        for a in (self.act_std_chart, self.act_std_demo, self.act_std_play, self.act_std_stop):
+            self.debug_menu.addAction(a)
+        self.act_std_chart.triggered.connect(self.on_load_std_beatmap)
+        self.act_std_demo.triggered.connect(self.on_play_std_demo)
+        self.act_std_play.triggered.connect(lambda c: self.std_preview.play() if c else self.std_preview.pause())
+        self.act_std_stop.triggered.connect(self.std_preview.clear_chart)
+        self.std_preview.playing_changed.connect(self.act_std_play.setChecked)
+        self.std_preview.chart_changed.connect(
+            lambda chart: (self.act_std_play.setEnabled(chart is not None), self.act_std_stop.setEnabled(chart is not None)))
+
+        # ---------- Mania INI Dock（与 Debug 完全分离，同样按需创建） ----------
+        self.mania_ini_dock = None
+        # 皮肤库面板同样按需创建；_preload_task 在后台预加载库里相邻皮肤的核心素材
+        self.library_dock = None
+        self._preload_task = None
+        self._preload_after_load = None     # (皮肤目录, 相邻皮肤)：这个皮肤加载完后预加载
 
         # MANIA SETTINGS 菜单里的开关（默认关闭）
         self.act_mania_show = QAction(self); self.act_mania_show.setCheckable(True)
         self.mania_menu.addAction(self.act_mania_show)
-        self.act_mania_show.triggered.connect(lambda checked: self.mania_ini_dock.setVisible(bool(checked)))
-        self.mania_ini_dock.visibilityChanged.connect(self.act_mania_show.setChecked)
+        self.act_mania_show.triggered.connect(lambda checked: self._ensure_mania_ini_dock().setVisible(bool(checked)))
         self.act_mania_show.setChecked(False)
 
+        # 谱面回放：.osu 或合成谱，按滚动速度滚动
+        self._chart_task = None
+        self.act_mania_chart = QAction(self); self.act_mania_demo = QAction(self)
+        self.act_mania_play = QAction(self); self.act_mania_play.setCheckable(True); self.act_mania_play.setEnabled(False)
+        self.act_mania_stop = QAction(self); self.act_mania_stop.setEnabled(False)
+        self.act_mania_speed = QAction(self)
+        self.act_mania_perf = QAction(self); self.act_mania_perf.setCheckable(True)
+        self.mania_menu.addSeparator()
+        for a in (self.act_mania_chart, self.act_mania_demo, self.act_mania_play, self.act_mania_stop,
+                  self.act_mania_speed, self.act_mania_perf):
+            self.mania_menu.addAction(a)
+        self.act_mania_chart.triggered.connect(self.on_load_mania_chart)
+        self.act_mania_demo.triggered.connect(self.on_play_mania_demo)
+        self.act_mania_play.triggered.connect(lambda c: self.mania_preview.play() if c else self.mania_preview.pause())
+        self.act_mania_stop.triggered.connect(self.on_stop_mania_chart)
+        self.act_mania_speed.triggered.connect(self.on_set_mania_scroll_speed)
+        self.act_mania_perf.toggled.connect(self._on_toggle_mania_perf)
+        self.mania_preview.playing_changed.connect(self.act_mania_play.setChecked)
+        self.mania_preview.chart_changed.connect(self._on_mania_chart_changed)
+        self.mania_preview.set_scroll_speed(self.settings.value("mania/scroll_speed", 25, int))
+
+        # 光标预览：跟随鼠标 / 录制并循环回放轨迹 / 生成的测试轨迹
+        self.act_cursor_record = QAction(self); self.act_cursor_record.setCheckable(True)
+        self.act_cursor_demo = QAction(self)
+        self.act_cursor_follow = QAction(self); self.act_cursor_follow.setEnabled(False)
+        self.act_cursor_density = QAction(self)
+        self.act_cursor_perf = QAction(self); self.act_cursor_perf.setCheckable(True)
+        for a in (self.act_cursor_record, self.act_cursor_demo, self.act_cursor_follow,
+                  self.act_cursor_density, self.act_cursor_perf):
+            self.cursor_menu.addAction(a)
+        self.act_cursor_record.triggered.connect(self.on_toggle_cursor_record)
+        self.act_cursor_demo.triggered.connect(self.on_play_cursor_demo)
+        self.act_cursor_follow.triggered.connect(lambda: self.cursor_preview.set_path(None))
+        self.act_cursor_density.triggered.connect(self.on_set_cursor_trail_density)
+        self.act_cursor_perf.toggled.connect(self._on_toggle_cursor_perf)
+        self.cursor_preview.recording_changed.connect(self.act_cursor_record.setChecked)
+        self.cursor_preview.path_changed.connect(lambda path: self.act_cursor_follow.setEnabled(path is not None))
+        self.cursor_preview.set_trail_density(self.settings.value("cursor/trail_density", 1, int))
+
         self._refresh_recent_menu()
         self.retranslate()
         self.statusBar().showMessage(i18n.t("status.ready", "Ready"))
         self._restore_or_default_geometry()
 
-        # 强制启动时隐藏两个面板（即使恢复了上次布局）
-        QTimer.singleShot(0, self._force_hide_debug_and_mania)
+        # 两个面板启动时都还没创建，自然是隐藏的（即使上次布局里它们开着）
 
-    def _force_hide_debug_and_mania(self):
-        try:
-            self.debug_dock.hide(); self.act_debug_show.setChecked(False)
-        except Exception: pass
-        try:
-            self.mania_ini_dock.hide(); self.act_mania_show.setChecked(False)
-        except Exception: pass
+    def _ensure_debug_dock(self) -> QDockWidget:
+        if self.debug_dock is None:
+            self._init_debug_dock()
+            self.restoreDockWidget(self.debug_dock)   # 沿用上次保存的停靠位置
+            self.debug_dock.hide()
+            self.debug_dock.visibilityChanged.connect(self.act_debug_show.setChecked)
+        return self.debug_dock
+
+    def _ensure_mania_ini_dock(self):
+        if self.mania_ini_dock is None:
+            from ui.mania_ini_dock import ManiaIniDock
+            dock = ManiaIniDock(self)
+            self.addDockWidget(Qt.RightDockWidgetArea, dock)
+            self.restoreDockWidget(dock)
+            dock.hide()
+            dock.keys_changed.connect(self._apply_mania_keys)
+            dock.visibilityChanged.connect(self.act_mania_show.setChecked)
+            self.mania_ini_dock = dock
+            root_path = getattr(self.skin, "root", None) if self.skin else None
+            if root_path:
+                dock.set_skin_root(root_path)
+        return self.mania_ini_dock
+
+    def _ensure_library_dock(self):
+        if self.library_dock is None:
+            from ui.skin_library import SkinLibraryDock
+            dock = SkinLibraryDock(self)
+            self.addDockWidget(Qt.LeftDockWidgetArea, dock)
+            self.restoreDockWidget(dock)
+            dock.hide()
+            dock.skin_activated.connect(self._on_library_skin_activated)
+            dock.visibilityChanged.connect(self.act_skin_library.setChecked)
+            self.library_dock = dock
+        return self.library_dock
+
+    def on_toggle_skin_library(self, checked: bool):
+        if not checked:
+            if self.library_dock is not None: self.library_dock.hide()
+            return
+        skins = self._osu_skins_dir()
+        if skins is None:
+            self.act_skin_library.setChecked(False); return
+        dock = self._ensure_library_dock()
+        dock.set_skins_dir(skins)
+        dock.show(); dock.raise_()
+
+    def _on_library_skin_activated(self, path: str):
+        # 预加载等点中的皮肤加载完（_on_skin_loaded）再开始：两边要抢 loader 的锁
+        self._preload_after_load = (path, self.library_dock.neighbours(path))
+        self.load_skin(path)
+
+    def _preload_skins(self, roots):
+        """后台把相邻皮肤的 skin.ini 和素材索引过一遍，再把它们的预览素材丢进图片缓存解码；
+        之后点到它们时，加载和首帧基本都是缓存命中。"""
+        from ui.preview.std_preview import preview_sprite_names
+        from ui.preview.cursor_preview import CURSOR_SPRITES
+        if self._preload_task is not None:
+            self._preload_task.cancel()
+        loader = self.loader
+
+        def work(progress, cancel):
+            items = []
+            for root in roots:
+                if cancel(): break
+                try:
+                    skin = loader.load(str(root), cancel)
+                except Exception:
+                    continue
+                items += [skin.assets[n].preview_source() for n in (*preview_sprite_names(skin.assets), *CURSOR_SPRITES)
+                          if n in skin.assets]
+            return items
+
+        task = TaskThread(work, self)
+        self._preload_task = task
+        task.succeeded.connect(lambda items: image_cache().prefetch(items))
+        task.finished.connect(lambda task=task: self._on_preload_finished(task))
+        task.start()
+
+    def _on_preload_finished(self, task):
+        if task is self._preload_task: self._preload_task = None
+        task.deleteLater()
+
+    # ---------- 谱面回放 ----------
+    def _load_chart_file(self, title: str, build, on_loaded):
+        """选一个 .osu，后台解析成 build(beatmap) 的结果后交给 on_loaded；几万个物件的谱解析要上百毫秒。"""
+        from core.beatmap import parse_osu
+        start = self.settings.value("paths/last_chart_dir", "", str)
+        if not start and self.osu_root and (self.osu_root / "Songs").is_dir():
+            start = str(self.osu_root / "Songs")
+        path, _ = QFileDialog.getOpenFileName(self, title, start or os.path.expanduser("~"), "osu! beatmap (*.osu)")
+        if not path: return
+        self.settings.setValue("paths/last_chart_dir", str(Path(path).parent))
+        if self._chart_task is not None:
+            self._chart_task.cancel()
+        task = TaskThread(lambda progress, cancel: build(parse_osu(path)), self)
+        self._chart_task = task
+        task.succeeded.connect(lambda chart, task=task: task is self._chart_task and on_loaded(chart))
+        task.failed.connect(lambda msg, task=task: task is self._chart_task and QMessageBox.warning(
+            self, title, i18n.t("dialog.chart_error", "Cannot play this chart: {msg}").format(msg=msg)))
+        task.finished.connect(lambda task=task: self._on_chart_task_finished(task))
+        task.start()
+
+    def on_load_std_beatmap(self):
+        from core.beatmap import StdChart
+        from core.slider_curve import attach_shapes
+        # 滑条曲线在后台任务里一起展开，GUI 线程只拿到现成的折线
+        self._load_chart_file(i18n.t("dialog.load_beatmap", "Load osu!standard beatmap"),
+                              lambda bm: attach_shapes(StdChart.from_beatmap(bm)), self._start_std_chart)
+
+    def on_play_std_demo(self):
+        from core.beatmap import synthetic_std
+        self._start_std_chart(synthetic_std())
+
+    def _start_std_chart(self, chart):
+        self.std_preview.load_chart(chart)
+        self.tabs.setCurrentWidget(self.std_preview)
+        self.statusBar().showMessage(i18n.t("status.beatmap_loaded", "Beatmap: {title} ({n} objects, CS {cs:g}, AR {ar:g})")
+                                     .format(title=chart.title or "?", n=chart.count, cs=chart.circle_size, ar=chart.ar), 5000)
+
+    def on_load_mania_chart(self):
+        from core.beatmap import ManiaChart
+        self._load_chart_file(i18n.t("dialog.load_chart", "Load mania chart"),
+                              ManiaChart.from_beatmap, self._start_mania_chart)
+
+    def _on_chart_task_finished(self, task):
+        if task is self._chart_task: self._chart_task = None
+        task.deleteLater()
+
+    def on_play_mania_demo(self):
+        from core.beatmap import synthetic_mania
+        self._start_mania_chart(synthetic_mania(self.mania_preview.keys))
+
+    def _start_mania_chart(self, chart):
+        self._apply_mania_keys(chart.keys)
+        self.mania_preview.load_chart(chart)
+        self.tabs.setCurrentWidget(self.mania_preview)
+        self.statusBar().showMessage(i18n.t("status.chart_loaded", "Chart: {title} ({keys}K, {n} objects)")
+                                     .format(title=chart.title or "?", keys=chart.keys, n=chart.count), 5000)
+
+    def on_stop_mania_chart(self):
+        self.mania_preview.clear_chart()
+
+    def _on_mania_chart_changed(self, chart):
+        self.act_mania_play.setEnabled(chart is not None); self.act_mania_stop.setEnabled(chart is not None)
+
+    def on_set_mania_scroll_speed(self):
+        v, ok = QInputDialog.getInt(self, i18n.t("dialog.scroll_speed", "Scroll speed"),
+                                    i18n.t("dialog.scroll_speed_msg", "Scroll speed (1-40):"),
+                                    self.mania_preview.scroll_speed, 1, 40)
+        if ok:
+            self.mania_preview.set_scroll_speed(v)
+            self.settings.setValue("mania/scroll_speed", int(v))
+
+    def _on_toggle_mania_perf(self, on: bool):
+        self.mania_preview.show_perf = bool(on)
+        self.mania_preview.meter.reset(); self.mania_preview.update()
+
+    def on_toggle_cursor_record(self, on: bool):
+        self.tabs.setCurrentWidget(self.cursor_preview)
+        if on: self.cursor_preview.start_recording()
+        else: self.cursor_preview.stop_recording()
+
+    def on_play_cursor_demo(self):
+        from core.cursor_trail import synthetic_path
+        self.cursor_preview.set_path(synthetic_path())
+        self.tabs.setCurrentWidget(self.cursor_preview)
+
+    def on_set_cursor_trail_density(self):
+        v, ok = QInputDialog.getInt(self, i18n.t("dialog.trail_density", "Trail density"),
+                                    i18n.t("dialog.trail_density_msg", "Trail segments per frame (1-16):"),
+                                    self.cursor_preview.trail_density, 1, 16)
+        if ok:
+            self.cursor_preview.set_trail_density(v)
+            self.settings.setValue("cursor/trail_density", int(v))
+
+    def _on_toggle_cursor_perf(self, on: bool):
+        self.cursor_preview.show_perf = bool(on)
+        self.cursor_preview.meter.reset(); self.cursor_preview.update()
 
     def _init_debug_dock(self):
         dock = QDockWidget("Debug", self); dock.setObjectName("DebugDock")
@@ -226,6 +484,7 @@ class MainWindow(QMainWindow):
         grid = QGridLayout(w)
         r = 0
         self.chk_show_centers = QCheckBox("Show centers", w); grid.addWidget(self.chk_show_centers, r, 0, 1, 2); r += 1
+        self.chk_show_perf = QCheckBox("Show FPS / ms per paint", w); grid.addWidget(self.chk_show_perf, r, 0, 1, 2); r += 1
         grid.addWidget(QLabel("Sample digit:"), r, 0); self.sp_digit = QSpinBox(w); self.sp_digit.setRange(0,9); self.sp_digit.setValue(6); grid.addWidget(self.sp_digit, r, 1); r += 1
         self.chk_link_num = QCheckBox("Link number with circle", w); self.chk_link_num.setChecked(True); grid.addWidget(self.chk_link_num, r, 0, 1, 2); r += 1
 
@@ -261,6 +520,7 @@ class MainWindow(QMainWindow):
             self.std_preview.set_user_offsets(d)
             self.std_preview.set_debug_config({
                 "show_centers": self.chk_show_centers.isChecked(),
+                "show_perf": self.chk_show_perf.isChecked(),
                 "sample_digit": self.sp_digit.value()
             })
 
@@ -268,6 +528,7 @@ class MainWindow(QMainWindow):
             sb.valueChanged.connect(live_apply)
         self.chk_link_num.toggled.connect(live_apply)
         self.chk_show_centers.toggled.connect(live_apply)
+        self.chk_show_perf.toggled.connect(live_apply)
         self.sp_digit.valueChanged.connect(live_apply)
 
         def do_reset():
@@ -296,7 +557,7 @@ class MainWindow(QMainWindow):
         self._refresh_debug_panel_from_settings()
 
     def _refresh_debug_panel_from_settings(self):
-        if not hasattr(self, "sb_hit_x"): return
+        """当前皮肤保存过的偏移：总是应用到预览；调试面板已创建时同步到控件上。"""
         sid = self._skin_id()
         val = self.settings.value(f"std_offsets/{sid}", {})
         d = {}
@@ -315,6 +576,9 @@ class MainWindow(QMainWindow):
         d.setdefault("approach_dx", 0); d.setdefault("approach_dy", 0)
         d.setdefault("link_num", 1)
 
+        if self.debug_dock is None:
+            self.std_preview.set_user_offsets(d)
+            return
         self.sb_hit_x.setValue(d["hit_dx"]); self.sb_hit_y.setValue(d["hit_dy"])
         self.sb_ovl_x.setValue(d["ovl_dx"]); self.sb_ovl_y.setValue(d["ovl_dy"])
         self.sb_num_x.setValue(d["num_dx"]); self.sb_num_y.setValue(d["num_dy"])
@@ -335,6 +599,12 @@ class MainWindow(QMainWindow):
             self.resize(1280, 800)
 
     def closeEvent(self, event):
+        self.mania_preview.pause(); self.std_preview.pause()
+        for task in (self._load_task, self._preload_task, self._chart_task):
+            if task is not None:
+                task.cancel(); task.wait(2000)
+        if self.library_dock is not None:
+            self.library_dock.shutdown()
         # 仍保存窗口布局，但界面启动后会强制隐藏两个调试类面板
         self.settings.setValue("ui/geometry", self.saveGeometry())
         self.settings.setValue("ui/state", self.saveState())
@@ -391,6 +661,7 @@ class MainWindow(QMainWindow):
         self.settings_menu.setTitle(i18n.t("menu.settings", "Settings"))
         self.debug_menu.setTitle(i18n.t("menu.std_settings", "Std 设置(仍在开发中)"))
         self.mania_menu.setTitle(i18n.t("menu.mania_settings", "Mania 设置"))
+        self.cursor_menu.setTitle(i18n.t("menu.cursor", "Cursor"))
         self.recent_menu.setTitle(i18n.t("menu.recent_skins", "Recent skins"))
         self.lang_menu.setTitle(i18n.t("menu.language", "Language"))
         self.center_menu.setTitle(i18n.t("menu.centering", "Centering"))
@@ -400,6 +671,9 @@ class MainWindow(QMainWindow):
         self.assets_menu.setTitle(i18n.t('menu.assets', '皮肤文件小工具'))
         self.act_assets_images.setText(i18n.t('action.assets_images', '图片管理…'))
         self.act_assets_audio.setText(i18n.t('action.assets_audio', '音频管理…'))
+        self.act_storage_report.setText(i18n.t('action.storage_report', 'Duplicate Files Report…'))
+        self.act_optimize_png.setText(i18n.t('action.optimize_png', 'Optimize PNGs (Lossless)…'))
+        self.act_generate_sd.setText(i18n.t('action.generate_sd', 'Generate SD (non-@2x) Images…'))
 
         self.act_link_github.setText(i18n.t("links.github", "Github项目地址"))
         self.act_link_steam.setText(i18n.t("links.steam", "Steam个人主页"))
@@ -409,25 +683,51 @@ class MainWindow(QMainWindow):
         self.act_open.setText(i18n.t("action.open_skin_folder", "Open Skin Folder…"))
         self.act_open_osu.setText(i18n.t("action.open_osu_skins", "Open osu! Skins…"))
         self.act_open_last.setText(i18n.t("action.open_last_skin", "Open Last Skin"))
+        self.act_skin_library.setText(i18n.t("action.skin_library", "Skin Library"))
         self.act_reload.setText(i18n.t("action.reload", "Reload"))
+        self.act_hot_reload.setText(i18n.t("action.hot_reload", "Auto Hot Reload"))
+        self.act_import_osk.setText(i18n.t("action.import_osk", "Import .osk…"))
+        self.act_export_osk.setText(i18n.t("action.export_osk", "Export .osk…"))
         self.act_set_osu.setText(i18n.t("action.set_osu_folder", "Set osu! Folder…"))
         self.act_quit.setText(i18n.t("action.exit", "Exit"))
+        self.asset_list.set_placeholder(i18n.t("placeholder.filter_assets", "Filter assets…"))
         self.act_lang_en.setText(i18n.t("action.lang_en", "English"))
         self.act_lang_zh.setText(i18n.t("action.lang_zh", "简体中文"))
 
         # actions under menus
         self.act_debug_show.setText(i18n.t("action.debug_show", "显示 STD 调试面板"))
+        self.act_std_chart.setText(i18n.t("action.std_chart", "Load Beatmap (.osu)…"))
+        self.act_std_demo.setText(i18n.t("action.std_demo", "Play Generated Pattern"))
+        self.act_std_play.setText(i18n.t("action.mania_play", "Play"))
+        self.act_std_stop.setText(i18n.t("action.std_stop", "Close Beatmap"))
         self.act_mania_show.setText(i18n.t("action.mania_ini", "Mania INI 调试面板"))
+        self.act_mania_chart.setText(i18n.t("action.mania_chart", "Load Chart (.osu)…"))
+        self.act_mania_demo.setText(i18n.t("action.mania_demo", "Play Synthetic Pattern"))
+        self.act_mania_play.setText(i18n.t("action.mania_play", "Play"))
+        self.act_mania_stop.setText(i18n.t("action.mania_stop", "Close Chart"))
+        self.act_mania_speed.setText(i18n.t("action.mania_speed", "Scroll Speed…"))
+        self.act_mania_perf.setText(i18n.t("action.mania_perf", "Show FPS"))
+        self.act_cursor_record.setText(i18n.t("action.cursor_record", "Record Cursor Path"))
+        self.act_cursor_demo.setText(i18n.t("action.cursor_demo", "Play Generated Path"))
+        self.act_cursor_follow.setText(i18n.t("action.cursor_follow", "Follow Mouse"))
+        self.act_cursor_density.setText(i18n.t("action.cursor_density", "Trail Density…"))
+        self.act_cursor_perf.setText(i18n.t("action.mania_perf", "Show FPS"))
+        self.cursor_preview.hint_text = i18n.t("placeholder.cursor_hint", "Move the mouse here (Z / X / click to press)")
 
         # tabs
         self.tabs.setTabText(0, i18n.t("tab.std", "STD"))
         self.tabs.setTabText(1, i18n.t("tab.mania", "MANIA"))
+        self.tabs.setTabText(2, i18n.t("tab.cursor", "CURSOR"))
+
+        if self.library_dock is not None:
+            self.library_dock.retranslate()
 
         # propagate to Mania dock
-        try:
-            self.mania_ini_dock.retranslate()
-        except Exception:
-            pass
+        if self.mania_ini_dock is not None:
+            try:
+                self.mania_ini_dock.retranslate()
+            except Exception:
+                pass
 
     def on_change_language(self, code: str):
         i18n.load_language(code)
@@ -445,17 +745,32 @@ class MainWindow(QMainWindow):
         except Exception: return str(self.skin.root)
 
     def _load_osu_root(self) -> Path:
+        # 启动时只读设置；逐个盘符探测（掉线的网络盘能卡好几秒）留到真正需要时再做，见 _detect_osu_root
         val = self.settings.value("paths/osu_root","",str)
-        if val and Path(val).exists(): return Path(val)
+        return Path(val) if val else Path("")
+
+    def _detect_osu_root(self) -> Path:
         cands=[]; user=os.environ.get("USERPROFILE") or ""
         if user: cands+=[Path(user)/"AppData"/"Local"/"osu!"]
-        for d in "CDEFGHIJKLMNOPQRSTUVWXYZ": cands+=[Path(f"{d}:/osu!")]
+        if os.name == "nt":
+            drives = os.listdrives() if hasattr(os, "listdrives") else [f"{d}:\\" for d in "CDEFGHIJKLMNOPQRSTUVWXYZ"]
+            cands+=[Path(d)/"osu!" for d in drives]
         for p in cands:
             try:
                 if (p/"Skins").exists(): return p
             except Exception: pass
         return Path("")
 
+    def _osu_skins_dir(self, ask: bool = True):
+        """osu!/Skins；设置里没有就探测一次并记住，还找不到且 ask=True 时让用户选。"""
+        if not (self.osu_root and (self.osu_root/"Skins").exists()):
+            found = self._detect_osu_root()
+            if str(found) not in ("", "."): self._remember_osu_root(str(found))
+            elif ask: self.on_set_osu_root()
+        if self.osu_root and (self.osu_root/"Skins").exists():
+            return self.osu_root/"Skins"
+        return None
+
     def _start_dir_for_dialog(self) -> str:
         last=self.settings.value("paths/last_skin","",str)
         if last and Path(last).exists(): return last
@@ -481,10 +796,9 @@ class MainWindow(QMainWindow):
         if d: self.load_skin(d)
 
     def on_open_osu_skins(self):
-        if not (self.osu_root and (self.osu_root/"Skins").exists()):
-            self.on_set_osu_root()
-            if not (self.osu_root and (self.osu_root/"Skins").exists()): return
-        start=str(self.osu_root/"Skins"); d=QFileDialog.getExistingDirectory(self, i18n.t("dialog.select_osu_skin", "Select an osu! skin"), start)
+        skins=self._osu_skins_dir()
+        if skins is None: return
+        start=str(skins); d=QFileDialog.getExistingDirectory(self, i18n.t("dialog.select_osu_skin", "Select an osu! skin"), start)
         if d: self.load_skin(d)
 
     def on_open_last_skin(self):
@@ -500,42 +814,249 @@ class MainWindow(QMainWindow):
             self._remember_osu_root(d); self.statusBar().showMessage(i18n.t("status.osu_set", "osu! folder set: {path}").format(path=d), 5000)
 
     def load_skin(self, directory:str):
-        try: self.skin=self.loader.load(directory)
-        except Exception as e:
-            QMessageBox.critical(self,"Load Error",f"Failed to load skin: {e}"); return
-        self.asset_list.clear()
-        for name in sorted(self.skin.assets.keys()):
-            a=self.skin.assets[name]; self.asset_list.addItem(f"{name}  ({a.scale}x) - {a.path.name}")
-        self.std_preview.set_skin(self.skin); self.mania_preview.set_skin(self.skin)
-        # 让 Mania INI dock 知道当前皮肤根目录
+        """skin.ini 解析 + 素材发现放到后台线程；完成后先填素材列表，预览素材再由图片缓存异步解码、到一张画一张。
+        新的加载请求会取消还没完成的上一个（比如在 Recent 菜单里快速连点）。"""
+        if self._load_task is not None:
+            self._load_task.cancel()
+        if self._preload_task is not None:
+            self._preload_task.cancel()   # 别让预加载占着 loader 的锁
+        self.watcher.stop()
+        loader = self.loader
+        task = TaskThread(lambda progress, cancel: loader.load(directory, cancel), self)
+        task.t0 = time.perf_counter(); task.directory = directory
+        self._load_task = task
+        task.succeeded.connect(lambda skin, task=task: self._on_skin_loaded(task, directory, skin))
+        task.failed.connect(lambda msg, task=task: self._on_skin_load_failed(task, msg))
+        task.cancelled.connect(lambda task=task: self._on_skin_load_failed(task, None))
+        task.finished.connect(task.deleteLater)
+        self.statusBar().showMessage(i18n.t("status.loading", "Loading: {path}…").format(path=directory))
+        task.start()
+
+    def is_loading(self) -> bool:
+        return self._load_task is not None
+
+    def _on_skin_load_failed(self, task, msg):
+        if task is not self._load_task: return
+        self._load_task = None
+        self.statusBar().clearMessage()
+        if msg is not None:
+            QMessageBox.critical(self,"Load Error",f"Failed to load skin: {msg}")
+        self._watch_current_skin()
+
+    def _on_skin_loaded(self, task, directory:str, skin):
+        if task is not self._load_task: return   # 已被更新的请求取代
+        self._load_task = None
+        self.last_load_ms = (time.perf_counter() - task.t0) * 1000.0
+        self.skin = skin
+        self._fill_asset_list()
+        self.std_preview.set_skin(self.skin); self.mania_preview.set_skin(self.skin); self.cursor_preview.set_skin(self.skin)
+        # 让 Mania INI dock 知道当前皮肤根目录；面板还没创建时只把预览切到它会选中的键数
         try:
             root_path = getattr(self.skin, "root", None)
-            if root_path:
+            if root_path and self.mania_ini_dock is not None:
                 self.mania_ini_dock.set_skin_root(root_path)
+            elif root_path:
+                self._sync_mania_keys_without_dock(Path(root_path))
         except Exception:
             pass
         self.statusBar().showMessage(i18n.t("status.loaded", "Loaded: {path}").format(path=directory), 5000)
         self._remember_last_skin(directory)
         self._refresh_debug_panel_from_settings()
+        self._watch_current_skin()
+        self.skin_loaded.emit(skin)
+        pending, self._preload_after_load = self._preload_after_load, None
+        if pending is not None and Path(pending[0]) == Path(directory):
+            self._preload_skins(pending[1])
+
+    # ---------- hot reload ----------
+    def _watch_current_skin(self):
+        if not self.skin or not self.act_hot_reload.isChecked():
+            self.watcher.stop(); return
+        root = Path(self.skin.root)
+        self.watcher.watch(root, [p for n, a in self.skin.assets.items() if n in PREVIEW_ASSETS
+                                  for p in (a.path, a.sd_path) if p is not None])
+
+    def on_toggle_hot_reload(self, on: bool):
+        self.settings.setValue("ui/hot_reload", bool(on))
+        self._watch_current_skin()
+
+    def _fill_asset_list(self):
+        # model/view：一次性替换行数据，显示文本按需生成，几万个文件也不卡
+        self.asset_list.set_assets(self.skin.assets)
+
+    def _on_skin_files_changed(self, names, ini_changed: bool, t_first: float):
+        """Partial reload: re-parse skin.ini only if it changed, re-decode only changed sprites."""
+        if not self.skin: return
+        before = set(self.skin.assets.keys())
+        try:
+            changed = self.loader.refresh_assets(self.skin, names) if names else set()
+            if ini_changed:
+                self.loader.reload_ini(self.skin)
+        except Exception as e:
+            self.statusBar().showMessage(f"Hot reload failed: {e}", 5000); return
+        if set(self.skin.assets.keys()) != before:
+            self._fill_asset_list()
+        self.std_preview.update_assets(changed, ini_changed)
+        self.mania_preview.update_assets(changed, ini_changed)
+        self.cursor_preview.update_assets(changed, ini_changed)
+        self.watcher.add_files(p for n in changed if n in self.skin.assets
+                               for p in (self.skin.assets[n].path, self.skin.assets[n].sd_path) if p is not None)
+        cur = self.tabs.currentWidget()
+        if cur is not None: cur.repaint()
+        self.last_hot_reload_ms = (time.perf_counter() - t_first) * 1000.0
+        n = len(changed) + (1 if ini_changed else 0)
+        self.statusBar().showMessage(
+            i18n.t("status.hot_reload", "Hot reload: {n} file(s), {ms:.0f} ms").format(n=n, ms=self.last_hot_reload_ms), 3000)
+
+    def on_export_osk(self, slim: bool = False):
+        if not self.skin:
+            QMessageBox.information(self, "Export", i18n.t("dialog.no_skin", "Open a skin first.")); return
+        root = Path(self.skin.root)
+        start = str(root.parent / f"{root.name}{'.slim' if slim else ''}.osk")
+        out, _ = QFileDialog.getSaveFileName(self, i18n.t("dialog.export_osk", "Export .osk"), start, "osu! skin (*.osk)")
+        if not out: return
+        from core.osk_io import export_osk
+        title = i18n.t("action.export_osk", "Export .osk…")
+        self._osk_task = run_with_progress(
+            self, title,
+            lambda progress, cancel: export_osk(root, Path(out), progress=progress, cancel=cancel, slim=slim),
+            on_done=lambda p: self.statusBar().showMessage(i18n.t("status.exported", "Exported: {path}").format(path=p), 5000),
+            on_error=lambda msg: QMessageBox.critical(self, "Export", msg))
+
+    def on_storage_report(self):
+        """后台找出内容完全相同的文件，报告浪费的空间；可以直接导出精简 .osk。"""
+        if not self.skin:
+            QMessageBox.information(self, "Report", i18n.t("dialog.no_skin", "Open a skin first.")); return
+        from core.dedup import analyze_skin, format_size
+        root = Path(self.skin.root)
+        title = i18n.t("dialog.storage_report", "Duplicate Files")
+
+        def done(rep):
+            size = format_size(rep.bytes_scanned)
+            if not rep.groups:
+                QMessageBox.information(self, title, i18n.t("dialog.no_duplicates",
+                    "Scanned {files} file(s), {size}. No duplicate content found.").format(files=rep.files_scanned, size=size))
+                return
+            box = QMessageBox(QMessageBox.Information, title, i18n.t("dialog.duplicates_summary",
+                "Scanned {files} file(s), {size}.\n{groups} group(s) of identical files, {dups} redundant copies, {wasted} wasted.").format(
+                files=rep.files_scanned, size=size, groups=len(rep.groups), dups=rep.duplicate_files,
+                wasted=format_size(rep.wasted_bytes)), QMessageBox.Close, self)
+            box.setInformativeText(i18n.t("dialog.slim_note", ""))
+            box.setDetailedText("\n\n".join(
+                f"{format_size(g.wasted)}  ({len(g.files)} × {format_size(g.size)})\n" + "\n".join(f"  {a}" for _p, a in g.files)
+                for g in rep.groups))
+            slim = box.addButton(i18n.t("action.export_osk_slim", "Export Slim .osk…"), QMessageBox.ActionRole)
+            box.exec()
+            if box.clickedButton() is slim:
+                self.on_export_osk(slim=True)
+
+        self._dedup_task = run_with_progress(
+            self, title, lambda progress, cancel: analyze_skin(root, progress, cancel),
+            on_done=done, on_error=lambda msg: QMessageBox.critical(self, title, msg))
+
+    def on_optimize_png(self):
+        """原地无损重新压缩皮肤里的 PNG（进程池），报告每个文件省下的字节。"""
+        if not self.skin:
+            QMessageBox.information(self, "Optimize", i18n.t("dialog.no_skin", "Open a skin first.")); return
+        from core.dedup import format_size
+        from core.png_optimize import optimize_skin
+        root = Path(self.skin.root)
+        title = i18n.t("dialog.optimize_png", "Optimize PNGs")
+        r = QMessageBox.question(self, title, i18n.t("dialog.optimize_confirm",
+            "Losslessly recompress every PNG in {path}?\nFiles are only replaced when the result is smaller and pixel-identical.").format(path=root),
+            QMessageBox.Yes | QMessageBox.No)
+        if r != QMessageBox.Yes: return
+
+        def done(results):
+            changed = sorted((x for x in results if x.changed), key=lambda x: -x.saved)
+            bad = [x for x in results if not x.ok]
+            box = QMessageBox(QMessageBox.Warning if bad else QMessageBox.Information, title, i18n.t("dialog.optimize_summary",
+                "{changed} of {files} PNG(s) recompressed, {saved} saved.").format(
+                changed=len(changed), files=len(results), saved=format_size(sum(x.saved for x in results))), QMessageBox.Close, self)
+            lines = [f"-{format_size(x.saved):>10}  {x.mode:<4} {x.path.relative_to(root).as_posix()}" for x in changed]
+            lines += [f"! {x.path.relative_to(root).as_posix()}: {x.error}" for x in bad]
+            if lines: box.setDetailedText("\n".join(lines))
+            box.exec()
+
+        self._optimize_task = run_with_progress(
+            self, title, lambda progress, cancel: optimize_skin(root, progress, cancel),
+            on_done=done, on_error=lambda msg: QMessageBox.critical(self, title, msg))
+
+    def on_generate_sd(self):
+        """给每个 @2x 补出 / 更新 SD 版本（后台进程池）；完成后按热重载刷新，预览改读 SD 原图。"""
+        if not self.skin:
+            QMessageBox.information(self, "SD", i18n.t("dialog.no_skin", "Open a skin first.")); return
+        from core.image_batch import generate_sd_variants
+        root = Path(self.skin.root)
+        title = i18n.t("dialog.generate_sd", "Generate SD Images")
+
+        def done(results):
+            if not results:
+                QMessageBox.information(self, title, i18n.t("dialog.generate_sd_none", "All SD images are up to date.")); return
+            bad = [r for r in results if not r.ok]
+            box = QMessageBox(QMessageBox.Warning if bad else QMessageBox.Information, title, i18n.t("dialog.generate_sd_summary",
+                "{ok} SD image(s) written, {failed} failed.").format(ok=len(results) - len(bad), failed=len(bad)), QMessageBox.Close, self)
+            if bad: box.setDetailedText("\n".join(f"{r.src.name}: {r.error}" for r in bad))
+            box.exec()
+            if self.skin and Path(self.skin.root) == root:
+                self._on_skin_files_changed({DIR_CHANGED}, False, time.perf_counter())
+
+        self._sd_task = run_with_progress(
+            self, title, lambda progress, cancel: generate_sd_variants(root, progress, cancel),
+            on_done=done, on_error=lambda msg: QMessageBox.critical(self, title, msg))
+
+    def on_import_osk(self):
+        start = str(self.osu_root) if self.osu_root and str(self.osu_root) else os.path.expanduser("~")
+        src, _ = QFileDialog.getOpenFileName(self, i18n.t("dialog.import_osk", "Import .osk"), start, "osu! skin (*.osk *.zip)")
+        if not src: return
+        src = Path(src)
+        skins = self._osu_skins_dir(ask=False)
+        if skins is not None:
+            dest = skins/src.stem
+        else:
+            dest = src.with_suffix("")
+        from core.osk_io import import_osk
+        if dest.exists() and any(dest.iterdir()):
+            r = QMessageBox.question(self, i18n.t("dialog.import_osk", "Import .osk"),
+                                     i18n.t("dialog.import_overwrite", "{path} already exists. Overwrite files in it?").format(path=dest),
+                                     QMessageBox.Yes | QMessageBox.No)
+            if r != QMessageBox.Yes: return
+
+        def first_ready(d):
+            # skin.ini + 预览素材已经落盘：先把皮肤显示出来，其余文件由热重载逐步补上
+            if (Path(d)/"skin.ini").exists():
+                self.load_skin(str(d))
+
+        def refresh(d):
+            if self.skin and Path(self.skin.root) == Path(d):
+                self._on_skin_files_changed({DIR_CHANGED}, False, time.perf_counter())
+
+        def done(d):
+            if self.is_loading() and Path(self._load_task.directory) == Path(d):
+                # first_ready 发起的加载还没完成（它的素材发现可能早于解压结束）：加载完再补扫一遍
+                def after_load(_skin):
+                    self.skin_loaded.disconnect(after_load); refresh(d)
+                self.skin_loaded.connect(after_load)
+            else:
+                refresh(d)
+            self.statusBar().showMessage(i18n.t("status.imported", "Imported: {path}").format(path=d), 5000)
+
+        title = i18n.t("action.import_osk", "Import .osk…")
+        self._osk_task = run_with_progress(
+            self, title,
+            lambda progress, cancel, emit: import_osk(src, dest, progress=progress, cancel=cancel, on_first_ready=emit),
+            on_done=done, on_partial=first_ready, modal=False,
+            on_error=lambda msg: QMessageBox.critical(self, "Import", msg))
 
     def reload_skin(self):
         if not self.skin: return
         self.load_skin(str(self.skin.root))
 
 
-    def _toggle_mania_ini(self, on: bool):
-        # Lazily create dock
-        if self.mania_ini_dock is None:
-            try:
-                from ui.mania_ini_dock import ManiaIniDock
-            except Exception:
-                return
-            self.mania_ini_dock = ManiaIniDock(self)
-            self.addDockWidget(Qt.RightDockWidgetArea, self.mania_ini_dock)
-            # Do not show by default
-            self.mania_ini_dock.hide()
-            # Connect preview lane update
-            if hasattr(self, 'mania_preview') and hasattr(self.mania_preview, 'set_keys'):
-                self.mania_ini_dock.keys_changed.connect(self.mania_preview.set_keys)
-        self.mania_ini_dock.setVisible(on)
-        self.act_mania_ini.setChecked(on)
+    def _sync_mania_keys_without_dock(self, root: Path):
+        # 与 ManiaIniDock.set_skin_root 的默认选择一致：skin.ini 里最小的 Keys
+        from core.skin_ini import SkinIni
+        ini = root / "skin.ini"
+        keys = SkinIni.read(ini).available_mania_keys() if ini.exists() else []
+        if keys:
+            self._apply_mania_keys(keys[0])
@@ -470,7 +470,7 @@ class ManiaIniDock(QDockWidget):
         ts = datetime.now().strftime("%Y%m%d-%H%M%S")
         dst = d / f"skin.ini.{ts}.bak"
         try:
-            dst.write_text(ini.read_text(encoding="utf-8"), encoding="utf-8")
+            dst.write_bytes(ini.read_bytes())
         except Exception:
             pass
 
@@ -546,7 +546,8 @@ class ManiaIniDock(QDockWidget):
         if not bak.exists():
             QMessageBox.information(self, "Restore", "No backup (.bak) found yet."); return
         try:
-            ini.write_text(bak.read_text(encoding="utf-8"), encoding="utf-8")
+            # .bak 是原文件的原始字节（可能是 UTF-16 / GBK），原样写回
+            ini.write_bytes(bak.read_bytes())
             self._skin_ini = SkinIni.read(ini)
             # keep current K
             curk = self._current_view_k
@@ -637,7 +638,7 @@ class ManiaIniDock(QDockWidget):
         ini = self._resolve_ini_path()
         if not ini or not path.exists(): return
         try:
-            ini.write_text(path.read_text(encoding="utf-8"), encoding="utf-8")
+            ini.write_bytes(path.read_bytes())
             self._skin_ini = SkinIni.read(ini)
             # keep current K
             curk = self._current_view_k
@@ -665,7 +666,7 @@ class ManiaIniDock(QDockWidget):
         r = QMessageBox.question(self, "Overwrite", f"确定要用当前 skin.ini 覆盖：\n{target.name} ？", QMessageBox.Yes | QMessageBox.No)
         if r != QMessageBox.Yes: return
         try:
-            target.write_text(ini.read_text(encoding="utf-8"), encoding="utf-8")
+            target.write_bytes(ini.read_bytes())
             QMessageBox.information(self, "Overwrite", "已覆盖选中的快照。")
         except Exception as e:
             QMessageBox.warning(self, "Overwrite", f"失败：{e}")
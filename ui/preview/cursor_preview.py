@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+光标预览：cursor / cursortrail / cursormiddle 跟着鼠标（或录下的轨迹）走。
+- [General] 的 CursorExpand（按下放大）、CursorRotate / CursorTrailRotate（旋转）、CursorCentre（中心 / 左上角对齐）；
+- 皮肤有 cursormiddle 时拖尾是连续的：按移动距离每隔半个拖尾宽度补一个片段；否则每帧在当前位置放 trail_density 个；
+- 拖尾片段存在 core.cursor_trail.TrailRing 的定长数组里，每帧向量化算年龄 / 透明度，不逐段建对象；
+- 精灵按 (角色, 缩放, dpr) 预缩放缓存，旋转的拖尾再按量化后的角度缓存预先转好的帧；frame_stats 记录片段数、更新耗时和绘制耗时，show_perf 时叠加显示。
+鼠标左右键 / Z / X 算按下；录制时逐帧记位置和按键，停止后循环回放。
+"""
+from __future__ import annotations
+import math
+import time
+from typing import Optional
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QPen, QColor, QPixmap
+from PySide6.QtCore import Qt, QTimer, QElapsedTimer, QPointF, Signal
+
+from core.cursor_trail import TRAIL_FADE_MS, PathRecorder, TrailRing
+from ui.image_cache import image_cache
+from ui.preview.perf import PaintMeter
+from ui.preview.playback import PlaybackClock
+
+CURSOR_SPRITES = ("cursor", "cursortrail", "cursormiddle")
+FRAME_MS = 16
+EXPAND_SCALE = 1.3          # CursorExpand：按下时放大到这么多
+EXPAND_MS = 100.0
+ROTATE_DEG_PER_MS = 0.036   # CursorRotate：10 秒一圈
+# 旋转的拖尾片段按角度量化成多少档；每档一张预先转好的帧，绘制时不再逐段做变换
+ROTATE_STEPS = 64
+
+
+def _flag(val, default: bool) -> bool:
+    if val is None: return default
+    return str(val).strip().lower() in ("1", "true", "yes", "on")
+
+
+class CursorPreview(QWidget):
+    recording_changed = Signal(bool)
+    path_changed = Signal(object)       # 新轨迹；None = 回到跟随鼠标
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMouseTracking(True); self.setFocusPolicy(Qt.StrongFocus)
+        self.skin = None
+        self._gen = 0
+        self._src = {}                  # 角色 -> 解码好的 SD 源图
+        self._scaled = {}               # (角色, 缩放, dpr[, 角度档位]) -> 预缩放（预旋转）的精灵；缩放 / dpr 变了整个丢掉
+        self._scaled_size = None
+        self.expand = True; self.rotate = True; self.trail_rotate = True; self.centre = True
+        self.trail_density = 1          # 非连续拖尾每帧放几个片段；连续拖尾时按比例缩小间距
+        self._ring: Optional[TrailRing] = None      # 第一次要画拖尾时才建（会带进 NumPy）
+        self.path = None                # core.cursor_trail.CursorPath；None = 跟随鼠标
+        self.clock = PlaybackClock()
+        self._recorder: Optional[PathRecorder] = None
+        self._elapsed = QElapsedTimer(); self._elapsed.start()
+        self._now = 0.0
+        self._pos = QPointF(-1, -1)     # 当前光标位置（控件像素）；x < 0 表示还没进过控件
+        self._last = None               # 上一个拖尾片段的位置（连续拖尾从这里补点）
+        self._down = False; self._down_t = -1e9; self._up_t = -1e9
+        self._keys = set()
+        self.meter = PaintMeter()
+        self.show_perf = False
+        self.hint_text = ""             # 还没有光标时居中显示的提示（MainWindow 按语言设置）
+        self.frame_stats = {"segments": 0, "update_ms": 0.0, "draw_ms": 0.0}
+        self._timer = QTimer(self); self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(FRAME_MS); self._timer.timeout.connect(self.tick)
+
+    # ---------- skin ----------
+    def set_skin(self, skin):
+        self.skin = skin
+        self._load_ini_settings(); self._load_sprites()
+        self.update()
+
+    def update_assets(self, names, ini_changed: bool = False):
+        if not self.skin: return
+        if ini_changed: self._load_ini_settings()
+        if set(names or ()) & set(CURSOR_SPRITES): self._load_sprites()
+        self.update()
+
+    def _load_ini_settings(self):
+        vals = {}
+        if self.skin and self.skin.ini:
+            for sec in self.skin.ini.sections():
+                if sec.lower() not in ("general", "generalsettings"): continue
+                for key in ("CursorExpand", "CursorRotate", "CursorTrailRotate", "CursorCentre"):
+                    if key in vals: continue
+                    try: v = self.skin.ini.get(sec, key, fallback=None)
+                    except Exception: v = None
+                    if v is not None: vals[key] = v
+        self.expand = _flag(vals.get("CursorExpand"), True)
+        self.rotate = _flag(vals.get("CursorRotate"), True)
+        self.trail_rotate = _flag(vals.get("CursorTrailRotate"), True)
+        self.centre = _flag(vals.get("CursorCentre"), True)
+
+    def _load_sprites(self):
+        """后台解码三张光标素材，到一张画一张；换皮肤后旧的回调按代次丢弃。"""
+        self._gen += 1; gen = self._gen
+        self._src.clear(); self._scaled.clear(); self._clear_trail()
+        if not self.skin: return
+        for name in CURSOR_SPRITES:
+            a = self.skin.assets.get(name)
+            if a is None: continue
+            image_cache().request(*a.preview_source(), lambda pm, name=name, gen=gen: self._on_sprite(gen, name, pm))
+
+    def _on_sprite(self, gen, name, pm):
+        if gen != self._gen or pm is None: return
+        self._src[name] = pm
+        self._scaled = {k: v for k, v in self._scaled.items() if k[0] != name}
+        self.update()
+
+    @property
+    def continuous(self) -> bool:
+        """有 cursormiddle 的皮肤拖尾是连续的（与游戏一致）。"""
+        return "cursormiddle" in self._src
+
+    def set_trail_density(self, n: int):
+        self.trail_density = max(1, int(n)); self._clear_trail()
+
+    @property
+    def ring(self) -> TrailRing:
+        if self._ring is None: self._ring = TrailRing()
+        return self._ring
+
+    def _clear_trail(self):
+        if self._ring is not None: self._ring.clear()
+        self._last = None
+
+    # ---------- source ----------
+    def set_path(self, path):
+        """回放录下 / 生成的轨迹（循环）；None 回到跟随鼠标。"""
+        self.stop_recording()
+        self.path = path if path is not None and path.ts else None
+        self._clear_trail()
+        if self.path is not None:
+            self.clock.loop_start = 0.0; self.clock.loop_end = self.path.duration
+            self.clock.seek(0.0); self.clock.start()
+        else:
+            self.clock.pause()
+        self.path_changed.emit(self.path)
+
+    def is_recording(self) -> bool:
+        return self._recorder is not None
+
+    def start_recording(self):
+        if self.is_recording(): return
+        if self.path is not None: self.set_path(None)
+        self._recorder = PathRecorder(); self.recording_changed.emit(True)
+
+    def stop_recording(self):
+        """停止录制并开始回放录下的轨迹；什么都没录到时回到跟随鼠标。"""
+        rec = self._recorder
+        if rec is None: return
+        self._recorder = None; self.recording_changed.emit(False)
+        path = rec.stop()
+        if len(path.ts) >= 2: self.set_path(path)
+
+    # ---------- input ----------
+    def mouseMoveEvent(self, e):
+        self._pos = e.position(); self.update()
+
+    def leaveEvent(self, e):
+        if self.path is None: self._pos = QPointF(-1, -1); self._last = None
+        super().leaveEvent(e)
+
+    def mousePressEvent(self, e):
+        self._pos = e.position(); self._press(("mouse", e.button()), True)
+
+    def mouseReleaseEvent(self, e):
+        self._press(("mouse", e.button()), False)
+
+    def keyPressEvent(self, e):
+        if e.key() in (Qt.Key_Z, Qt.Key_X) and not e.isAutoRepeat(): self._press(("key", e.key()), True)
+        else: super().keyPressEvent(e)
+
+    def keyReleaseEvent(self, e):
+        if e.key() in (Qt.Key_Z, Qt.Key_X) and not e.isAutoRepeat(): self._press(("key", e.key()), False)
+        else: super().keyReleaseEvent(e)
+
+    def _press(self, key, down: bool):
+        if down: self._keys.add(key)
+        else: self._keys.discard(key)
+        self._set_down(bool(self._keys), self._now)
+
+    def _set_down(self, down: bool, now: float):
+        if down == self._down: return
+        self._down = down
+        if down: self._down_t = now
+        else: self._up_t = now
+
+    # ---------- frame ----------
+    def showEvent(self, e):
+        self._timer.start(); super().showEvent(e)
+
+    def hideEvent(self, e):
+        self._timer.stop(); super().hideEvent(e)
+
+    def tick(self):
+        self.advance(float(self._elapsed.elapsed())); self.update()
+
+    def advance(self, now: float):
+        """推进到 now（ms）：取这一帧的光标位置 / 按键，录制，按拖尾模式往环形缓冲里写片段。"""
+        self._now = now
+        if self.path is not None:
+            fx, fy, down = self.path.at(self.clock.position())
+            self._pos = QPointF(fx * self.width(), fy * self.height()); self._set_down(down, now)
+        x, y = self._pos.x(), self._pos.y()
+        if x < 0: return
+        if self._recorder is not None:
+            self._recorder.add(now, x / max(1, self.width()), y / max(1, self.height()), self._down)
+        if self.continuous:
+            tw = self._sprite_size("cursortrail")
+            if self._last is None:
+                self.ring.push(x, y, now); self._last = (x, y); return
+            lx, ly = self._last
+            n = int(math.hypot(x - lx, y - ly) / max(1.0, tw / (2.0 * self.trail_density)))
+            if n > 0:
+                self.ring.push_segment(lx, ly, x, y, now, n); self._last = (x, y)
+        else:
+            lx, ly = self._last if self._last is not None else (x, y)
+            self.ring.push_segment(lx, ly, x, y, now, self.trail_density); self._last = (x, y)
+
+    def _scale(self) -> float:
+        """SD 像素 -> 控件像素：与 std 预览一样按 640x480 的画面等比缩放。"""
+        return min(self.width() / 640.0, self.height() / 480.0)
+
+    def _sprite(self, role: str) -> Optional[QPixmap]:
+        src = self._src.get(role)
+        if src is None: return None
+        dpr = self.devicePixelRatioF(); k = self._scale()
+        if (round(k * 1000), dpr) != self._scaled_size:
+            self._scaled.clear(); self._scaled_size = (round(k * 1000), dpr)
+        key = (role, round(k * 1000), dpr)
+        pm = self._scaled.get(key)
+        if pm is None:
+            pm = src.scaled(max(1, round(src.width() * k * dpr)), max(1, round(src.height() * k * dpr)),
+                            Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            pm.setDevicePixelRatio(dpr); self._scaled[key] = pm
+        return pm
+
+    def _rotated(self, role: str, step: int) -> Optional[QPixmap]:
+        """按中心旋转 step 档后的精灵；画布放大到能装下任意角度，中心不变。"""
+        pm = self._sprite(role)
+        if pm is None: return None
+        key = (role, round(self._scale() * 1000), pm.devicePixelRatio(), step)
+        out = self._scaled.get(key)
+        if out is None:
+            side = math.ceil(math.hypot(pm.width(), pm.height()))
+            out = QPixmap(side, side); out.fill(Qt.transparent)
+            q = QPainter(out); q.setRenderHint(QPainter.SmoothPixmapTransform, True)
+            q.translate(side / 2, side / 2); q.rotate(step * 360.0 / ROTATE_STEPS)
+            q.drawPixmap(QPointF(-pm.width() / 2, -pm.height() / 2), pm); q.end()
+            out.setDevicePixelRatio(pm.devicePixelRatio()); self._scaled[key] = out
+        return out
+
+    def _sprite_size(self, role: str) -> float:
+        pm = self._sprite(role)
+        return pm.width() / pm.devicePixelRatio() if pm is not None else 16.0
+
+    def _expand_factor(self) -> float:
+        if not self.expand: return 1.0
+        if self._down: f = min(1.0, (self._now - self._down_t) / EXPAND_MS)
+        else: f = max(0.0, 1.0 - (self._now - self._up_t) / EXPAND_MS)
+        return 1.0 + (EXPAND_SCALE - 1.0) * f
+
+    def _draw(self, p: QPainter, pm: QPixmap, x: float, y: float, scale: float = 1.0, angle: float = 0.0):
+        w = pm.width() / pm.devicePixelRatio(); h = pm.height() / pm.devicePixelRatio()
+        ox, oy = (-w / 2, -h / 2) if self.centre else (0.0, 0.0)
+        if scale == 1.0 and angle == 0.0:
+            p.drawPixmap(QPointF(x + ox, y + oy), pm); return
+        p.save(); p.translate(x, y); p.rotate(angle); p.scale(scale, scale)
+        p.drawPixmap(QPointF(ox, oy), pm); p.restore()
+
+    def paintEvent(self, e):
+        self.meter.begin()
+        p = QPainter(self); p.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        p.fillRect(self.rect(), Qt.black)
+        t0 = time.perf_counter()
+        xs, ys, alphas = self._ring.live(self._now, TRAIL_FADE_MS) if self._ring is not None else ([], [], [])
+        t1 = time.perf_counter()
+        trail = self._sprite("cursortrail")
+        if trail is not None and xs:
+            if self.trail_rotate and self.rotate and self.centre:
+                # 每个片段按生成时的光标角度转：角度只和时间有关，按年龄（1 - 透明度）倒推，再量化取预转好的帧
+                per_step = 360.0 / ROTATE_STEPS
+                for x, y, a in zip(xs, ys, alphas):
+                    step = int((self._now - (1.0 - a) * TRAIL_FADE_MS) * ROTATE_DEG_PER_MS / per_step) % ROTATE_STEPS
+                    pm = self._rotated("cursortrail", step)
+                    w = pm.width() / pm.devicePixelRatio()
+                    p.setOpacity(a); p.drawPixmap(QPointF(x - w / 2, y - w / 2), pm)
+            else:
+                w = trail.width() / trail.devicePixelRatio(); h = trail.height() / trail.devicePixelRatio()
+                ox, oy = (w / 2, h / 2) if self.centre else (0.0, 0.0)
+                for x, y, a in zip(xs, ys, alphas):
+                    p.setOpacity(a); p.drawPixmap(QPointF(x - ox, y - oy), trail)
+            p.setOpacity(1.0)
+        x, y = self._pos.x(), self._pos.y()
+        if x >= 0:
+            angle = self._now * ROTATE_DEG_PER_MS % 360.0 if self.rotate else 0.0
+            scale = self._expand_factor()
+            cursor = self._sprite("cursor")
+            if cursor is not None: self._draw(p, cursor, x, y, scale, angle)
+            middle = self._sprite("cursormiddle")
+            if middle is not None: self._draw(p, middle, x, y)       # cursormiddle 不放大也不转
+        st = self.frame_stats
+        st["segments"] = len(xs); st["update_ms"] = (t1 - t0) * 1000.0; st["draw_ms"] = (time.perf_counter() - t1) * 1000.0
+        if self.show_perf:
+            p.setPen(QPen(QColor(0, 255, 0, 220), 1))
+            p.drawText(8, 16, f"{self.meter.text()}  trail: {st['segments']}  "
+                              f"update {st['update_ms']:.2f} ms  draw {st['draw_ms']:.2f} ms")
+        elif x < 0 and self.path is None:
+            p.setPen(QColor(160, 160, 160))
+            p.drawText(self.rect(), Qt.AlignCenter, self.hint_text)
+        p.end()
+        self.meter.end()
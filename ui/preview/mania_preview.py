@@ -1,56 +1,212 @@
 # -*- coding: utf-8 -*-
+"""
+Mania 预览：按皮肤真实的 note / key / stage 素材逐列绘制。
+- 每列用哪张图：[Mania] 段里的 NoteImage{i}(H/L/T)、KeyImage{i}、StageLeft/StageRight/StageHint，
+  没写就用默认的 mania-note1/2/S、mania-key1/2/S（按列的 1/2/S 花样）和 mania-stage-*；都没有时画灰色占位。
+- 坐标按 osu! 的 480 高逻辑像素：ColumnStart / ColumnWidth / ColumnSpacing / ColumnLineWidth / HitPosition。
+- 几何（列 x、宽度、判定线）只在 set_skin / set_keys / 热重载 skin.ini / 尺寸变化时重算；
+- 每张精灵按 (keys, 列, 角色) 预先缩放到该列宽度缓存；列背景、分隔线、stage、key 合成一张底图，
+  paintEvent 里只剩几次 drawPixmap，18K 也一样便宜。
+- 回放：load_chart 载入 core.beatmap.ManiaChart（.osu 或合成谱），按滚动速度朝 HitPosition 滚动。
+  每帧每列用 bisect 找出可见窗口里的物件；长条身体是预先平铺好的一段竖条，按长度重复 blit，不逐帧缩放。
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
 from PySide6.QtWidgets import QWidget
-from PySide6.QtGui import QPainter, QPen, QBrush, QColor, QFont
-from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QPainter, QPen, QColor, QPixmap
+from PySide6.QtCore import Qt, QRectF, QPointF, QTimer, Signal
 
-from pathlib import Path
+from ui.image_cache import image_cache
+from ui.preview.perf import PaintMeter
+from ui.preview.playback import PlaybackClock
 
 # Optional: use SkinIni to read mania layout if available
 try:
-    from core.skin_ini import SkinIni, parse_list_csv
+    from core.skin_ini import SkinIni
 except Exception:
     SkinIni = None
-    parse_list_csv = lambda s: []
+
+PLAYFIELD_H = 480.0     # osu! 逻辑坐标的高度
+PLAYFIELD_W = 640.0
+DEFAULT_COLUMN_START = 136
+DEFAULT_COLUMN_WIDTH = 30
+DEFAULT_HIT_POSITION = 402
+# 预览里放几个静态音符：第 i 列的音符离判定线 (i % NOTE_ROWS + 1) * 行距
+NOTE_ROWS = 5
+# 滚动速度与 osu! 的 1..40 对应：音符从顶端落到判定线用 SCROLL_TIME_MAX / 速度 毫秒（与 lazer 的换算一致）
+SCROLL_TIME_MAX = 11485.0
+DEFAULT_SCROLL_SPEED = 25
+FRAME_MS = 16
+KEY_GRACE_MS = 60       # 单点按下后 key 保持按下状态的时长
+BODY_STRIP_PX = 512     # 长条身体预平铺竖条的目标高度（设备像素）
+
+
+def column_style(k: int, col: int) -> str:
+    """默认素材的列花样：左右对称交替 1/2，奇数键的正中间是 S。例：4K -> 1 2 2 1，7K -> 1 2 1 S 1 2 1。"""
+    if k % 2 == 1 and col == k // 2:
+        return "S"
+    half = col if col < k / 2 else k - 1 - col
+    return "1" if half % 2 == 0 else "2"
+
+
+def _ints(v, n: int, fill: int) -> List[int]:
+    """逗号分隔的整数列表，补齐 / 截断到 n 个（不足时重复最后一个值）。"""
+    vals: List[int] = []
+    for part in str(v or "").split(","):
+        try: vals.append(int(float(part.strip())))
+        except ValueError: break
+    if not vals: vals = [fill]
+    while len(vals) < n: vals.append(vals[-1])
+    return vals[:n]
+
+
+def _rgba(v) -> Optional[QColor]:
+    parts = [p.strip() for p in str(v or "").split(",") if p.strip()]
+    try:
+        vals = [max(0, min(255, int(p))) for p in parts[:4]]
+    except ValueError:
+        return None
+    if len(vals) < 3: return None
+    return QColor(*vals[:3], vals[3] if len(vals) > 3 else 255)
+
+
+@dataclass
+class _Geometry:
+    keys: int
+    scale: float                    # 逻辑像素 -> 控件像素
+    xs: List[float]                 # 每列左边 x
+    widths: List[float]             # 每列宽度（控件像素）
+    line_xs: List[float]            # 分隔线 x（k+1 条）
+    line_ws: List[float]
+    hit_y: float
+    left: float
+    right: float
+    colours: List[Optional[QColor]] = field(default_factory=list)
+
 
 class ManiaPreview(QWidget):
-    """Simple mania lanes preview that respects current keys (K).
+    """Mania lanes preview rendered with the skin's own sprites.
 
     API expected by MainWindow:
       - set_skin(skin)
       - set_keys(k)
+      - update_assets(names, ini_changed)
+      - load_chart(chart) / clear_chart() / play() / pause() / set_scroll_speed(speed)
     """
+    playing_changed = Signal(bool)
+    chart_changed = Signal(object)      # 新谱面；None = 回到静态预览
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumSize(800, 520)
         self.skin = None
         self.skin_ini = None
         self.keys = 7
-        self.layout = {
-            "ColumnStart": None,
-            "ColumnRight": None,
-            "ColumnWidth": [],
-            "ColumnSpacing": [],
-            "ColumnLineWidth": [],
-            "HitPosition": None,
-            "WidthForNoteHeightScale": None,
-        }
+        self.cfg: Dict[str, str] = {}       # 当前 K 的 [Mania] 段（key 小写）
+        self.layout = {}
+        self._geom: Optional[_Geometry] = None
+        # (keys, 列, 角色, 路径, 目标宽度) -> 预缩放的精灵；尺寸变化时整体丢弃
+        self._sprites: Dict[tuple, Optional[QPixmap]] = {}
+        self._paths: Dict[str, Optional[Path]] = {}  # 素材引用 -> 实际文件（None = 不存在）
+        self._layer: Optional[QPixmap] = None       # 静态底图
+        self._ops: List[tuple] = []                  # 每帧要画的 (目标矩形, pixmap)
+        self.meter = PaintMeter()
+        self.show_perf = False
+        # 回放
+        self.chart = None                            # core.beatmap.ManiaChart
+        self.scroll_speed = DEFAULT_SCROLL_SPEED
+        self.clock = PlaybackClock()
+        self._timer = QTimer(self); self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(FRAME_MS); self._timer.timeout.connect(self.update)
+        self._drawn = 0                              # 上一帧画了多少个物件
 
     # ------- public API -------
     def set_skin(self, skin):
         self.skin = skin
+        self._paths.clear(); self._sprites.clear()
         self._load_skin_ini()
         self._load_layout_for_keys(self.keys)
         self.update()
 
+    def update_assets(self, names, ini_changed: bool = False):
+        """热重载：skin.ini 变了重排；mania 素材变了丢掉对应的预缩放缓存。"""
+        names = set(names or ())
+        if ini_changed:
+            self._load_skin_ini()
+        if ini_changed or any(n.lower().startswith("mania") for n in names):
+            self._paths.clear(); self._sprites.clear()
+            self._load_layout_for_keys(self.keys)
+        self.update()
+
     def set_keys(self, k: int):
         """Called by MainWindow when ManiaIniDock emits keys_changed."""
         try:
             self.keys = max(1, int(k))
         except Exception:
             self.keys = 7
+        if self.chart is not None and self.chart.keys != self.keys:
+            self.clear_chart()      # 键数对不上的谱没法画，回到静态预览
         self._load_layout_for_keys(self.keys)
         self.update()
 
+    # ------- playback -------
+    def load_chart(self, chart, play: bool = True):
+        """载入谱面并切到它的键数；从第一个物件前一秒开始，播完后循环。"""
+        self.pause()
+        self.chart = chart
+        if chart.keys != self.keys:
+            self.keys = chart.keys
+            self._load_layout_for_keys(self.keys)
+        self.clock.set_range(chart.first, chart.duration)
+        self.meter.reset()
+        self.chart_changed.emit(chart)
+        if play: self.play()
+        self.update()
+
+    def clear_chart(self):
+        self.pause()
+        if self.chart is None: return
+        self.chart = None
+        self.chart_changed.emit(None)
+        self.update()
+
+    def is_playing(self) -> bool:
+        return self.clock.running
+
+    def play(self):
+        if self.chart is None or self.is_playing(): return
+        self.clock.start()
+        self._timer.start()
+        self.playing_changed.emit(True)
+
+    def pause(self):
+        if not self.is_playing(): return
+        self.clock.pause()
+        self._timer.stop()
+        self.playing_changed.emit(False)
+
+    def toggle_play(self):
+        self.pause() if self.is_playing() else self.play()
+
+    def seek(self, ms: float):
+        self.clock.seek(ms)
+        self.update()
+
+    def position(self) -> float:
+        """当前谱面时间（ms）。"""
+        return self.clock.position()
+
+    def set_scroll_speed(self, speed: int):
+        self.scroll_speed = max(1, min(40, int(speed)))
+        self.update()
+
+    def scroll_time(self) -> float:
+        """音符从顶端落到判定线要多少毫秒。"""
+        return SCROLL_TIME_MAX / self.scroll_speed
+
     # ------- internals -------
     def _skin_root(self):
         try:
@@ -70,124 +226,281 @@ class ManiaPreview(QWidget):
                     self.skin_ini = None
 
     def _load_layout_for_keys(self, k: int):
-        """Read layout from skin.ini if present; otherwise fallback to equal lanes."""
-        lay = {**self.layout}
-        if self.skin_ini and hasattr(self.skin_ini, "mania_get"):
-            try:
-                d = self.skin_ini.mania_get(int(k))
-                lay["ColumnStart"] = self._int_or_none(d.get("ColumnStart"))
-                lay["ColumnRight"] = self._int_or_none(d.get("ColumnRight"))
-                lay["HitPosition"] = self._int_or_none(d.get("HitPosition"))
-                lay["WidthForNoteHeightScale"] = self._int_or_none(d.get("WidthForNoteHeightScale"))
-                lay["ColumnWidth"] = self._list_of_ints(d.get("ColumnWidth"), fallback_len=int(k), fill=40)
-                lay["ColumnSpacing"] = self._list_of_ints(d.get("ColumnSpacing"), fallback_len=max(int(k)-1,0), fill=6)
-                lay["ColumnLineWidth"] = self._list_of_ints(d.get("ColumnLineWidth"), fallback_len=int(k)+1, fill=1)
-            except Exception:
-                # Fallback
-                lay["ColumnWidth"] = [40]*int(k)
-                lay["ColumnSpacing"] = [6]*(max(int(k)-1,0))
-                lay["ColumnLineWidth"] = [1]*(int(k)+1)
-                lay["ColumnStart"] = 100; lay["ColumnRight"] = 700
-                lay["HitPosition"] = 420
+        """读当前 K 的 [Mania] 段并重算几何；没有对应段时用 osu! 的默认值。"""
+        d = {}
+        if self.skin_ini is not None:
+            try: d = self.skin_ini.mania_get(int(k))
+            except Exception: d = {}
+        self.cfg = {str(key).lower(): v for key, v in d.items()}
+        self.layout = {
+            "ColumnStart": self._num("columnstart", DEFAULT_COLUMN_START),
+            "ColumnWidth": _ints(self.cfg.get("columnwidth"), k, DEFAULT_COLUMN_WIDTH),
+            "ColumnSpacing": _ints(self.cfg.get("columnspacing"), max(k - 1, 0), 0),
+            "ColumnLineWidth": _ints(self.cfg.get("columnlinewidth"), k + 1, 2),
+            "HitPosition": self._num("hitposition", DEFAULT_HIT_POSITION),
+        }
+        self._relayout()
+
+    def _num(self, key: str, default: float) -> float:
+        try: return float(self.cfg.get(key, default))
+        except (TypeError, ValueError): return float(default)
+
+    def _relayout(self):
+        """只在布局或尺寸变化时调用：算出每列的位置，底图和精灵留到下一次 paint 再生成。"""
+        k = max(1, int(self.keys)); lay = self.layout
+        if not lay: return
+        scale = self.height() / PLAYFIELD_H if self.height() > 0 else 1.0
+        if self._geom is not None and abs(self._geom.scale - scale) > 1e-6:
+            self._sprites.clear()      # 缩放变了，旧的预缩放精灵不会再被用到
+        ox = (self.width() - PLAYFIELD_W * scale) / 2.0
+        x = ox + lay["ColumnStart"] * scale
+        xs, widths, line_xs = [], [], []
+        for i in range(k):
+            line_xs.append(x)
+            xs.append(x); w = lay["ColumnWidth"][i] * scale; widths.append(w)
+            x += w
+            if i < k - 1: x += lay["ColumnSpacing"][i] * scale
+        line_xs.append(x)
+        colours = [_rgba(self.cfg.get(f"colour{i + 1}")) for i in range(k)]
+        self._geom = _Geometry(k, scale, xs, widths, line_xs, [w * scale for w in lay["ColumnLineWidth"]],
+                               lay["HitPosition"] * scale, xs[0], x, colours)
+        self._layer = None
+
+    def resizeEvent(self, ev):
+        super().resizeEvent(ev)
+        self._relayout()
+
+    # ------- sprites -------
+    def _find(self, ref: str) -> Optional[Path]:
+        """素材引用（相对皮肤根目录、不带扩展名，如 mania/note1 或 mania-key1）-> 文件，@2x 优先。"""
+        if ref in self._paths: return self._paths[ref]
+        root = self._skin_root(); found = None
+        if root is not None and ref:
+            stem = ref.replace("\\", "/").strip().strip("/")
+            if stem.lower().endswith(".png"): stem = stem[:-4]
+            for cand in (f"{stem}@2x.png", f"{stem}.png"):
+                p = root / cand
+                if p.is_file(): found = p; break
+        self._paths[ref] = found
+        return found
+
+    def _sprite_path(self, col: int, role: str) -> Optional[Path]:
+        """role: note / head / body / tail / key / stage-left / stage-right / stage-hint。"""
+        k = self._geom.keys
+        t = column_style(k, col)
+        if role.startswith("stage-"):
+            ini_key = {"stage-left": "stageleft", "stage-right": "stageright", "stage-hint": "stagehint"}[role]
+            refs = [self.cfg.get(ini_key), f"mania-{role}"]
+        elif role == "key":
+            refs = [self.cfg.get(f"keyimage{col}"), f"mania-key{t}"]
+        elif role == "key-down":
+            refs = [self.cfg.get(f"keyimage{col}d"), f"mania-key{t}D"]
         else:
-            lay["ColumnWidth"] = [40]*int(k)
-            lay["ColumnSpacing"] = [6]*(max(int(k)-1,0))
-            lay["ColumnLineWidth"] = [1]*(int(k)+1)
-            lay["ColumnStart"] = 100; lay["ColumnRight"] = 700
-            lay["HitPosition"] = 420
+            suffix = {"note": "", "head": "H", "body": "L", "tail": "T"}[role]
+            refs = [self.cfg.get(f"noteimage{col}{suffix.lower()}"), f"mania-note{t}{suffix}"]
+            if role == "head":   # 没有 LN 头就用普通音符
+                refs += [self.cfg.get(f"noteimage{col}"), f"mania-note{t}"]
+        for ref in refs:
+            if ref:
+                p = self._find(str(ref))
+                if p is not None: return p
+        return None
 
-        self.layout = lay
+    def _sprite(self, col: int, role: str, width: float = 0.0, height: float = 0.0) -> Optional[QPixmap]:
+        """预缩放的精灵：给 width 时按宽度等比缩放，给 height 时按高度。按 (keys, 列, 角色, 文件, 尺寸) 缓存。"""
+        path = self._sprite_path(col, role)
+        if path is None: return None
+        dpr = self.devicePixelRatioF()
+        key = (self._geom.keys, col, role, str(path), round(width * dpr), round(height * dpr))
+        if key in self._sprites: return self._sprites[key]
+        src = image_cache().pixmap(path, 1.0)
+        pm = None
+        if src is not None and not src.isNull():
+            if width > 0:
+                pm = src.scaledToWidth(max(1, round(width * dpr)), Qt.SmoothTransformation)
+            else:
+                sd = 0.5 if "@2x" in path.name else 1.0   # 按高度时跟着 osu! 的像素比例走
+                pm = src.scaledToHeight(max(1, round((height or src.height() * sd * self._geom.scale) * dpr)),
+                                        Qt.SmoothTransformation)
+            pm.setDevicePixelRatio(dpr)
+        self._sprites[key] = pm
+        return pm
 
-    def _int_or_none(self, v):
-        try:
-            return int(v)
-        except Exception:
-            return None
+    def _body_strip(self, col: int, width: float) -> Optional[QPixmap]:
+        """长条身体：把按列宽缩好的 body 竖向平铺成约 BODY_STRIP_PX 高的一条，高度是整块的整数倍，
+        所以多条首尾相接仍然无缝。NoteBodyStyle 0（拉伸）时直接返回单块，画的时候整体拉伸。"""
+        body = self._sprite(col, "body", width=width)
+        if body is None or body.height() <= 0: return None
+        if self._body_style(col) == 0: return body
+        path = self._sprite_path(col, "body")
+        dpr = self.devicePixelRatioF()
+        key = (self._geom.keys, col, "body-strip", str(path), round(width * dpr), 0)
+        pm = self._sprites.get(key)
+        if pm is None:
+            tile = body.height()
+            n = max(1, -(-BODY_STRIP_PX // tile))
+            pm = QPixmap(body.width(), tile * n); pm.setDevicePixelRatio(dpr); pm.fill(Qt.transparent)
+            p = QPainter(pm)
+            for i in range(n):
+                p.drawPixmap(QPointF(0, i * tile / dpr), body)
+            p.end()
+            self._sprites[key] = pm
+        return pm
 
-    def _list_of_ints(self, v, fallback_len=0, fill=0):
-        if v is None: return [fill]*fallback_len
-        if isinstance(v, list):
-            try: return [int(x) for x in v]
-            except Exception: return [fill]*fallback_len
-        try:
-            s = str(v).strip()
-            parts = [p.strip() for p in s.split(",") if p.strip()!=""]
-            return [int(p) for p in parts]
-        except Exception:
-            return [fill]*fallback_len
+    def _body_style(self, col: int) -> int:
+        """NoteBodyStyle{i} / NoteBodyStyle：0 拉伸，1 从尾部开始平铺（默认），2 从头部开始平铺。"""
+        for key in (f"notebodystyle{col}", "notebodystyle"):
+            try: return int(float(self.cfg[key]))
+            except (KeyError, TypeError, ValueError): continue
+        return 1
+
+    def _placeholder(self, w: float, h: float) -> QPixmap:
+        dpr = self.devicePixelRatioF()
+        key = ("placeholder", round(w * dpr), round(h * dpr))
+        pm = self._sprites.get(key)
+        if pm is None:
+            pm = QPixmap(max(1, round(w * dpr)), max(1, round(h * dpr))); pm.setDevicePixelRatio(dpr)
+            pm.fill(Qt.transparent)
+            p = QPainter(pm); p.setRenderHint(QPainter.Antialiasing, True)
+            p.setPen(QPen(QColor(230, 230, 230), 1.5)); p.setBrush(QColor(160, 160, 160))
+            p.drawRoundedRect(QRectF(1, 1, w - 2, h - 2), 3, 3); p.end()
+            self._sprites[key] = pm
+        return pm
+
+    # ------- layers -------
+    def _build(self):
+        """底图：背景、列底色、stage 两侧、分隔线、判定线提示、key；再排好静态音符的绘制列表。"""
+        g = self._geom
+        dpr = self.devicePixelRatioF()
+        layer = QPixmap(max(1, round(self.width() * dpr)), max(1, round(self.height() * dpr)))
+        layer.setDevicePixelRatio(dpr); layer.fill(Qt.black)
+        p = QPainter(layer); p.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        H = float(self.height())
+
+        for i, c in enumerate(g.colours):
+            if c is not None and c.alpha() > 0:
+                p.fillRect(QRectF(g.xs[i], 0, g.widths[i], H), c)
+        sl = self._sprite(0, "stage-left", height=H)
+        if sl is not None: p.drawPixmap(QPointF(g.left - sl.width() / dpr, 0), sl)
+        sr = self._sprite(0, "stage-right", height=H)
+        if sr is not None: p.drawPixmap(QPointF(g.right, 0), sr)
+
+        for x, w in zip(g.line_xs, g.line_ws):
+            if w > 0: p.fillRect(QRectF(x - w / 2, 0, w, H), QColor(120, 120, 120))
+
+        hint = self._sprite(0, "stage-hint")
+        if hint is not None:
+            h = hint.height() / dpr
+            p.drawPixmap(QRectF(g.left, g.hit_y - h / 2, g.right - g.left, h), hint, QRectF(hint.rect()))
+        else:
+            p.setPen(QPen(QColor(200, 200, 200), 2)); p.drawLine(QPointF(g.left, g.hit_y), QPointF(g.right, g.hit_y))
+
+        for i in range(g.keys):
+            key = self._sprite(i, "key", width=g.widths[i])
+            if key is not None:
+                p.drawPixmap(QPointF(g.xs[i], H - key.height() / dpr), key)
+        p.end()
+        self._layer = layer
+
+        # 静态音符：每列一个，阶梯排开；最后一列放一根长条，展示 H / L / T
+        ops = []
+        gap = max(8.0, (g.hit_y - 20) / (NOTE_ROWS + 1))
+        for i in range(g.keys):
+            w = g.widths[i]
+            ln = i == g.keys - 1 and g.keys > 1
+            head = self._sprite(i, "head" if ln else "note", width=w) or self._placeholder(w, max(6.0, w / 3))
+            hh = head.height() / dpr
+            y = g.hit_y - (i % NOTE_ROWS + 1) * gap
+            if ln:
+                top = max(0.0, y - 2 * gap)
+                body = self._sprite(i, "body", width=w)
+                if body is not None:
+                    ops.append((QRectF(g.xs[i], top, w, y - top), body))
+                tail = self._sprite(i, "tail", width=w)
+                if tail is not None:
+                    ops.append((QRectF(g.xs[i], top - tail.height() / dpr, w, tail.height() / dpr), tail))
+            ops.append((QRectF(g.xs[i], y - hh, w, hh), head))
+        self._ops = ops
 
     # ------- painting -------
     def paintEvent(self, ev):
+        self.meter.begin()
+        if self._geom is None:
+            self._load_layout_for_keys(self.keys)
+        if self._layer is None:
+            self._build()
         p = QPainter(self)
-        p.setRenderHint(QPainter.Antialiasing, True)
-
-        # bg
-        p.fillRect(self.rect(), Qt.black)
-
-        # logical playfield
-        margin = 20
-        field = self.rect().adjusted(margin, margin, -margin, -margin)
-
-        # compute x positions
-        k = max(1, int(self.keys))
-        widths = (self.layout.get("ColumnWidth") or [40]*k)[:k]
-        while len(widths) < k: widths.append(widths[-1] if widths else 40)
-        spacing = (self.layout.get("ColumnSpacing") or [6]*(k-1))[:max(k-1,0)]
-        while len(spacing) < max(k-1,0): spacing.append(spacing[-1] if spacing else 6)
-
-        total_w = sum(widths) + sum(spacing)
-        # determine left x
-        left_x = self.layout.get("ColumnStart")
-        right_x = self.layout.get("ColumnRight")
-        if left_x is None and right_x is None:
-            left = field.left() + (field.width()-total_w)/2.0
-        elif left_x is not None and right_x is not None:
-            # scale into field proportionally
-            left = field.left() + float(left_x) / max(1.0, (right_x - left_x)) * (field.width()-total_w)
-        elif left_x is not None:
-            left = field.left() + left_x
+        p.drawPixmap(0, 0, self._layer)
+        if self.chart is not None:
+            self._paint_chart(p, self.position())
         else:
-            left = field.right() - total_w if right_x is not None else field.left() + (field.width()-total_w)/2.0
-
-        # vertical separators
-        x = left
-        pen_line = QPen(QColor(120,120,120), 1)
-        p.setPen(pen_line)
-        p.setBrush(Qt.NoBrush)
-        for i in range(k+1):
-            p.drawLine(int(round(x)), field.top(), int(round(x)), field.bottom())
-            if i < k:
-                x += widths[i]
-                if i < k-1:
-                    x += spacing[i]
-
-        # hit position
-        hp = self.layout.get("HitPosition") or int(field.center().y())
-        pen_hp = QPen(QColor(200,200,200), 2, Qt.SolidLine)
-        p.setPen(pen_hp)
-        p.drawLine(field.left(), hp, field.right(), hp)
-
-        # draw some sample notes (five rows)
-        note_r = min(max(min(widths)/2 - 4, 6), 28)
-        brush_note = QBrush(QColor(160,160,160))
-        pen_note = QPen(QColor(230,230,230), 2)
-        p.setBrush(brush_note); p.setPen(pen_note)
-
-        # recompute lane centers for drawing
-        centers = []
-        x = left
-        for i in range(k):
-            w = widths[i]
-            centers.append(x + w/2.0)
-            x += w
-            if i < k-1: x += spacing[i]
+            for rect, pm in self._ops:
+                p.drawPixmap(rect, pm, QRectF(pm.rect()))
+        if self.show_perf:
+            p.setPen(QColor(255, 255, 0))
+            extra = f"  notes: {self._drawn}/{self.chart.count}" if self.chart is not None else ""
+            p.drawText(8, 16, self.meter.text() + extra)
+        p.end()
+        self.meter.end()
 
-        rows = 5
-        row_gap = (field.height()-40) / (rows+1)
-        for r in range(rows):
-            cy = field.top() + 20 + (r+1)*row_gap
-            for cx in centers:
-                rect = QRectF(cx - note_r, cy - note_r, note_r*2, note_r*2)
-                p.drawEllipse(rect)
+    def _paint_chart(self, p: QPainter, now: float):
+        """物件底边在 hit_y - (时间 - now) * 速率；按住中的长条头停在判定线，身体随之缩短。"""
+        g = self._geom; dpr = self.devicePixelRatioF()
+        H = float(self.height())
+        ppm = g.hit_y / self.scroll_time()                # 每毫秒多少像素
+        horizon = now + (g.hit_y + H * 0.1) / ppm         # 顶端再多算一点，音符从画面外滑进来
+        drawn = 0
+        for i in range(g.keys):
+            x, w = g.xs[i], g.widths[i]
+            if self.chart.active(i, now, KEY_GRACE_MS):
+                kd = self._sprite(i, "key-down", width=w)
+                if kd is not None:
+                    p.drawPixmap(QPointF(x, H - kd.height() / dpr), kd)
+            note = self._sprite(i, "note", width=w)
+            head = self._sprite(i, "head", width=w)
+            if note is None or head is None:
+                ph = self._placeholder(w, max(6.0, w / 3))
+                note = note if note is not None else ph
+                head = head if head is not None else ph
+            tail = self._sprite(i, "tail", width=w)
+            strip = self._body_strip(i, w)
+            style = self._body_style(i)
+            nh, hh = note.height() / dpr, head.height() / dpr
+            note_src, head_src = QRectF(note.rect()), QRectF(head.rect())
+            for start, end in self.chart.visible(i, now, horizon):
+                drawn += 1
+                y = g.hit_y - (max(start, now) - now) * ppm
+                if end > start:
+                    y_end = g.hit_y - (end - now) * ppm
+                    if strip is not None:
+                        self._paint_body(p, strip, style, x, w, y_end, y - hh / 2)
+                    if tail is not None:
+                        th = tail.height() / dpr
+                        p.drawPixmap(QRectF(x, y_end - th, w, th), tail, QRectF(tail.rect()))
+                    p.drawPixmap(QRectF(x, y - hh, w, hh), head, head_src)
+                else:
+                    p.drawPixmap(QRectF(x, y - nh, w, nh), note, note_src)
+        self._drawn = drawn
 
-        p.end()
+    def _paint_body(self, p: QPainter, strip: QPixmap, style: int, x: float, w: float, top: float, bottom: float):
+        """[top, bottom] 之间铺长条身体：拉伸样式一次拉满；平铺样式按竖条高度重复 blit，零头用源矩形裁掉。
+        从尾部平铺时跳过画面上方整段的竖条，花纹仍然跟着长条走。"""
+        if bottom <= top: return
+        if style == 0:
+            p.drawPixmap(QRectF(x, top, w, bottom - top), strip, QRectF(strip.rect())); return
+        dpr = self.devicePixelRatioF()
+        sh = strip.height() / dpr; sw = float(strip.width())
+        from_head = style == 2
+        if not from_head and top < -sh:
+            top += int(-top // sh) * sh
+        elif from_head:
+            top = max(top, -1.0)
+        y = bottom if from_head else top
+        left = bottom - top
+        while left > 0.01:
+            h = min(sh, left)
+            if from_head:
+                p.drawPixmap(QRectF(x, y - h, w, h), strip, QRectF(0, (sh - h) * dpr, sw, h * dpr)); y -= h
+            else:
+                p.drawPixmap(QRectF(x, y, w, h), strip, QRectF(0, 0, sw, h * dpr)); y += h
+            left -= h
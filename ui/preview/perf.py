@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""预览用的简易性能计数：帧率 + 每次 paint 的平均耗时。"""
+import time
+
+
+class PaintMeter:
+    """在 paintEvent 开头 begin()、结尾 end()；每 window 秒统计一次。"""
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self.fps = 0.0
+        self.ms_avg = 0.0
+        self.ms_max = 0.0
+        self._t0 = None
+        self._win_start = time.perf_counter()
+        self._frames = 0
+        self._acc = 0.0
+        self._max = 0.0
+
+    def begin(self):
+        self._t0 = time.perf_counter()
+
+    def end(self):
+        if self._t0 is None: return
+        now = time.perf_counter()
+        dt = now - self._t0; self._t0 = None
+        self._frames += 1; self._acc += dt; self._max = max(self._max, dt)
+        span = now - self._win_start
+        if span >= self.window:
+            self.fps = self._frames / span
+            self.ms_avg = self._acc * 1000.0 / self._frames
+            self.ms_max = self._max * 1000.0
+            self._win_start = now; self._frames = 0; self._acc = 0.0; self._max = 0.0
+
+    def reset(self):
+        self.__init__(self.window)
+
+    def text(self) -> str:
+        return f"{self.fps:5.1f} fps  {self.ms_avg:5.2f} ms/paint  (max {self.ms_max:.2f})"
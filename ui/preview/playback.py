@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""谱面回放的时钟：暂停时停在 pos；播放时 = pos + 流逝时间；过了循环终点从起点重来。mania / std 预览共用。"""
+from PySide6.QtCore import QElapsedTimer
+
+LEAD_IN_MS = 1000       # 开始 / 循环时在第一个物件前留的空白
+
+
+class PlaybackClock:
+    def __init__(self):
+        self._pos = 0.0
+        self._clock = QElapsedTimer()
+        self.running = False
+        self.loop_start = 0.0
+        self.loop_end = 0.0         # <= loop_start 表示不循环
+
+    def set_range(self, first: float, last: float):
+        """按谱面第一个 / 最后一个物件设定循环区间，并回到起点。"""
+        self.loop_start = float(first) - LEAD_IN_MS
+        self.loop_end = float(last) + LEAD_IN_MS
+        self.seek(self.loop_start)
+
+    def start(self):
+        if self.running: return
+        self._clock.start(); self.running = True
+
+    def pause(self):
+        if not self.running: return
+        self._pos = self.position(); self.running = False
+
+    def seek(self, ms: float):
+        self._pos = float(ms)
+        if self.running: self._clock.start()
+
+    def position(self) -> float:
+        if not self.running: return self._pos
+        t = self._pos + self._clock.elapsed()
+        if self.loop_end > self.loop_start and t > self.loop_end:
+            self._pos = t = self.loop_start; self._clock.start()
+        return t
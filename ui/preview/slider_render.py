@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+滑条身体的光栅化 + 缓存。
+- 外观按 osu! 旧版皮肤的做法：最外一圈淡阴影，SliderBorder 颜色的边框，里面从“轨道色稍暗”渐变到“轨道色提亮”；
+  轨道色是 [Colours] SliderTrackOverride，没写就用该物件的连击色。用几道由粗到细的圆头描边叠出渐变。
+- 缓存 key = (形状, 圆圈半径像素, dpr, 轨道色, 边框色)：换一个连击色只会重画用到它的滑条，
+  拖动时间轴只是在命中缓存；形状的折线来自 core.slider_curve，本模块不再求曲线。
+- 按字节预算的 LRU（与 ui.image_cache 同样的做法），超预算时丢最久没用的。
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QColor, QPainter, QPainterPath, QPen, QPixmap
+
+BODY_BUDGET = 96 * 1024 * 1024
+SHADOW_PORTION = 1 - 59.0 / 64.0    # 圆圈素材 64 像素半径里，外面一圈阴影约占这么多
+BORDER_PORTION = 0.1875
+GRADIENT_STEPS = 6
+
+Colour = Tuple[int, int, int]
+
+
+def _darken(c: Colour, amount: float) -> QColor:
+    return QColor(*(max(0, min(255, round(v / (1.0 + amount)))) for v in c))
+
+
+def _lighten(c: Colour, amount: float) -> QColor:
+    return QColor(*(max(0, min(255, round(v + (255 - v) * amount))) for v in c))
+
+
+class SliderBodyCache:
+    def __init__(self, budget: int = BODY_BUDGET):
+        self.budget = budget
+        self._items: "OrderedDict[tuple, Tuple[Optional[QPixmap], QPointF]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = self.rasters = 0
+
+    def clear(self):
+        self._items.clear(); self._bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def body(self, key, shape, radius: float, scale: float, dpr: float,
+             track: Colour, border: Colour) -> Tuple[Optional[QPixmap], QPointF]:
+        """(pixmap, 左上角相对滑条头的偏移，控件像素)。radius：圆圈半径（控件像素）；scale：osu! 像素 -> 控件像素。"""
+        ck = (key, round(radius, 2), round(scale, 4), dpr, track, border)
+        hit = self._items.get(ck)
+        if hit is not None:
+            self._items.move_to_end(ck); self.hits += 1
+            return hit
+        item = self._raster(shape, radius, scale, dpr, track, border)
+        self.rasters += 1
+        pm = item[0]
+        size = pm.width() * pm.height() * 4 if pm is not None else 0
+        self._items[ck] = item; self._bytes += size
+        while self._bytes > self.budget and len(self._items) > 1:
+            _, (old, _o) = self._items.popitem(last=False)
+            if old is not None: self._bytes -= old.width() * old.height() * 4
+        return item
+
+    @staticmethod
+    def _raster(shape, radius, scale, dpr, track, border):
+        minx, miny, maxx, maxy = shape.bounds()
+        pad = radius + 2
+        w = (maxx - minx) * scale + 2 * pad; h = (maxy - miny) * scale + 2 * pad
+        if w * h * dpr * dpr > 64 * 1024 * 1024:     # 异常巨大的滑条（谱面写错）不画
+            return None, QPointF()
+        pm = QPixmap(max(1, round(w * dpr)), max(1, round(h * dpr))); pm.setDevicePixelRatio(dpr)
+        pm.fill(Qt.transparent)
+        path = QPainterPath()
+        pts = [((x - minx) * scale + pad, (y - miny) * scale + pad) for x, y in shape.points]
+        path.moveTo(*pts[0])
+        for x, y in pts[1:]: path.lineTo(x, y)
+        p = QPainter(pm); p.setRenderHint(QPainter.Antialiasing, True); p.setBrush(Qt.NoBrush)
+
+        def stroke(colour: QColor, width: float):
+            p.setPen(QPen(colour, max(0.5, width), Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+            p.drawPath(path)
+
+        stroke(QColor(0, 0, 0, 64), 2 * radius)
+        stroke(QColor(*border), 2 * radius * (1 - SHADOW_PORTION))
+        inner = 2 * radius * (1 - SHADOW_PORTION - BORDER_PORTION)
+        outer_c, inner_c = _darken(track, 0.1), _lighten(track, 0.5)
+        for i in range(GRADIENT_STEPS):
+            f = i / GRADIENT_STEPS
+            c = QColor(round(outer_c.red() + (inner_c.red() - outer_c.red()) * f),
+                       round(outer_c.green() + (inner_c.green() - outer_c.green()) * f),
+                       round(outer_c.blue() + (inner_c.blue() - outer_c.blue()) * f))
+            stroke(c, inner * (1 - f))
+        p.end()
+        return pm, QPointF(minx * scale - pad, miny * scale - pad)
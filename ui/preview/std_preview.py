@@ -1,7 +1,37 @@
 # -*- coding: utf-8 -*-
+"""
+STD 预览：默认是单个圆圈 + 缩圈的循环演示（带微调偏移和中心调试）；
+load_chart 之后改为回放 core.beatmap.StdChart（.osu 或生成的测试谱）：
+- 按谱面的 AR / CS 计算出现时间、淡入和圆圈大小，颜色取皮肤的 Combo1-8，数字按 [Fonts] HitCircleOverlap 拼接；
+- 每帧用 StdChart.visible（bisect）取窗口内的物件，填进复用的 _Drawable 池，不逐帧新建对象；
+- 圆圈 / overlay / 数字按 (颜色, 尺寸) 预缩放缓存，缩圈按 (颜色, 档位, 尺寸) 缓存量化后的帧；
+- 滑条：折线在谱面载入时由 core.slider_curve 一次展开（后台线程），身体按 (形状, 半径, 颜色) 光栅化后
+  放进 SliderBodyCache，每帧只是贴图；滑条球（sliderbN）和反向箭头按时间算位置；
+- frame_stats 记录每帧的物件数、查询耗时和绘制耗时，show_perf 时叠加显示。
+回放按游戏的方式以图片中心对齐，不套用单圈演示里的微调偏移。
+"""
+import math
+import time
+
 from PySide6.QtWidgets import QWidget
 from PySide6.QtGui import QPainter, QPen, QPixmap, QColor, QImage
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, Signal, QRectF, QPointF
+
+from core.beatmap import TYPE_SPINNER, circle_radius, fade_in_ms, preempt_ms
+from ui.image_cache import image_cache
+from ui.preview.perf import PaintMeter
+from ui.preview.playback import PlaybackClock
+from ui.preview.slider_render import SliderBodyCache
+
+# approach 缩放 1.6 -> 1.0 量化成多少档；每档一张预先缩放+着色的帧
+APPROACH_STEPS = 60
+# 回放：击中后圆圈放大 + 淡出的时长，以及游戏里没写颜色时的默认连击色
+HIT_FADE_MS = 240
+# 回放时缩圈 4 -> 1 倍量化成多少档；每档按需生成一张预缩放+着色的帧，绘制时不再做平滑缩放
+PLAY_APPROACH_STEPS = 48
+DEFAULT_COMBO_COLOURS = [(255,192,0),(0,202,0),(18,124,255),(242,24,57)]
+# 滑条球动画每帧的时长
+BALL_FRAME_MS = 1000/60
 
 def _parse_rgb(val, default=(0, 255, 255)):
     if not val: return default
@@ -22,26 +52,48 @@ def _parse_bool(val, default=False):
     return s in ("1","true","yes","on")
 
 def _alpha_center(pm: QPixmap, thresh: int = 10):
-    if pm is None or pm.isNull(): return (0,0)
-    img = pm.toImage().convertToFormat(QImage.Format_ARGB32)
-    w, h = img.width(), img.height()
-    minx, miny, maxx, maxy = w, h, -1, -1
-    for y in range(h):
-        for x in range(w):
-            a = img.pixelColor(x, y).alpha()
-            if a > thresh:
-                if x < minx: minx = x
-                if y < miny: miny = y
-                if x > maxx: maxx = x
-                if y > maxy: maxy = y
-    if maxx < minx or maxy < miny: return (0,0)
-    cx_img, cy_img = w/2.0, h/2.0; cx_cnt, cy_cnt = (minx+maxx)/2.0, (miny+maxy)/2.0
-    return (int(round(cx_img - cx_cnt)), int(round(cy_img - cy_cnt)))
+    # 向量化 bbox（NumPy 零拷贝 / Pillow 兜底），见 core/alpha_bbox.py；第一次用到才导入（NumPy 较重）
+    from core.alpha_bbox import alpha_center_pixmap
+    return alpha_center_pixmap(pm, thresh)
+
+def preview_sprite_names(assets):
+    """STD 预览要画的素材名：圆圈、overlay、approach、0-9 数字（default-N 优先于 score-N）、反向箭头和滑条球。"""
+    names=["hitcircle","hitcircleoverlay","approachcircle","reversearrow"]
+    names+=[f"default-{i}" if f"default-{i}" in assets else f"score-{i}" for i in range(10)]
+    return names+_ball_names(assets)
+
+def _ball_names(assets):
+    """滑条球：有 sliderb0 就取连续的 sliderb0..N 作动画，否则是单张 sliderb。"""
+    if "sliderb0" not in assets: return ["sliderb"]
+    n=0
+    while f"sliderb{n}" in assets: n+=1
+    return [f"sliderb{i}" for i in range(n)]
+
+class _Drawable:
+    """回放时一个物件这一帧的绘制参数；对象放在池里逐帧复用。"""
+    __slots__=("x","y","alpha","scale","approach","colour","number","hit",
+               "shape","key","body_alpha","head","ball","bx","by","frame","arrow","ax","ay","angle")
+
+    def __init__(self):
+        self.x=self.y=0.0; self.alpha=1.0; self.scale=1.0; self.approach=0.0
+        self.colour=(255,255,255); self.number=1; self.hit=False
+        # 滑条：shape 为 None 表示单点；head=False 表示头已经淡出，只剩身体 / 球
+        self.shape=None; self.key=None; self.body_alpha=0.0; self.head=True
+        self.ball=False; self.bx=self.by=0.0; self.frame=0
+        self.arrow=False; self.ax=self.ay=0.0; self.angle=0.0
+
 
 class StdPreview(QWidget):
+    sprites_ready = Signal()   # set_skin 之后所有素材都解码到位
+    playing_changed = Signal(bool)
+    chart_changed = Signal(object)      # 新谱面；None = 回到单圈演示
+
     def __init__(self):
         super().__init__()
         self.skin = None
+        # set_skin 的代次：换皮肤后，上一个皮肤还在途的解码回调直接丢弃
+        self._gen = 0
+        self._pending_sprites=set()
         self.t = 0
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.tick)
@@ -53,9 +105,30 @@ class StdPreview(QWidget):
         self.pm_approach=None; self.off_approach=(0,0)
         self.pm_digits=[None]*10; self.off_digits=[(0,0)]*10
         self.pm_circle_tinted=None; self.overlay_above_number=True
+        self.pm_reverse=None; self.pm_ball_frames=[]
 
         self.approach_center_mode="image"  # "image" or "alpha"
 
+        # approach 帧缓存：(asset, combo colour, step) -> 已缩放+着色的 QPixmap
+        # 在 1600ms 周期内按需填充；换皮肤/换颜色/DPI 变化时整体丢弃
+        self._approach_frames={}
+        self._approach_dpr=None
+        self.meter=PaintMeter()
+
+        # 谱面回放
+        self.chart=None                 # core.beatmap.StdChart
+        self.clock=PlaybackClock()
+        self.combo_colours=list(DEFAULT_COMBO_COLOURS)
+        self.number_overlap=-2          # [Fonts] HitCircleOverlap（SD 像素）
+        self._pool=[]                   # _Drawable 池
+        self._play_cache={}             # (角色, 颜色/数字) -> 预缩放精灵；换素材/颜色/尺寸/dpr 时清空
+        self._play_size=None            # _play_cache 里的精灵对应的 (尺寸, dpr)
+        self.frame_stats={"objects":0,"query_ms":0.0,"draw_ms":0.0}
+        self._bg=None; self._bg_key=None
+        self.sliders=SliderBodyCache()  # 滑条身体光栅缓存；key 里带颜色，换色不用整体清空
+        self.slider_border=(255,255,255)
+        self.slider_track=None          # [Colours] SliderTrackOverride；None = 用连击色
+
         # user micro adjustments (per-skin)
         self.user_offsets={
             "hit_dx":0,"hit_dy":0,              # hitcircle only
@@ -69,6 +142,7 @@ class StdPreview(QWidget):
         self.debug_opts={
             "show_centers":False,   # draw cross at visual centers
             "sample_digit":6,       # 0..9
+            "show_perf":False,      # fps / ms-per-paint overlay
         }
 
     # ---------- config API ----------
@@ -95,16 +169,27 @@ class StdPreview(QWidget):
         if "sample_digit" in d:
             try: self.debug_opts["sample_digit"]=max(0, min(9, int(d["sample_digit"])))
             except Exception: pass
+        if "show_perf" in d:
+            self.debug_opts["show_perf"]=bool(d["show_perf"]); self.meter.reset()
         self.update()
 
     # ---------- assets ----------
     def _pix(self, name:str):
+        # 走共享缓存：同一文件同一缩放只解码一次；有最新的 SD 文件就直接读它，不再运行时缩放 @2x
         if not self.skin: return None
-        a=self.skin.assets.get(name); 
+        a=self.skin.assets.get(name)
         if not a: return None
-        pm=QPixmap(str(a.path))
-        if a.scale==2: pm=pm.scaled(pm.width()//2, pm.height()//2, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        return pm
+        return image_cache().pixmap(*a.preview_source())
+
+    def _sprite_names(self):
+        return preview_sprite_names(self.skin.assets)
+
+    def _prefetch(self, names=None):
+        """把要用的素材丢进后台线程池并行解码；随后 _pix 会直接拿到或等在途的结果。"""
+        if not self.skin: return
+        assets=self.skin.assets
+        items=[a.preview_source() for a in (assets.get(n) for n in (names or self._sprite_names())) if a]
+        image_cache().prefetch(items)
 
     def _tint(self, pm:QPixmap, color):
         if pm is None: return None
@@ -115,30 +200,327 @@ class StdPreview(QWidget):
         return QPixmap.fromImage(out)
 
     def _load_assets(self):
-        self.pm_circle=self._pix("hitcircle"); self.off_circle=_alpha_center(self.pm_circle)
-        self.pm_overlay=self._pix("hitcircleoverlay"); self.off_overlay=_alpha_center(self.pm_overlay)
-        self.pm_approach=self._pix("approachcircle"); self.off_approach=_alpha_center(self.pm_approach)
+        """不阻塞 GUI 线程：缓存里已有的素材当场就位，其余在线程池里解码，到一张画一张。"""
+        self._gen+=1; gen=self._gen
+        self.pm_circle=self.pm_overlay=self.pm_approach=None
+        self.off_circle=self.off_overlay=self.off_approach=(0,0)
+        self.pm_digits=[None]*10; self.off_digits=[(0,0)]*10
+        self.pm_reverse=None; self.pm_ball_frames=[]
+        self._load_ini_settings()
+        if not self.skin:
+            self._pending_sprites=set(); return
+        assets=self.skin.assets
+        names=[n for n in self._sprite_names() if n in assets]
+        self._pending_sprites=set(names)
+        for n in names:
+            image_cache().request(*assets[n].preview_source(), lambda _pm, n=n, gen=gen: self._on_sprite(gen, n))
+        if not self._pending_sprites:
+            self.sprites_ready.emit()
+
+    def _on_sprite(self, gen, name):
+        if gen!=self._gen or name not in self._pending_sprites: return
+        self._pending_sprites.discard(name)
+        self._load_sprites({name})       # 已经在缓存里，_pix 直接命中
+        if name in ("hitcircle","approachcircle"):
+            self._load_ini_settings()    # 重新着色 / 丢掉旧的 approach 帧
+        self.update()
+        if not self._pending_sprites:
+            self.sprites_ready.emit()
+
+    def is_loading(self) -> bool:
+        return bool(self._pending_sprites)
+
+    def _load_sprites(self, names=None):
+        """names=None 表示全部；否则只重新解码受影响的素材。"""
+        self._play_cache.clear()
+        def want(*ns): return names is None or any(n in names for n in ns)
+        if want("hitcircle"):
+            self.pm_circle=self._pix("hitcircle"); self.off_circle=_alpha_center(self.pm_circle)
+        if want("hitcircleoverlay"):
+            self.pm_overlay=self._pix("hitcircleoverlay"); self.off_overlay=_alpha_center(self.pm_overlay)
+        if want("approachcircle"):
+            self.pm_approach=self._pix("approachcircle"); self.off_approach=_alpha_center(self.pm_approach)
         for i in range(10):
+            if not want(f"default-{i}", f"score-{i}"): continue
             pm=self._pix(f"default-{i}") or self._pix(f"score-{i}")
             self.pm_digits[i]=pm; self.off_digits[i]=_alpha_center(pm) if pm else (0,0)
+        if want("reversearrow"): self.pm_reverse=self._pix("reversearrow")
+        if self.skin and (names is None or any(n.startswith("sliderb") for n in names)):
+            self.pm_ball_frames=[pm for pm in (self._pix(n) for n in _ball_names(self.skin.assets)) if pm is not None]
 
-        combo=None; overlay_rule=None
+    def _load_ini_settings(self):
+        combo=None; overlay_rule=None; combos=[]; overlap=None; border=track=None
         if self.skin and self.skin.ini:
             for sec in self.skin.ini.sections():
                 low=sec.lower()
                 if low in ("colours","colors") and combo is None:
-                    try: combo=self.skin.ini.get(sec, "Combo1", fallback=None)
+                    try:
+                        combo=self.skin.ini.get(sec, "Combo1", fallback=None)
+                        combos=[c for c in (self.skin.ini.get(sec, f"Combo{i}", fallback=None) for i in range(1,9)) if c]
+                        border=self.skin.ini.get(sec, "SliderBorder", fallback=None)
+                        track=self.skin.ini.get(sec, "SliderTrackOverride", fallback=None)
                     except Exception: pass
                 if low in ("general","generalsettings") and overlay_rule is None:
                     try: overlay_rule=self.skin.ini.get(sec, "HitCircleOverlayAboveNumber", fallback=None)
                     except Exception: pass
+                if low=="fonts" and overlap is None:
+                    try: overlap=self.skin.ini.get(sec, "HitCircleOverlap", fallback=None)
+                    except Exception: pass
         self.combo_color=_parse_rgb(combo, self.combo_color); self.overlay_above_number=_parse_bool(overlay_rule, True)
+        self.combo_colours=[_parse_rgb(c, None) for c in combos]
+        self.combo_colours=[c for c in self.combo_colours if c] or list(DEFAULT_COMBO_COLOURS)
+        try: self.number_overlap=int(overlap) if overlap is not None else -2
+        except (TypeError, ValueError): self.number_overlap=-2
+        self.slider_border=_parse_rgb(border, (255,255,255)); self.slider_track=_parse_rgb(track, None)
         self.pm_circle_tinted=self._tint(self.pm_circle, self.combo_color)
+        self._drop_approach_frames()
+        self._play_cache.clear()
+
+    def _drop_approach_frames(self):
+        self._approach_frames.clear()
+
+    def _approach_frame(self, base_w:int, phase:float):
+        """取（必要时生成）当前相位对应的 approach 帧。"""
+        dpr=self.devicePixelRatioF()
+        if dpr!=self._approach_dpr:
+            self._drop_approach_frames(); self._approach_dpr=dpr
+        step=int(round(phase*APPROACH_STEPS))
+        asset=self.skin.assets.get("approachcircle") if self.skin else None
+        key=(str(asset.path) if asset else "", self.combo_color, step)
+        pm=self._approach_frames.get(key)
+        if pm is None:
+            scale=1.6-0.6*step/APPROACH_STEPS
+            target_w=max(1,int(base_w*scale))
+            pm=self._tint(self.pm_approach.scaledToWidth(target_w, Qt.SmoothTransformation), self.combo_color)
+            self._approach_frames[key]=pm
+        return pm
 
     def set_skin(self, skin):
         self.skin=skin; self._load_assets(); self.update()
 
+    def update_assets(self, names, ini_changed:bool=False):
+        """热重载：只处理变化的素材 / skin.ini。skin 对象已由调用方就地更新。"""
+        if not self.skin: return
+        names=set(names or ())
+        if names: self._prefetch(names); self._load_sprites(names)
+        if ini_changed or names & {"hitcircle","approachcircle"}:
+            self._load_ini_settings()
+        self.update()
+
+    # ---------- playback ----------
+    def load_chart(self, chart, play:bool=True):
+        """载入 StdChart，从第一个物件前一秒开始，播完循环。滑条还没展开的（没走后台任务）在这里展开。"""
+        self.pause()
+        if not chart.shapes:
+            from core.slider_curve import attach_shapes     # 用到才导入（会带进 NumPy）
+            attach_shapes(chart)
+        self.chart=chart
+        self.clock.set_range(chart.first, chart.duration)
+        self.meter.reset()
+        self.chart_changed.emit(chart)
+        if play: self.play()
+        self.update()
+
+    def clear_chart(self):
+        self.pause()
+        if self.chart is None: return
+        self.chart=None; self._pool.clear()
+        self.chart_changed.emit(None)
+        self.update()
+
+    def is_playing(self) -> bool:
+        return self.clock.running
+
+    def play(self):
+        if self.chart is None or self.clock.running: return
+        self.clock.start(); self.playing_changed.emit(True)
+
+    def pause(self):
+        if not self.clock.running: return
+        self.clock.pause(); self.playing_changed.emit(False)
+
+    def toggle_play(self):
+        self.pause() if self.is_playing() else self.play()
+
+    def seek(self, ms:float):
+        self.clock.seek(ms); self.update()
+
+    def position(self) -> float:
+        return self.clock.position()
+
+    def _playfield(self):
+        """osu! 的 640x480 画面等比放进控件；512x384 的游戏区居中并下移 8 像素（与游戏一致）。"""
+        k=min(self.width()/640.0, self.height()/480.0)
+        return k, (self.width()-512*k)/2, (self.height()-384*k)/2+8*k
+
+    def _play_sprite(self, role:str, arg, size:float):
+        """预缩放精灵。size：SD 像素 -> 控件像素的系数；arg：circle 是颜色，approach 是 (颜色, 档位)，number 是数字。"""
+        dpr=self.devicePixelRatioF()
+        # 一帧里所有精灵同一个尺寸：尺寸（窗口大小 / CS）或 dpr 一变就整个丢掉，不按尺寸累积
+        sk=(round(size*1000), dpr)
+        if sk!=self._play_size:
+            self._play_cache.clear(); self._play_size=sk
+        key=(role, arg)
+        if key in self._play_cache: return self._play_cache[key]
+        def scaled(pm, k):
+            if pm is None: return None
+            return pm.scaled(max(1,round(pm.width()*k*dpr)), max(1,round(pm.height()*k*dpr)),
+                             Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        if role=="circle": pm=self._tint(scaled(self.pm_circle, size), arg) if self.pm_circle else None
+        elif role=="overlay": pm=scaled(self.pm_overlay, size)
+        elif role=="approach":
+            colour,step=arg
+            k=size*(1.0+3.0*step/PLAY_APPROACH_STEPS)
+            pm=self._tint(scaled(self.pm_approach, k), colour) if self.pm_approach else None
+        elif role=="arrow": pm=scaled(self.pm_reverse, size)
+        elif role=="ball": pm=scaled(self.pm_ball_frames[arg], size) if arg<len(self.pm_ball_frames) else None
+        else: pm=self._compose_number(arg, size*0.8, dpr)   # 数字在游戏里是圆圈的 0.8 倍
+        if pm is not None: pm.setDevicePixelRatio(dpr)
+        self._play_cache[key]=pm
+        return pm
+
+    def _compose_number(self, n:int, k:float, dpr:float):
+        digits=[self.pm_digits[int(c)] for c in str(n)]
+        if any(d is None for d in digits): return None
+        ws=[round(d.width()*k*dpr) for d in digits]; h=max(round(d.height()*k*dpr) for d in digits)
+        step=round(self.number_overlap*k*dpr)
+        out=QPixmap(max(1,sum(ws)-step*(len(ws)-1)), max(1,h)); out.fill(Qt.transparent)
+        p=QPainter(out); p.setRenderHint(QPainter.SmoothPixmapTransform, True); x=0
+        for d,w in zip(digits, ws):
+            dh=round(d.height()*k*dpr)
+            p.drawPixmap(QRectF(x,(h-dh)/2,w,dh), d, QRectF(d.rect())); x+=w-step
+        p.end()
+        return out
+
+    def _fill_drawables(self, now:float):
+        """窗口内的物件 -> 复用的 _Drawable；返回本帧用到的个数。"""
+        ch=self.chart
+        preempt=preempt_ms(ch.ar); fade=max(1.0, fade_in_ms(ch.ar))
+        k,ox,oy=self._playfield()
+        colours=self.combo_colours
+        shapes=ch.shapes
+        idx=ch.visible(now-HIT_FADE_MS, now+preempt)
+        pool=self._pool
+        if len(pool)<len(idx): pool.extend(_Drawable() for _ in range(len(idx)-len(pool)))
+        n=0
+        for i in idx:
+            if ch.kinds[i] & TYPE_SPINNER: continue
+            dt=ch.times[i]-now
+            shape=shapes[i] if shapes else None
+            if dt>preempt: continue
+            if shape is None and dt<-HIT_FADE_MS: continue
+            end=ch.ends[i]
+            if shape is not None and now>end+HIT_FADE_MS: continue
+            d=pool[n]; n+=1
+            d.x=ox+ch.xs[i]*k; d.y=oy+ch.ys[i]*k
+            d.colour=colours[ch.colours[i]%len(colours)]; d.number=ch.numbers[i]
+            d.head=dt>=-HIT_FADE_MS
+            if dt>=0:
+                d.alpha=min(1.0,(preempt-dt)/fade); d.scale=1.0; d.approach=1.0+3.0*dt/preempt; d.hit=False
+            else:
+                f=min(1.0,-dt/HIT_FADE_MS)
+                d.alpha=1.0-f; d.scale=1.0+0.4*f; d.approach=0.0; d.hit=True
+            d.shape=shape; d.ball=d.arrow=False
+            if shape is None: continue
+            self._fill_slider(d, i, shape, now, k, preempt, fade)
+        return n
+
+    def _fill_slider(self, d:_Drawable, i:int, shape, now:float, k:float, preempt:float, fade:float):
+        """滑条身体的透明度、球的位置 / 帧、反向箭头的位置和朝向。"""
+        ch=self.chart
+        start=ch.times[i]; end=ch.ends[i]
+        d.key=ch.shape_keys[i]
+        if now<=end: d.body_alpha=min(1.0,(preempt-(start-now))/fade)
+        else: d.body_alpha=1.0-(now-end)/HIT_FADE_MS
+        try: slides=max(1, int(ch.objects[i].params[2]))
+        except (IndexError, ValueError): slides=1
+        span=max(1.0,(end-start)/slides)
+        e=now-start
+        s=min(slides-1, int(e//span)) if e>0 else 0
+        if 0<=e<=end-start:
+            f=(e-s*span)/span
+            if s%2: f=1.0-f
+            bx,by=shape.at(f*shape.length)
+            d.ball=True; d.bx=d.x+bx*k; d.by=d.y+by*k
+            d.frame=int(e//BALL_FRAME_MS)%max(1,len(self.pm_ball_frames))
+        if s<slides-1 and now<=end:
+            at_end=s%2==0       # 偶数段往尾走，箭头在尾；奇数段往头走，箭头在头
+            ax,ay=shape.at(shape.length) if at_end else (0.0,0.0)
+            d.arrow=True; d.ax=d.x+ax*k; d.ay=d.y+ay*k
+            d.angle=math.degrees(shape.end_angle(at_end))+180.0
+
+    def _paint_chart(self, p:QPainter):
+        t0=time.perf_counter()
+        n=self._fill_drawables(self.clock.position())
+        t1=time.perf_counter()
+        k,ox,oy=self._playfield()
+        size=k*circle_radius(self.chart.circle_size)/64.0
+        p.setPen(QPen(QColor(255,255,255,60),1)); p.setBrush(Qt.NoBrush)
+        p.drawRect(QRectF(ox,oy,512*k,384*k))
+        overlay=self._play_sprite("overlay", None, size)
+        radius=k*circle_radius(self.chart.circle_size); dpr=self.devicePixelRatioF()
+        pool=self._pool
+        # 早的物件在上面：倒序画；滑条按 身体 -> 箭头 -> 头 -> 球 叠
+        for j in range(n-1,-1,-1):
+            d=pool[j]
+            if d.shape is not None:
+                body,off=self.sliders.body(d.key, d.shape, radius, k, dpr, self.slider_track or d.colour, self.slider_border)
+                if body is not None:
+                    p.setOpacity(max(0.0,d.body_alpha)); p.drawPixmap(QPointF(d.x+off.x(), d.y+off.y()), body)
+                if d.arrow: self._paint_rotated(p, self._play_sprite("arrow", None, size), d.ax, d.ay, d.angle, d.body_alpha)
+            if d.head:
+                p.setOpacity(max(0.0,d.alpha))
+                self._paint_head(p, d, size, overlay)
+            if d.ball:
+                ball=self._play_sprite("ball", d.frame, size)
+                if ball is not None:
+                    w=ball.width()/ball.devicePixelRatio(); h=ball.height()/ball.devicePixelRatio()
+                    p.setOpacity(1.0); p.drawPixmap(QPointF(d.bx-w/2, d.by-h/2), ball)
+        # 缩圈在所有圆圈之上
+        for j in range(n-1,-1,-1):
+            d=pool[j]
+            if d.hit: continue
+            ap=self._play_sprite("approach", (d.colour, round((d.approach-1.0)/3.0*PLAY_APPROACH_STEPS)), size)
+            if ap is None: continue
+            w=ap.width()/ap.devicePixelRatio(); h=ap.height()/ap.devicePixelRatio()
+            p.setOpacity(max(0.0,min(0.9,d.alpha)))
+            p.drawPixmap(QPointF(d.x-w/2, d.y-h/2), ap)
+        p.setOpacity(1.0)
+        st=self.frame_stats
+        st["objects"]=n; st["query_ms"]=(t1-t0)*1000.0; st["draw_ms"]=(time.perf_counter()-t1)*1000.0
+
+    def _paint_rotated(self, p:QPainter, pm, x:float, y:float, angle:float, alpha:float):
+        if pm is None: return
+        w=pm.width()/pm.devicePixelRatio(); h=pm.height()/pm.devicePixelRatio()
+        p.save(); p.setOpacity(max(0.0,alpha)); p.translate(x,y); p.rotate(angle)
+        p.drawPixmap(QPointF(-w/2,-h/2), pm); p.restore()
+
+    def _paint_head(self, p:QPainter, d:_Drawable, size:float, overlay):
+        circle=self._play_sprite("circle", d.colour, size)
+        number=None if d.hit else self._play_sprite("number", d.number, size)
+        layers=(circle, number, overlay) if self.overlay_above_number else (circle, overlay, number)
+        for pm in layers:
+            if pm is None: continue
+            w=pm.width()/pm.devicePixelRatio()*d.scale; h=pm.height()/pm.devicePixelRatio()*d.scale
+            if d.scale==1.0: p.drawPixmap(QPointF(d.x-w/2, d.y-h/2), pm)
+            else: p.drawPixmap(QRectF(d.x-w/2, d.y-h/2, w, h), pm, QRectF(pm.rect()))
+
     # ---------- draw ----------
+    def _background(self):
+        """黑底 + 点线网格；按 (尺寸, dpr) 缓存成一张图，抗锯齿的虚线每帧重画要好几毫秒。"""
+        dpr=self.devicePixelRatioF()
+        key=(self.width(), self.height(), dpr)
+        if self._bg_key!=key:
+            pm=QPixmap(max(1,round(self.width()*dpr)), max(1,round(self.height()*dpr))); pm.setDevicePixelRatio(dpr)
+            pm.fill(Qt.black)
+            p=QPainter(pm); p.setRenderHint(QPainter.Antialiasing, True)
+            p.setPen(QPen(QColor(200,200,200,120),1,Qt.DotLine))
+            for x in range(0,self.width(),32): p.drawLine(x,0,x,self.height())
+            for y in range(0,self.height(),32): p.drawLine(0,y,self.width(),y)
+            p.end()
+            self._bg=pm; self._bg_key=key
+        return self._bg
+
     def tick(self):
         self.t=(self.t+16)%2000; self.update()
 
@@ -157,28 +539,35 @@ class StdPreview(QWidget):
             painter.drawText(x+6, y-6, name)
 
     def paintEvent(self, e):
+        self.meter.begin()
         p=QPainter(self); p.setRenderHint(QPainter.Antialiasing, True)
 
-        # grid
-        p.fillRect(self.rect(), Qt.black)
-        p.setPen(QPen(QColor(200,200,200,120),1,Qt.DotLine))
-        for x in range(0,self.width(),32): p.drawLine(x,0,x,self.height())
-        for y in range(0,self.height(),32): p.drawLine(0,y,self.width(),y)
+        p.drawPixmap(0, 0, self._background())
+
+        if self.chart is not None:
+            p.setRenderHint(QPainter.SmoothPixmapTransform, True)
+            self._paint_chart(p)
+            if self.debug_opts.get("show_perf"):
+                st=self.frame_stats
+                p.setPen(QPen(QColor(0,255,0,220),1))
+                p.drawText(8, 16, f"{self.meter.text()}  objects: {st['objects']}  "
+                                  f"query {st['query_ms']:.2f} ms  draw {st['draw_ms']:.2f} ms")
+            p.end()
+            self.meter.end()
+            return
 
         cx,cy=self.width()//2,self.height()//2
         base=self.pm_circle_tinted or self.pm_circle
 
         # approach
         if base and self.pm_approach:
-            phase=(self.t%1600)/1600.0; scale=1.6-0.6*phase
-            target_w=max(1,int(base.width()*scale))
-            pm=self.pm_approach.scaledToWidth(target_w, Qt.SmoothTransformation)
+            phase=(self.t%1600)/1600.0
+            pm_tinted=self._approach_frame(base.width(), phase)
             if self.approach_center_mode=="alpha":
-                sx=pm.width()/self.pm_approach.width(); sy=pm.height()/self.pm_approach.height()
+                sx=pm_tinted.width()/self.pm_approach.width(); sy=pm_tinted.height()/self.pm_approach.height()
                 off=(int(round(self.off_approach[0]*sx)), int(round(self.off_approach[1]*sy)))
             else:
                 off=(0,0)
-            pm_tinted=self._tint(pm, self.combo_color)
             p.setOpacity(0.9)
             self._draw_centered(p, cx, cy, pm_tinted, off, (self.user_offsets["approach_dx"], self.user_offsets["approach_dy"]))
             p.setOpacity(1.0)
@@ -215,3 +604,9 @@ class StdPreview(QWidget):
         if self.debug_opts["show_centers"]:
             self._draw_cross(p, cx+ovl_extra[0], cy+ovl_extra[1], "overlay")
             self._draw_cross(p, cx+num_extra[0], cy+num_extra[1], "number")
+
+        if self.debug_opts.get("show_perf"):
+            p.setPen(QPen(QColor(0,255,0,220),1))
+            p.drawText(8, 16, f"{self.meter.text()}  approach frames: {len(self._approach_frames)}")
+        p.end()
+        self.meter.end()
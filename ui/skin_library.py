@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+皮肤库面板：osu! Skins 目录下所有皮肤的缩略图墙，点一下就切换皮肤。
+- 索引在后台线程里跑（core.skin_library.index_library），条目分批交付、边索引边显示；
+- 缩略图来自磁盘缓存，解码走共享图片缓存的线程池，只在视图真正请求（可见）时才解码；
+- 点击发出 skin_activated；neighbours() 给出视图里相邻的几个皮肤，主窗口用它预加载核心素材。
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import Qt, QSize, Signal
+from PySide6.QtWidgets import QDockWidget, QHBoxLayout, QLabel, QLineEdit, QListView, QPushButton, QVBoxLayout, QWidget
+
+from core import i18n
+from core.skin_library import THUMB_CELL, LibraryEntry, index_library
+from ui.image_cache import image_cache
+from ui.widgets.asset_list import AssetTableModel, make_proxy
+from ui.workers import TaskThread
+
+
+class LibraryModel(AssetTableModel):
+    """行数据是 LibraryEntry；缩略图按需异步解码，到了再通知视图重画那一行。"""
+
+    def __init__(self, parent=None):
+        super().__init__([("", lambda e: e.name)], parent)
+        self._requested: set = set()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        e: LibraryEntry = self.row_data(index.row())
+        if role == Qt.DecorationRole:
+            if e.thumb is None: return None
+            cache = image_cache()
+            if cache.contains(e.thumb):
+                return cache.pixmap(e.thumb)
+            key = str(e.thumb)
+            if key not in self._requested:
+                self._requested.add(key)
+                cache.request(e.thumb, 1.0, lambda _pm, e=e: self._thumb_ready(e))
+            return None
+        if role == Qt.ToolTipRole:
+            lines = [e.name] + ([e.author] if e.author else []) + [str(e.root)]
+            return "\n".join(lines)
+        return super().data(index, role)
+
+    def set_rows(self, rows) -> None:
+        self._requested.clear()
+        super().set_rows(rows)
+
+    def _thumb_ready(self, entry: LibraryEntry):
+        self._requested.discard(str(entry.thumb))   # 之后被 LRU 挤掉还能再请求
+        for i, e in enumerate(self.rows()):
+            if e.root == entry.root:
+                idx = self.index(i, 0)
+                self.dataChanged.emit(idx, idx, [Qt.DecorationRole])
+                return
+
+    def merge(self, entries: List[LibraryEntry]) -> None:
+        """按目录合并：已有的行就地替换（缩略图可能重画过），新的追加在后面。"""
+        pos: Dict[Path, int] = {e.root: i for i, e in enumerate(self.rows())}
+        fresh = []
+        for e in entries:
+            i = pos.get(e.root)
+            if i is None:
+                fresh.append(e); continue
+            self.rows()[i] = e
+            self._requested.discard(str(e.thumb))
+            idx = self.index(i, 0)
+            self.dataChanged.emit(idx, idx)
+        self.append_rows(fresh)
+
+
+class SkinLibraryDock(QDockWidget):
+    skin_activated = Signal(str)    # 被点击的皮肤目录
+
+    def __init__(self, parent=None):
+        super().__init__("Skin Library", parent)
+        self.setObjectName("SkinLibraryDock")
+        self.skins_dir: Optional[Path] = None
+        self._task: Optional[TaskThread] = None
+        self._done = self._total = 0
+
+        w = QWidget(self); self.setWidget(w)
+        self.model = LibraryModel(self)
+        self.proxy = make_proxy(self.model, parent=self)
+        self.proxy.sort(0)
+        self.filter = QLineEdit(w); self.filter.setClearButtonEnabled(True)
+        self.btn_refresh = QPushButton(w)
+        self.view = QListView(w)
+        self.view.setModel(self.proxy)
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)
+        self.view.setWordWrap(True)
+        self.view.setIconSize(QSize(THUMB_CELL * 2, THUMB_CELL))
+        self.view.setGridSize(QSize(THUMB_CELL * 2 + 24, THUMB_CELL + 40))
+        self.view.setEditTriggers(QListView.NoEditTriggers)
+        self.status = QLabel(w)
+
+        top = QHBoxLayout(); top.addWidget(self.filter, 1); top.addWidget(self.btn_refresh)
+        lay = QVBoxLayout(w); lay.setContentsMargins(4, 4, 4, 4)
+        lay.addLayout(top); lay.addWidget(self.view, 1); lay.addWidget(self.status)
+
+        self.filter.textChanged.connect(self.proxy.setFilterFixedString)
+        self.btn_refresh.clicked.connect(self.refresh)
+        self.view.clicked.connect(self._on_clicked)
+        self.retranslate()
+
+    # ---------- public ----------
+    def set_skins_dir(self, skins_dir) -> None:
+        skins_dir = Path(skins_dir)
+        if skins_dir != self.skins_dir:
+            self.skins_dir = skins_dir
+            self.model.clear()
+            self.refresh()
+
+    def refresh(self) -> None:
+        """重新索引：签名没变的皮肤几乎零成本，只有改过的才重画缩略图。"""
+        if self.skins_dir is None: return
+        if self._task is not None:
+            self._task.cancel()
+        skins_dir = self.skins_dir
+        task = TaskThread(lambda progress, cancel, emit: index_library(skins_dir, progress, cancel, emit), self,
+                          with_partial=True)
+        self._task = task
+        task.partial.connect(lambda batch, task=task: task is self._task and self.model.merge(batch))
+        task.progress.connect(lambda done, total, _n, task=task: task is self._task and self._on_progress(done, total))
+        task.succeeded.connect(lambda entries, task=task: self._on_indexed(task, entries))
+        task.finished.connect(lambda task=task: self._on_task_finished(task))
+        task.start()
+
+    def neighbours(self, root, n: int = 2) -> List[Path]:
+        """视图顺序里 root 前后各 n 个皮肤（近的在前）。"""
+        rows = [self.model.row_data(self.proxy.mapToSource(self.proxy.index(r, 0)).row())
+                for r in range(self.proxy.rowCount())]
+        roots = [e.root for e in rows]
+        try: i = roots.index(Path(root))
+        except ValueError: return []
+        out = []
+        for d in range(1, n + 1):
+            for j in (i + d, i - d):
+                if 0 <= j < len(roots): out.append(roots[j])
+        return out
+
+    def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel(); self._task.wait(2000)
+
+    def retranslate(self):
+        self.setWindowTitle(i18n.t("library.dock_title", "Skin Library"))
+        self.filter.setPlaceholderText(i18n.t("library.filter", "Filter skins…"))
+        self.btn_refresh.setText(i18n.t("library.refresh", "Refresh"))
+        self._update_status()
+
+    # ---------- internals ----------
+    def _on_clicked(self, idx):
+        e = self.model.row_data(self.proxy.mapToSource(idx).row())
+        if e is not None:
+            self.skin_activated.emit(str(e.root))
+
+    def _on_progress(self, done, total):
+        self._done, self._total = done, total
+        self._update_status()
+
+    def _on_indexed(self, task, entries):
+        if task is not self._task: return
+        # 有皮肤被删掉时才整体替换（会重置滚动位置），否则批次里早已合并过
+        if {e.root for e in entries} != {e.root for e in self.model.rows()}:
+            self.model.set_rows(entries)
+
+    def _on_task_finished(self, task):
+        if task is self._task:
+            self._task = None
+            self._update_status()
+        task.deleteLater()
+
+    def _update_status(self):
+        if self._task is not None and self._total:
+            self.status.setText(i18n.t("library.indexing", "Indexing skins… {done}/{total}")
+                                .format(done=self._done, total=self._total))
+        else:
+            self.status.setText(i18n.t("library.count", "{n} skins").format(n=self.model.rowCount()))
@@ -1,2 +1,111 @@
-# 预留：将来会把左侧素材列表抽成独立 Widget（排序/搜索/筛选/右键菜单等）
-# MVP 阶段暂时直接使用 QListWidget（见 MainWindow）。
+# -*- coding: utf-8 -*-
+"""
+素材列表 / 表格的 model-view 实现。
+- AssetTableModel：行数据只存轻量元组，显示文本在 data() 里按需生成；视图只请求可见行。
+- append_rows 用 beginInsertRows 分批追加，后台扫描可以边扫边显示。
+- 排序 / 过滤交给 QSortFilterProxyModel（make_proxy）。
+- AssetListWidget：主窗口左侧的“过滤框 + 列表”。
+"""
+from __future__ import annotations
+from typing import Any, Callable, List, Sequence, Tuple
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PySide6.QtWidgets import QLineEdit, QListView, QVBoxLayout, QWidget
+
+# (表头, 取值函数)；取值函数拿到一行数据，返回显示值
+Column = Tuple[str, Callable[[Any], Any]]
+
+
+class AssetTableModel(QAbstractTableModel):
+    def __init__(self, columns: Sequence[Column], parent=None):
+        super().__init__(parent)
+        self._columns = list(columns)
+        self._rows: List[Any] = []
+
+    # ---------- data access ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return self._columns[index.column()][1](self._rows[index.row()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self._columns):
+            return self._columns[section][0]
+        return super().headerData(section, orientation, role)
+
+    def set_headers(self, titles: Sequence[str]) -> None:
+        self._columns = [(t, c[1]) for t, c in zip(titles, self._columns)]
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self._columns) - 1)
+
+    def row_data(self, row: int) -> Any:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def rows(self) -> List[Any]:
+        return self._rows
+
+    # ---------- mutation ----------
+    def set_rows(self, rows: Sequence[Any]) -> None:
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def append_rows(self, rows: Sequence[Any]) -> None:
+        if not rows: return
+        n = len(self._rows)
+        self.beginInsertRows(QModelIndex(), n, n + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        self.set_rows([])
+
+
+def make_proxy(model: AssetTableModel, filter_column: int = 0, parent=None) -> QSortFilterProxyModel:
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setFilterKeyColumn(filter_column)
+    proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+    proxy.setSortCaseSensitivity(Qt.CaseInsensitive)
+    return proxy
+
+
+def source_row(view, proxy: QSortFilterProxyModel) -> int:
+    """视图当前行 -> 源模型行号；没有选中返回 -1。"""
+    idx = view.currentIndex()
+    if not idx.isValid(): return -1
+    return proxy.mapToSource(idx).row()
+
+
+class AssetListWidget(QWidget):
+    """主窗口左侧：过滤框 + 素材列表。行数据是 SkinAsset。"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = AssetTableModel([("", lambda a: f"{a.name}  ({a.scale}x) - {a.path.name}")], self)
+        self.proxy = make_proxy(self.model, parent=self)
+        self.filter = QLineEdit(self)
+        self.filter.setClearButtonEnabled(True)
+        self.view = QListView(self)
+        self.view.setModel(self.proxy)
+        self.view.setUniformItemSizes(True)  # 行高一致，滚动时不必逐行测量
+        self.view.setEditTriggers(QListView.NoEditTriggers)
+        lay = QVBoxLayout(self); lay.setContentsMargins(0, 0, 0, 0)
+        lay.addWidget(self.filter); lay.addWidget(self.view, 1)
+        self.filter.textChanged.connect(self.proxy.setFilterFixedString)
+
+    def set_assets(self, assets) -> None:
+        """assets: Dict[name, SkinAsset]；按名字排序后整体替换。"""
+        self.model.set_rows([assets[n] for n in sorted(assets)])
+
+    def current_asset(self):
+        r = source_row(self.view, self.proxy)
+        return self.model.row_data(r) if r >= 0 else None
+
+    def set_placeholder(self, text: str) -> None:
+        self.filter.setPlaceholderText(text)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+后台任务：把一个耗时的 core 函数放进 QThread 跑，进度 / 结果通过信号回到 GUI 线程。
+
+    task = TaskThread(lambda progress, cancel: export_osk(src, dst, progress, cancel), self)
+    task.progress.connect(...); task.succeeded.connect(...); task.failed.connect(...)
+    task.start()
+"""
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtWidgets import QProgressDialog
+from PySide6.QtCore import Qt
+
+from core import i18n
+
+
+class TaskThread(QThread):
+    progress = Signal(int, int, str)   # done, total, current item
+    succeeded = Signal(object)         # fn 的返回值
+    failed = Signal(str)
+    cancelled = Signal()
+    partial = Signal(object)           # 任务中途交付的阶段性结果
+
+    def __init__(self, fn, parent=None, with_partial: bool = False):
+        super().__init__(parent)
+        self._fn = fn
+        self._cancel = False
+        self._with_partial = with_partial
+
+    def cancel(self):
+        self._cancel = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancel
+
+    def _emit_progress(self, done, total, name=""):
+        self.progress.emit(int(done), int(total), str(name))
+
+    def run(self):
+        try:
+            if self._with_partial:
+                res = self._fn(self._emit_progress, self.is_cancelled, self.partial.emit)
+            else:
+                res = self._fn(self._emit_progress, self.is_cancelled)
+        except Exception as e:
+            if self._cancel:
+                self.cancelled.emit()
+            else:
+                self.failed.emit(str(e))
+            return
+        if self._cancel:
+            self.cancelled.emit()
+        else:
+            self.succeeded.emit(res)
+
+
+def run_with_progress(parent, title: str, fn, on_done=None, on_error=None,
+                      on_partial=None, modal: bool = True):
+    """TaskThread + QProgressDialog（带取消按钮）。total 很大时按千分比显示，避免 int 溢出。
+    on_partial 不为空时 fn 会多收到一个 emit_partial 参数；modal=False 时主窗口在任务期间仍可操作。"""
+    dlg = QProgressDialog(title, i18n.t("common.cancel", "Cancel"), 0, 1000, parent)
+    dlg.setWindowTitle(title)
+    dlg.setWindowModality(Qt.WindowModal if modal else Qt.NonModal)
+    dlg.setMinimumDuration(300)
+    dlg.setAutoClose(False); dlg.setAutoReset(False)
+    task = TaskThread(fn, parent, with_partial=on_partial is not None)
+    if on_partial is not None:
+        task.partial.connect(on_partial)
+
+    def on_progress(done, total, name):
+        dlg.setValue(int(done * 1000 / total) if total > 0 else 0)
+        if name: dlg.setLabelText(f"{title}\n{name}")
+
+    def finish():
+        dlg.close(); task.deleteLater()
+
+    task.progress.connect(on_progress)
+    task.succeeded.connect(lambda res: (finish(), on_done and on_done(res)))
+    task.failed.connect(lambda msg: (finish(), on_error and on_error(msg)))
+    task.cancelled.connect(finish)
+    dlg.canceled.connect(task.cancel)
+    task.start()
+    return task